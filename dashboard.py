@@ -0,0 +1,360 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import joinedload
+
+logger = logging.getLogger(__name__)
+
+# Number of ids read ahead from a shuffle bag, in case the next ones were deleted
+SHUFFLE_LOOKAHEAD = 3
+
+def _utc_isoformat(dt):
+    """ISO timestamp with an explicit UTC offset (SQLite returns stored UTC times naive)."""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.isoformat()
+
+class DashboardLoader:
+    """
+    Builds the frame dashboard's view model in a fixed number of queries.
+
+    Rendering the dashboard used to look up each frame's current photo, next
+    photo and playlist separately, so the page cost several queries per frame.
+    This loader fetches frames (with sync groups), playlist counts, the next
+    entry of every frame and all photos involved in bulk, and keeps the
+    resulting plain-dict view model for a few seconds so rapid reloads and
+    polling don't hit the database at all.
+    """
+
+    def __init__(self, db, models, ttl=5.0):
+        """
+        Initialize the dashboard loader.
+
+        Args:
+            db: SQLAlchemy database instance
+            models: Dictionary containing database models (PhotoFrame, Photo, PlaylistEntry)
+            ttl: Seconds a built view model is reused
+        """
+        self.db = db
+        self.PhotoFrame = models['PhotoFrame']
+        self.Photo = models['Photo']
+        self.PlaylistEntry = models['PlaylistEntry']
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._cached = None
+        self._cached_at = 0.0
+        self.stats = {'builds': 0, 'hits': 0}
+
+    def get(self):
+        """
+        Return the dashboard view model, rebuilding it when the cached one expired.
+
+        Returns:
+            dict: {'generated_at': epoch seconds, 'frames': [frame view, ...]}
+                in dashboard order; see _build for the frame fields
+        """
+        with self._lock:
+            if self._cached is not None and time.time() - self._cached_at < self.ttl:
+                self.stats['hits'] += 1
+                return self._cached
+
+            self._cached = self._build()
+            self._cached_at = time.time()
+            self.stats['builds'] += 1
+            return self._cached
+
+    def refresh(self):
+        """Rebuild the view model now (ignoring the TTL) and cache it."""
+        with self._lock:
+            self._cached = self._build()
+            self._cached_at = time.time()
+            self.stats['builds'] += 1
+            return self._cached
+
+    def get_frames_by_id(self):
+        """Return the cached frame views keyed by frame id."""
+        return {view['id']: view for view in self.get()['frames']}
+
+    def invalidate(self):
+        """Drop the cached view model (e.g. after a frame was added or removed)."""
+        with self._lock:
+            self._cached = None
+
+    def _build(self):
+        """Query everything the dashboard shows and assemble the view model."""
+        session = self.db.session
+        PhotoFrame, Photo, PlaylistEntry = self.PhotoFrame, self.Photo, self.PlaylistEntry
+
+        # 1. Frames with their sync groups
+        frames = (session.query(PhotoFrame)
+                  .options(joinedload(PhotoFrame.sync_group))
+                  .order_by(PhotoFrame.order, PhotoFrame.name)
+                  .all())
+
+        # 2. Playlist sizes
+        counts = dict(session.query(PlaylistEntry.frame_id, func.count(PlaylistEntry.id))
+                      .filter(PlaylistEntry.frame_id.in_([frame.id for frame in frames]))
+                      .group_by(PlaylistEntry.frame_id)
+                      .all()) if frames else {}
+
+        # 3-5. The entry each frame shows next
+        next_photo_ids = self._next_photo_ids(session, [f for f in frames if counts.get(f.id)])
+
+        # 6. Every photo referenced by the dashboard
+        photo_ids = {f.current_photo_id for f in frames if f.current_photo_id} | set(next_photo_ids.values())
+        photos = {photo.id: photo for photo in
+                  session.query(Photo).filter(Photo.id.in_(photo_ids)).all()} if photo_ids else {}
+
+        now = datetime.now(timezone.utc)
+        views = []
+        for frame in frames:
+            views.append({
+                'id': frame.id,
+                'name': frame.name,
+                'frame_type': frame.frame_type,
+                'orientation': frame.orientation,
+                'sleep_interval': frame.sleep_interval,
+                'shuffle_enabled': bool(frame.shuffle_enabled),
+                'sync_group': frame.sync_group.name if frame.sync_group else None,
+                'playlist_count': counts.get(frame.id, 0),
+                'status': list(frame.get_status(now)),
+                'last_wake_time': _utc_isoformat(frame.last_wake_time),
+                'next_wake_time': _utc_isoformat(frame.next_wake_time),
+                'current_photo': self._photo_view(photos.get(frame.current_photo_id), frame.orientation),
+                'next_photo': self._photo_view(photos.get(next_photo_ids.get(frame.id)), frame.orientation)
+            })
+
+        return {'generated_at': time.time(), 'frames': views}
+
+    def _next_photo_ids(self, session, frames):
+        """
+        Find the photo each frame plays next, in at most four queries.
+
+        Returns:
+            dict: frame id -> photo id
+        """
+        PlaylistEntry = self.PlaylistEntry
+        result = {}
+
+        sequential = [frame for frame in frames if not frame.shuffle_enabled]
+        shuffled = [frame for frame in frames if frame.shuffle_enabled]
+
+        # Shuffled frames: the next ids in their bags, looked up together
+        bag_heads = {}
+        for frame in shuffled:
+            bag = frame.shuffle_bag or []
+            position = frame.shuffle_position or 0
+            bag_heads[frame.id] = bag[position:position + SHUFFLE_LOOKAHEAD]
+        wanted = {entry_id for ids in bag_heads.values() for entry_id in ids}
+        if wanted:
+            entries = {entry_id: (frame_id, photo_id) for entry_id, frame_id, photo_id in
+                       session.query(PlaylistEntry.id, PlaylistEntry.frame_id, PlaylistEntry.photo_id)
+                       .filter(PlaylistEntry.id.in_(wanted)).all()}
+            for frame_id, ids in bag_heads.items():
+                for entry_id in ids:
+                    if entries.get(entry_id, (None,))[0] == frame_id:
+                        result[frame_id] = entries[entry_id][1]
+                        break
+
+        if not sequential:
+            return result
+
+        # Sequential frames: resolve cursor positions (the cursor entry's live order when it still exists)
+        cursor_ids = [frame.playlist_cursor_id for frame in sequential if frame.playlist_cursor_id is not None]
+        live_orders = dict(session.query(PlaylistEntry.id, PlaylistEntry.order)
+                           .filter(PlaylistEntry.id.in_(cursor_ids)).all()) if cursor_ids else {}
+
+        after_cursor = []
+        for frame in sequential:
+            if frame.playlist_cursor_id in live_orders:
+                order, entry_id = live_orders[frame.playlist_cursor_id], frame.playlist_cursor_id
+            elif frame.playlist_cursor_order is not None:
+                order, entry_id = frame.playlist_cursor_order, frame.playlist_cursor_id or 0
+            else:
+                continue
+            after_cursor.append(and_(PlaylistEntry.frame_id == frame.id,
+                                     or_(PlaylistEntry.order > order,
+                                         and_(PlaylistEntry.order == order, PlaylistEntry.id > entry_id))))
+
+        def first_per_frame(condition):
+            # First entry by (order, id) of every frame matching the condition
+            ranked = (session.query(PlaylistEntry.frame_id, PlaylistEntry.photo_id,
+                                    func.row_number().over(partition_by=PlaylistEntry.frame_id,
+                                                           order_by=(PlaylistEntry.order, PlaylistEntry.id))
+                                    .label('rank'))
+                      .filter(condition)
+                      .subquery())
+            return dict(session.query(ranked.c.frame_id, ranked.c.photo_id).filter(ranked.c.rank == 1).all())
+
+        if after_cursor:
+            result.update(first_per_frame(or_(*after_cursor)))
+
+        # Frames that haven't started or are at the end of the playlist wrap to their first entry
+        remaining = [frame.id for frame in sequential if frame.id not in result]
+        if remaining:
+            result.update(first_per_frame(PlaylistEntry.frame_id.in_(remaining)))
+        return result
+
+    @staticmethod
+    def _photo_view(photo, orientation):
+        """
+        Plain-dict view of a photo for the dashboard.
+
+        'display' is the version matching the frame's orientation, falling back
+        to the original like /api/frame/<id> does.
+        """
+        if photo is None:
+            return None
+        display = photo.filename
+        if orientation == 'portrait' and photo.portrait_version:
+            display = photo.portrait_version
+        elif orientation == 'landscape' and photo.landscape_version:
+            display = photo.landscape_version
+        return {
+            'id': photo.id,
+            'filename': photo.filename,
+            'display': display,
+            'media_type': photo.media_type or 'photo'
+        }
+
+    def get_stats(self):
+        """Return loader statistics for diagnostics."""
+        return dict(self.stats, ttl=self.ttl)
+
+
+class DashboardFeed:
+    """
+    Streams frame view changes to open dashboards.
+
+    Routes that change a frame (wake-ups, diagnostics, transitions) call
+    notify(). A background thread waits for the burst to settle, rebuilds the
+    view model once with the DashboardLoader, compares it with what was last
+    sent and publishes only the frame views that changed, however many
+    dashboards are open. Frame status also changes with the passage of time
+    (Online -> Offline), so the view model is re-checked every
+    refresh_interval seconds as well. Nothing is built while no dashboard is
+    connected.
+    """
+
+    # Event broker topic the dashboards subscribe to
+    TOPIC = 'dashboard'
+
+    def __init__(self, app, loader, broker, debounce=1.0, refresh_interval=60):
+        """
+        Initialize the dashboard feed.
+
+        Args:
+            app: Flask application instance
+            loader: DashboardLoader building the frame views
+            broker: EventBroker delivering the events
+            debounce: Seconds to collect changes before rebuilding
+            refresh_interval: Seconds between time-driven re-checks
+        """
+        self.app = app
+        self.loader = loader
+        self.broker = broker
+        self.debounce = debounce
+        self.refresh_interval = refresh_interval
+
+        self.running = False
+        self.thread = None
+        self._condition = threading.Condition()
+        self._dirty = False
+        self._published = None  # frame id -> view last sent to dashboards
+        self.stats = {'notifications': 0, 'builds': 0, 'events': 0, 'frames_sent': 0}
+
+    def start(self):
+        """Start the background feed thread."""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._feed_thread, daemon=True)
+        self.thread.start()
+        logger.info("Dashboard feed started")
+
+    def stop(self):
+        """Stop the background feed thread."""
+        with self._condition:
+            self.running = False
+            self._condition.notify()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+        logger.info("Dashboard feed stopped")
+
+    def notify(self, frame_id=None):
+        """
+        Report that a frame changed (after the change was committed).
+
+        Args:
+            frame_id: The changed frame, for logging; all frames are compared
+        """
+        with self._condition:
+            self.stats['notifications'] += 1
+            self._dirty = True
+            self._condition.notify()
+
+    def snapshot(self):
+        """Full frame list sent to a dashboard when it connects."""
+        return self.loader.get()
+
+    def _feed_thread(self):
+        """Rebuild and publish changes when notified or when the refresh interval passes."""
+        while True:
+            with self._condition:
+                if self.running and not self._dirty:
+                    self._condition.wait(timeout=self.refresh_interval)
+                if not self.running:
+                    return
+                self._dirty = False
+
+            if not self.broker.has_subscribers(self.TOPIC):
+                # Nobody is watching; the next dashboard starts from a fresh snapshot
+                self._published = None
+                continue
+
+            # Let a burst of changes (e.g. a whole sync group waking) settle into one build
+            time.sleep(self.debounce)
+            with self._condition:
+                self._dirty = False
+
+            try:
+                with self.app.app_context():
+                    model = self.loader.refresh()
+                self.stats['builds'] += 1
+                self._publish_changes(model)
+            except Exception as e:
+                logger.error(f"Error updating dashboard feed: {str(e)}", exc_info=True)
+
+    def _publish_changes(self, model):
+        """Send the frame views that differ from the previously published ones."""
+        current = {view['id']: view for view in model['frames']}
+        previous = self._published
+        self._published = current
+        if previous is None:
+            # First build since dashboards connected: their snapshot may predate it, send everything
+            previous = {}
+
+        changed = [view for frame_id, view in current.items() if previous.get(frame_id) != view]
+        removed = [frame_id for frame_id in previous if frame_id not in current]
+        if not changed and not removed:
+            return
+
+        self.broker.publish(self.TOPIC, 'frames', {
+            'generated_at': model['generated_at'],
+            'frames': changed,
+            'removed': removed
+        })
+        self.stats['events'] += 1
+        self.stats['frames_sent'] += len(changed)
+
+    def get_stats(self):
+        """Return feed statistics for diagnostics."""
+        return dict(self.stats, running=self.running, debounce=self.debounce,
+                    refresh_interval=self.refresh_interval)
@@ -11,7 +11,7 @@ import argparse
 import json
 import sqlite3
 from datetime import datetime
-from sqlalchemy import create_engine, inspect, MetaData, Table, Column, Integer, String, DateTime, Float, Boolean, ForeignKey, Text
+from sqlalchemy import create_engine, inspect, text, MetaData, Table, Column, Integer, String, DateTime, Float, Boolean, ForeignKey, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.types import JSON
@@ -71,6 +71,77 @@ def create_database():
         logger.error(f"Error creating database: {e}")
         return False
 
+def add_missing_columns(engine, metadata):
+    """
+    Add model columns that are missing from existing tables.
+
+    Only columns SQLite can add in place are handled: nullable columns and
+    columns with a scalar default. Anything else is reported for a manual
+    migration.
+
+    Args:
+        engine: SQLAlchemy engine bound to the database
+        metadata: MetaData holding the current models
+
+    Returns:
+        list: "table.column" names that were added
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with engine.begin() as connection:
+        for table_name, table in metadata.tables.items():
+            if table_name not in existing_tables:
+                continue
+            existing_columns = {col['name'] for col in inspector.get_columns(table_name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+
+                column_type = column.type.compile(dialect=engine.dialect)
+                ddl = f'ALTER TABLE "{table_name}" ADD COLUMN "{column.name}" {column_type}'
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if default is not None:
+                    ddl += f" DEFAULT {int(default) if isinstance(default, bool) else repr(default)}"
+                elif not column.nullable:
+                    logger.info(f"Please run a manual migration for column '{table_name}.{column.name}'")
+                    continue
+
+                connection.execute(text(ddl))
+                added.append(f"{table_name}.{column.name}")
+                logger.info(f"Added column '{table_name}.{column.name}'")
+
+    return added
+
+def ensure_indexes(engine, metadata):
+    """
+    Create model indexes that are missing from existing tables.
+
+    Args:
+        engine: SQLAlchemy engine bound to the database
+        metadata: MetaData holding the current models
+
+    Returns:
+        list: Names of the indexes that were created
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+
+    for table_name, table in metadata.tables.items():
+        if table_name not in existing_tables:
+            continue
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table_name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            index.create(engine)
+            created.append(index.name)
+            logger.info(f"Created index '{index.name}' on '{table_name}'")
+
+    return created
+
 def migrate_database():
     """Migrate the database schema to match the current models"""
     try:
@@ -97,20 +168,15 @@ def migrate_database():
                 for table_name in missing_tables:
                     metadata.tables[table_name].create(engine)
             
-            # Check for missing columns in existing tables
-            for table_name in existing_tables:
-                if table_name in metadata.tables:
-                    # Get existing columns
-                    existing_columns = {col['name'] for col in inspector.get_columns(table_name)}
-                    
-                    # Get model columns
-                    model_columns = {col.name for col in metadata.tables[table_name].columns}
-                    
-                    # Find missing columns
-                    missing_columns = model_columns - existing_columns
-                    if missing_columns:
-                        logger.info(f"Table '{table_name}' is missing columns: {', '.join(missing_columns)}")
-                        logger.info(f"Please run a manual migration for table '{table_name}'")
+            # Add missing columns to existing tables
+            added_columns = add_missing_columns(engine, metadata)
+            if added_columns:
+                logger.info(f"Added columns: {', '.join(added_columns)}")
+
+            # Create missing indexes
+            created_indexes = ensure_indexes(engine, metadata)
+            if created_indexes:
+                logger.info(f"Created indexes: {', '.join(created_indexes)}")
             
             logger.info("Database migration check complete!")
             return True
@@ -0,0 +1,86 @@
+import logging
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+# SQLite performance profile
+#
+# Frames wake concurrently, and the scheduler, the frame timing manager and
+# the ingest/prerender workers all write from background threads. With
+# SQLite's defaults (rollback journal, no busy timeout) a writer blocks every
+# reader and a second writer fails at once with "database is locked".
+#
+# WAL lets readers proceed while one connection writes, synchronous=NORMAL is
+# safe under WAL and avoids an fsync per commit, and the busy timeout makes a
+# competing writer wait for the lock instead of failing. Everything in the
+# process shares the Flask-SQLAlchemy engine, so there is one pool of
+# connections configured this way.
+# ------------------------------------------------------------------------------
+
+# Seconds a connection waits for another writer to release the database
+BUSY_TIMEOUT_SECONDS = 30
+
+# Pool settings for the shared engine (SQLite connections are cheap, but the
+# pool bounds how many threads hold a connection at the same time)
+POOL_SIZE = 10
+MAX_OVERFLOW = 10
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': BUSY_TIMEOUT_SECONDS * 1000,
+    'temp_store': 'MEMORY',
+    'cache_size': -16000  # KiB (negative = size rather than pages), i.e. 16 MB per connection
+}
+
+def engine_options(database_uri):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for the app's database.
+
+    Args:
+        database_uri: The SQLALCHEMY_DATABASE_URI in use
+
+    Returns:
+        dict: Engine options (empty for databases other than file-based SQLite)
+    """
+    if not database_uri.startswith('sqlite:') or database_uri in ('sqlite://', 'sqlite:///:memory:'):
+        return {}
+    return {
+        'connect_args': {
+            'timeout': BUSY_TIMEOUT_SECONDS,
+            # Connections are handed between threads through the pool
+            'check_same_thread': False
+        },
+        'pool_size': POOL_SIZE,
+        'max_overflow': MAX_OVERFLOW,
+        'pool_pre_ping': True
+    }
+
+def install_sqlite_pragmas(engine):
+    """
+    Apply SQLITE_PRAGMAS to every new connection of an engine.
+
+    Must be called before the engine opens its first connection.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    logger.info(f"SQLite tuning enabled: {', '.join(f'{k}={v}' for k, v in SQLITE_PRAGMAS.items())}")
+
+def get_pragmas(engine):
+    """Read back the tuned pragmas from a live connection (for diagnostics)."""
+    if engine.dialect.name != 'sqlite':
+        return {}
+    with engine.connect() as connection:
+        return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in SQLITE_PRAGMAS}
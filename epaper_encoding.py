@@ -0,0 +1,398 @@
+import logging
+import struct
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+# Transfer encodings for packed e-paper buffers
+#
+# A packed 4bpp panel buffer (see imgToArray.pack_4bit) is 960,000 bytes for
+# the 1200x1600 panel. Quantized, dithered images have long runs and repeated
+# patterns, so they shrink a lot before they go over the air, and the radio
+# time is what drains frame batteries.
+#
+# An encoded buffer is a fixed 24-byte header followed by the payload:
+#
+#   offset size  field
+#   0      4     magic b'EPD1'
+#   4      1     header version (1)
+#   5      1     encoding: 0 = raw, 1 = rle (PackBits), 2 = zlib (deflate),
+#                3 = delta (changed tiles, see below); a buffer that an
+#                encoding would not shrink is sent raw
+#   6      2     width in pixels
+#   8      2     height in pixels
+#   10     1     bits per pixel (4)
+#   11     1     reserved (0)
+#   12     4     length of the decoded buffer in bytes
+#   16     4     CRC-32 of the decoded buffer
+#   20     4     length of the payload in bytes
+#
+# All integers are little-endian. RLE is PackBits: a header byte n in 0..127
+# is followed by n + 1 literal bytes; n in 129..255 is followed by one byte
+# that is repeated 257 - n times (2..128); 128 is ignored. Both encodings are
+# small enough to decode on the frame's microcontroller while streaming.
+#
+# A delta carries only the tiles that differ from a buffer the frame already
+# shows, for frames that can refresh part of the panel. Its payload is
+# deflated and, once inflated, holds:
+#
+#   4 bytes  CRC-32 of the base buffer the delta applies to
+#   2 bytes  tile width in pixels
+#   2 bytes  tile height in pixels
+#   2 bytes  number of tiles
+#   per tile: x and y of the tile's top-left pixel (2 bytes each), then the
+#             tile's packed rows, top to bottom
+#
+# The header's length and CRC-32 describe the full buffer after the tiles
+# are applied, so the frame can verify the result.
+# ------------------------------------------------------------------------------
+
+MAGIC = b'EPD1'
+HEADER_VERSION = 1
+HEADER = struct.Struct('<4sBBHHBBIII')
+
+ENCODING_RAW = 0
+ENCODING_RLE = 1
+ENCODING_ZLIB = 2
+ENCODING_DELTA = 3
+
+ENCODINGS = {'raw': ENCODING_RAW, 'rle': ENCODING_RLE, 'zlib': ENCODING_ZLIB}
+
+# /api/next_photo ?type= values and the encoding each returns
+OUTPUT_TYPES = {'compressed_rle': 'rle', 'compressed_zlib': 'zlib'}
+
+# ?type= for delta updates (falls back to a full 'zlib' buffer when no base is known)
+DELTA_OUTPUT_TYPE = 'compressed_delta'
+
+PANEL_WIDTH = 1200
+PANEL_HEIGHT = 1600
+BITS_PER_PIXEL = 4
+
+# zlib effort; level 6 is nearly as small as 9 at a fraction of the CPU time
+ZLIB_LEVEL = 6
+
+# Runs shorter than this are cheaper to send as part of a literal block
+MIN_RUN = 3
+MAX_PACKET = 128
+
+# 80x80 pixel tiles split the 1200x1600 panel into a 15x20 grid
+TILE_SIZE = 80
+
+# Above this share of changed tiles a full buffer is sent instead of a delta
+MAX_DELTA_FRACTION = 0.5
+
+DELTA_HEADER = struct.Struct('<IHHH')
+TILE_ORIGIN = struct.Struct('<HH')
+
+def rle_encode(data):
+    """
+    PackBits-encode a buffer.
+
+    Args:
+        data: Bytes-like buffer
+
+    Returns:
+        bytes: The encoded buffer
+    """
+    values = np.frombuffer(data, dtype=np.uint8)
+    if values.size == 0:
+        return b''
+
+    # Start index and length of every run of equal bytes
+    boundaries = np.flatnonzero(np.diff(values)) + 1
+    starts = np.concatenate(([0], boundaries))
+    lengths = np.diff(np.concatenate((starts, [values.size])))
+
+    # Only runs long enough to pay off are encoded as repeats; everything between them is literal
+    long_runs = lengths >= MIN_RUN
+    run_starts = starts[long_runs].tolist()
+    run_lengths = lengths[long_runs].tolist()
+
+    raw = bytes(data)
+    out = bytearray()
+
+    def literal(begin, end):
+        for chunk in range(begin, end, MAX_PACKET):
+            block = raw[chunk:min(chunk + MAX_PACKET, end)]
+            out.append(len(block) - 1)
+            out.extend(block)
+
+    position = 0
+    for start, length in zip(run_starts, run_lengths):
+        literal(position, start)
+        value = raw[start]
+        end = start + length
+        while end - start >= MIN_RUN:
+            count = min(end - start, MAX_PACKET)
+            out.append(257 - count)
+            out.append(value)
+            start += count
+        # A remainder of one or two bytes joins the following literal block
+        position = start
+    literal(position, len(raw))
+    return bytes(out)
+
+def rle_decode(data):
+    """
+    Reference PackBits decoder (a direct model for frame firmware).
+
+    Raises:
+        ValueError: If the payload is truncated
+    """
+    out = bytearray()
+    index = 0
+    length = len(data)
+    while index < length:
+        header = data[index]
+        index += 1
+        if header < 128:
+            count = header + 1
+            if index + count > length:
+                raise ValueError('Truncated RLE literal block')
+            out += data[index:index + count]
+            index += count
+        elif header > 128:
+            if index >= length:
+                raise ValueError('Truncated RLE run')
+            out += bytes((data[index],)) * (257 - header)
+            index += 1
+    return bytes(out)
+
+def encode(buffer, encoding, width=PANEL_WIDTH, height=PANEL_HEIGHT):
+    """
+    Wrap a packed panel buffer in the transfer header, encoding its payload.
+
+    A buffer that doesn't shrink (e.g. noisy images under RLE) is sent raw
+    instead; the header records the encoding actually used.
+
+    Args:
+        buffer: Packed 4bpp buffer as produced by img_to_array
+        encoding: 'raw', 'rle' or 'zlib'
+        width / height: Panel dimensions the buffer was packed for
+
+    Returns:
+        bytes: Header followed by the encoded payload
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown e-paper encoding: {encoding}")
+
+    if encoding == 'rle':
+        payload = rle_encode(buffer)
+    elif encoding == 'zlib':
+        payload = zlib.compress(buffer, ZLIB_LEVEL)
+    else:
+        payload = bytes(buffer)
+
+    if len(payload) >= len(buffer) and encoding != 'raw':
+        logger.debug(f"{encoding} would grow the buffer to {len(payload)} bytes, sending it raw")
+        encoding = 'raw'
+        payload = bytes(buffer)
+
+    header = _pack_header(ENCODINGS[encoding], buffer, payload, width, height)
+    logger.debug(f"Encoded {len(buffer)} byte panel buffer as {encoding}: {len(payload)} bytes "
+                 f"({len(payload) / max(len(buffer), 1):.1%})")
+    return header + payload
+
+def _pack_header(encoding, buffer, payload, width, height):
+    return HEADER.pack(MAGIC, HEADER_VERSION, encoding, width, height, BITS_PER_PIXEL, 0,
+                       len(buffer), zlib.crc32(buffer), len(payload))
+
+def _tile_grid(buffer, width, height, tile_size):
+    """View a packed buffer as (tile row, pixel row, tile column, tile bytes)."""
+    tile_bytes = tile_size * BITS_PER_PIXEL // 8
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(
+        height // tile_size, tile_size, width // tile_size, tile_bytes)
+
+def changed_tiles(base, target, width=PANEL_WIDTH, height=PANEL_HEIGHT, tile_size=TILE_SIZE):
+    """
+    Find the tiles that differ between two packed buffers.
+
+    Returns:
+        list: (x, y) pixel origins of the changed tiles, row by row
+    """
+    base_tiles = _tile_grid(base, width, height, tile_size)
+    target_tiles = _tile_grid(target, width, height, tile_size)
+    changed = (base_tiles != target_tiles).any(axis=(1, 3))
+    return [(int(column) * tile_size, int(row) * tile_size) for row, column in zip(*np.nonzero(changed))]
+
+def encode_delta(base, target, width=PANEL_WIDTH, height=PANEL_HEIGHT, tile_size=TILE_SIZE):
+    """
+    Encode a target buffer as the tiles that changed since a base buffer.
+
+    Args:
+        base: Packed buffer the frame currently shows
+        target: Packed buffer it should show next
+        width / height: Panel dimensions (multiples of tile_size)
+        tile_size: Tile edge in pixels
+
+    Returns:
+        bytes or None: Header and delta payload, or None when a delta doesn't
+            pay off (different sizes or too many changed tiles)
+    """
+    if len(base) != len(target) or width % tile_size or height % tile_size:
+        return None
+
+    tiles = changed_tiles(base, target, width, height, tile_size)
+    if len(tiles) > MAX_DELTA_FRACTION * (width // tile_size) * (height // tile_size):
+        return None
+
+    target_tiles = _tile_grid(target, width, height, tile_size)
+    body = bytearray(DELTA_HEADER.pack(zlib.crc32(base), tile_size, tile_size, len(tiles)))
+    for x, y in tiles:
+        body += TILE_ORIGIN.pack(x, y)
+        body += target_tiles[y // tile_size, :, x // tile_size, :].tobytes()
+
+    payload = zlib.compress(bytes(body), ZLIB_LEVEL)
+    logger.debug(f"Delta of {len(tiles)} tiles: {len(payload)} bytes")
+    return _pack_header(ENCODING_DELTA, target, payload, width, height) + payload
+
+def apply_delta(base, payload, width=PANEL_WIDTH):
+    """
+    Reference delta decoder: patch the changed tiles into a copy of the base buffer.
+
+    Raises:
+        ValueError: If the delta was made for a different base buffer
+    """
+    body = zlib.decompress(payload)
+    base_crc, tile_width, tile_height, count = DELTA_HEADER.unpack_from(body)
+    if zlib.crc32(base) != base_crc:
+        raise ValueError('Delta does not apply to this base buffer')
+
+    buffer = bytearray(base)
+    row_bytes = width * BITS_PER_PIXEL // 8
+    tile_row_bytes = tile_width * BITS_PER_PIXEL // 8
+    offset = DELTA_HEADER.size
+    for _ in range(count):
+        x, y = TILE_ORIGIN.unpack_from(body, offset)
+        offset += TILE_ORIGIN.size
+        for row in range(tile_height):
+            start = (y + row) * row_bytes + x * BITS_PER_PIXEL // 8
+            buffer[start:start + tile_row_bytes] = body[offset:offset + tile_row_bytes]
+            offset += tile_row_bytes
+    return bytes(buffer)
+
+def read_header(data):
+    """
+    Parse the transfer header.
+
+    Returns:
+        dict: encoding, width, height, bits_per_pixel, length, crc32, payload_length
+
+    Raises:
+        ValueError: If the data doesn't start with a valid header
+    """
+    if len(data) < HEADER.size:
+        raise ValueError('Buffer shorter than the header')
+    magic, version, encoding, width, height, bits_per_pixel, _, length, crc, payload_length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != HEADER_VERSION:
+        raise ValueError('Not an encoded e-paper buffer')
+
+    names = {code: name for name, code in ENCODINGS.items()}
+    names[ENCODING_DELTA] = 'delta'
+    if encoding not in names:
+        raise ValueError(f"Unknown encoding {encoding}")
+    return {
+        'encoding': names[encoding],
+        'width': width,
+        'height': height,
+        'bits_per_pixel': bits_per_pixel,
+        'length': length,
+        'crc32': crc,
+        'payload_length': payload_length
+    }
+
+def decode(data, base=None):
+    """
+    Reference decoder: verify the header and checksum and return the packed buffer.
+
+    Args:
+        data: Encoded bytes (header and payload)
+        base: The buffer the frame shows, required to apply a delta
+
+    Raises:
+        ValueError: If the data is malformed or fails the checksum
+    """
+    header = read_header(data)
+    payload = bytes(data[HEADER.size:HEADER.size + header['payload_length']])
+    if len(payload) != header['payload_length']:
+        raise ValueError('Truncated payload')
+
+    if header['encoding'] == 'rle':
+        buffer = rle_decode(payload)
+    elif header['encoding'] == 'zlib':
+        buffer = zlib.decompress(payload)
+    elif header['encoding'] == 'delta':
+        if base is None:
+            raise ValueError('A delta needs the base buffer it applies to')
+        buffer = apply_delta(base, payload, header['width'])
+    else:
+        buffer = payload
+
+    if len(buffer) != header['length'] or zlib.crc32(buffer) != header['crc32']:
+        raise ValueError('Decoded buffer failed the length/checksum check')
+    return buffer
+
+def _self_check(samples):
+    """Round-trip every encoding over the samples, printing sizes. Returns True if all pass."""
+    ok = True
+    for name, buffer in samples:
+        sizes = []
+        for encoding in ENCODINGS:
+            encoded = encode(buffer, encoding)
+            passed = decode(encoded) == buffer
+            ok = ok and passed
+            sizes.append(f"{encoding}={len(encoded)}{'' if passed else ' FAILED'}")
+        print(f"{name}: {len(buffer)} bytes -> {', '.join(sizes)}")
+
+    # Deltas: a small change, a large change (no delta), and the wrong base
+    base = samples[1][1]
+    target = bytearray(base)
+    target[600 * 100 + 10:600 * 100 + 20] = bytes(10)
+    target[-1] ^= 0xFF
+    delta = encode_delta(base, bytes(target))
+    passed = delta is not None and decode(delta, base) == bytes(target)
+    print(f"delta: {len(delta) if delta else None} bytes, {len(changed_tiles(base, bytes(target)))} tiles"
+          f"{'' if passed else ' FAILED'}")
+    ok = ok and passed and encode_delta(base, samples[0][1]) is None
+    try:
+        decode(delta, samples[0][1])
+        print("delta on wrong base: NOT DETECTED")
+        ok = False
+    except ValueError:
+        print("delta on wrong base: detected")
+
+    # Corruption must be detected
+    encoded = bytearray(encode(samples[0][1], 'rle'))
+    encoded[-1] ^= 0xFF
+    try:
+        decode(bytes(encoded))
+        print("corrupted payload: NOT DETECTED")
+        ok = False
+    except (ValueError, zlib.error):
+        print("corrupted payload: detected")
+    return ok
+
+if __name__ == "__main__":
+    import sys
+
+    pixels = PANEL_WIDTH * PANEL_HEIGHT * BITS_PER_PIXEL // 8
+    rng = np.random.default_rng(0)
+    samples = [
+        ('blank', bytes([0x11]) * pixels),
+        ('noise', rng.integers(0, 256, pixels, dtype=np.uint8).tobytes()),
+        ('bands', np.repeat(rng.integers(0, 256, pixels // 100, dtype=np.uint8), 100).tobytes()),
+        ('short runs', np.repeat(rng.integers(0, 256, pixels // 2, dtype=np.uint8), 2).tobytes()),
+        ('edge cases', bytes([1, 2, 2, 3, 3, 3]) + bytes(300) + bytes(range(256)) * 3 + bytes([7]))
+    ]
+
+    # Optionally include real renders: python epaper_encoding.py photo.jpg ...
+    if len(sys.argv) > 1:
+        from PIL import Image
+        from imgToArray import img_to_array
+        for path in sys.argv[1:]:
+            samples.append((path, img_to_array(Image.open(path))))
+
+    sys.exit(0 if _self_check(samples) else 1)
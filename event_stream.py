@@ -0,0 +1,165 @@
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+# Server-Sent Events
+#
+# EventBroker is an in-process publish/subscribe hub. Producers (the frame
+# timing manager, API routes) publish small JSON events on a topic such as
+# "frame:<id>"; every open SSE response subscribed to that topic receives
+# them. A subscriber is only a bounded queue, and an idle connection costs a
+# thread blocked on that queue plus a keep-alive comment every
+# HEARTBEAT_SECONDS, so hundreds of open browser frames are cheap compared
+# with each of them polling the API.
+# ------------------------------------------------------------------------------
+
+# Seconds between keep-alive comments on an idle stream (also how quickly a
+# closed connection is noticed)
+HEARTBEAT_SECONDS = 15
+
+# Events buffered per subscriber; a subscriber that falls further behind
+# loses the oldest ones (every event carries the full state, so the latest wins)
+SUBSCRIBER_QUEUE_SIZE = 32
+
+# Browsers wait this long before reconnecting a dropped stream
+RETRY_MILLISECONDS = 5000
+
+def format_event(event_type, data, event_id=None):
+    """Encode one event in the text/event-stream wire format."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    for line in json.dumps(data, default=str).splitlines():
+        lines.append(f"data: {line}")
+    return '\n'.join(lines) + '\n\n'
+
+class Subscription:
+    """One open event stream: a bounded queue of (id, type, data) for a set of topics."""
+
+    def __init__(self, broker, topics):
+        self.broker = broker
+        self.topics = topics
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+
+    def put(self, event):
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                # Drop the oldest event to make room for the newest
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        """Stop receiving events (safe to call more than once)."""
+        if not self.closed:
+            self.closed = True
+            self.broker._unsubscribe(self)
+
+class EventBroker:
+    """
+    Publish/subscribe hub behind the SSE endpoints.
+    """
+
+    def __init__(self, heartbeat=HEARTBEAT_SECONDS):
+        """
+        Initialize the event broker.
+
+        Args:
+            heartbeat: Seconds between keep-alive comments on idle streams
+        """
+        self.heartbeat = heartbeat
+        self._lock = threading.Lock()
+        self._subscribers = {}  # topic -> set of Subscription
+        self._ids = itertools.count(1)
+        self.stats = {'published': 0, 'delivered': 0, 'connections': 0}
+
+    def subscribe(self, *topics):
+        """
+        Open a subscription to one or more topics.
+
+        Returns:
+            Subscription: Close it (or exhaust stream()) when the client goes away
+        """
+        subscription = Subscription(self, topics)
+        with self._lock:
+            for topic in topics:
+                self._subscribers.setdefault(topic, set()).add(subscription)
+            self.stats['connections'] += 1
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def publish(self, topic, event_type, data):
+        """
+        Send an event to every subscriber of a topic.
+
+        Returns:
+            int: Number of subscribers it was queued for
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+            event_id = next(self._ids)
+            self.stats['published'] += 1
+            self.stats['delivered'] += len(subscribers)
+
+        for subscription in subscribers:
+            subscription.put((event_id, event_type, data))
+        return len(subscribers)
+
+    def has_subscribers(self, topic):
+        """Check whether anyone listens on a topic (to skip building unused events)."""
+        with self._lock:
+            return bool(self._subscribers.get(topic))
+
+    def stream(self, subscription, initial=()):
+        """
+        Generate the text/event-stream body for a subscription.
+
+        Args:
+            subscription: Subscription from subscribe()
+            initial: (event_type, data) pairs sent first, e.g. the current state
+
+        Yields:
+            str: Encoded events and keep-alive comments until the client disconnects
+        """
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            for event_type, data in initial:
+                yield format_event(event_type, data)
+
+            while not subscription.closed:
+                try:
+                    event_id, event_type, data = subscription.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    # Keeps proxies from timing out the connection and detects closed clients
+                    yield f": keep-alive {int(time.time())}\n\n"
+                    continue
+                yield format_event(event_type, data, event_id)
+        finally:
+            subscription.close()
+
+    def get_stats(self):
+        """Return broker statistics for diagnostics."""
+        with self._lock:
+            return dict(self.stats,
+                        topics=len(self._subscribers),
+                        subscribers=sum(len(subscribers) for subscribers in self._subscribers.values()))
@@ -1,21 +1,42 @@
+import heapq
+import itertools
 import logging
 import threading
 import time
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+import playlist_cursor
+import shuffle_bag
+
 logger = logging.getLogger(__name__) 
 
 class FrameTimingManager:
     """
     Manages the timing of virtual frame transitions on the server side.
-    This class runs a background thread that periodically checks for frames
-    that need to transition to the next photo and updates their state.
+
+    Upcoming transitions are kept in a min-heap of (deadline, frame id). The
+    background thread sleeps on a condition until the earliest deadline and
+    only touches the database for frames that are actually due, so the cost
+    scales with the number of transitions rather than frames x seconds.
+
+    The heap is re-armed through notify(): explicitly by callers, and
+    automatically whenever a PhotoFrame row is inserted, updated or deleted
+    in any session (so changed sleep intervals, frame types and forced
+    transitions take effect at once). A periodic resync from the database
+    covers changes made outside this process.
+
+    After every committed transition (scheduled or forced) the optional
+    on_transition callback is called, which pushes the new photo to browser
+    frames listening on their event stream.
     """
+
+    # Seconds between full reloads of the schedule from the database
+    RESYNC_INTERVAL = 600
     
-    def __init__(self, app, db, models):
+    def __init__(self, app, db, models, on_transition=None):
         """
         Initialize the frame timing manager.
         
@@ -23,20 +44,38 @@ class FrameTimingManager:
             app: Flask application instance
             db: SQLAlchemy database instance
             models: Dictionary containing database models
+            on_transition: Optional callable(session, frame) run after a
+                transition has been committed
         """
         self.app = app
         self.db = db
+        self.on_transition = on_transition
         self.PhotoFrame = models['PhotoFrame']
         self.Photo = models['Photo']
         self.PlaylistEntry = models['PlaylistEntry']
         
         self.running = False
         self.thread = None
-        self.check_interval = 1.0  # Check every second
+
+        # Timer heap of (deadline timestamp, sequence, frame id). Entries whose
+        # deadline no longer matches self._deadlines are stale and skipped.
+        self._condition = threading.Condition()
+        self._heap = []
+        self._deadlines = {}
+        self._sequence = itertools.count()
+        self._pending = set()       # Frame ids to reload from the database
+        self._resync = True         # Reload every virtual frame on the next wakeup
+        self.stats = {'wakeups': 0, 'transitions': 0, 'resyncs': 0}
         
-        # Create a separate database session for the background thread
-        self.engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+        # Separate sessions for the background thread, on the app's shared (tuned) engine
+        with app.app_context():
+            self.engine = db.engine
         self.Session = sessionmaker(bind=self.engine)
+
+        # Re-arm on every change to a frame row, whichever session makes it
+        event.listen(self.PhotoFrame, 'after_insert', self._on_frame_changed)
+        event.listen(self.PhotoFrame, 'after_update', self._on_frame_changed)
+        event.listen(self.PhotoFrame, 'after_delete', self._on_frame_deleted)
         
         logger.debug("Frame Timing Manager initialized")
     
@@ -57,96 +96,209 @@ class FrameTimingManager:
             logger.debug("Frame Timing Manager is not running")
             return
         
-        self.running = False
+        with self._condition:
+            self.running = False
+            self._condition.notify()
         if self.thread:
             self.thread.join(timeout=5.0)
             logger.info("Frame Timing Manager stopped")
+
+    def notify(self, frame_id=None):
+        """
+        Re-arm the timer for a frame after its timing may have changed.
+
+        Args:
+            frame_id: Frame to reload from the database, or None to reload all frames
+        """
+        with self._condition:
+            if frame_id is None:
+                self._resync = True
+            else:
+                self._pending.add(frame_id)
+            self._condition.notify()
+
+    def get_stats(self):
+        """Return scheduler statistics for diagnostics."""
+        with self._condition:
+            next_deadline = self._next_deadline()
+            return dict(self.stats,
+                        running=self.running,
+                        scheduled=len(self._deadlines),
+                        next_transition_in=(max(0.0, next_deadline - time.time())
+                                            if next_deadline is not None else None))
+
+    def _on_frame_changed(self, mapper, connection, target):
+        # Runs during flush, so only the in-memory schedule is touched (a due
+        # frame is re-read before it transitions, in case of a rollback)
+        loaded = inspect(target).dict
+        if 'frame_type' not in loaded or 'next_wake_time' not in loaded:
+            # Reading expired attributes here would query mid-flush; let the thread reload it
+            self.notify(target.id)
+        elif target.frame_type == 'virtual' and target.next_wake_time:
+            self._schedule(target.id, self._ensure_aware(target.next_wake_time).timestamp())
+        else:
+            self._schedule(target.id, None)
+
+    def _on_frame_deleted(self, mapper, connection, target):
+        self._schedule(target.id, None)
+
+    def _schedule(self, frame_id, deadline):
+        """Set (or with deadline None, clear) a frame's next transition time."""
+        with self._condition:
+            if deadline is None:
+                self._deadlines.pop(frame_id, None)
+                return
+            if self._deadlines.get(frame_id) == deadline:
+                return
+            self._deadlines[frame_id] = deadline
+            heapq.heappush(self._heap, (deadline, next(self._sequence), frame_id))
+            # Wake the thread in case this deadline is earlier than the one it sleeps for
+            self._condition.notify()
+
+    def _next_deadline(self):
+        """Earliest live deadline (drops stale heap entries). Call with the lock held."""
+        while self._heap:
+            deadline, _, frame_id = self._heap[0]
+            if self._deadlines.get(frame_id) == deadline:
+                return deadline
+            heapq.heappop(self._heap)
+        return None
     
     def _timing_thread(self):
-        """Background thread that checks for frames that need to transition."""
+        """Background thread that sleeps until the next transition is due."""
         logger.debug("Frame timing thread started")
+        last_resync = 0.0
         
         while self.running:
             try:
-                self._check_frames()
+                with self._condition:
+                    while self.running:
+                        if self._resync or self._pending:
+                            break
+                        if time.time() - last_resync >= self.RESYNC_INTERVAL:
+                            self._resync = True
+                            break
+                        next_deadline = self._next_deadline()
+                        now = time.time()
+                        if next_deadline is not None and next_deadline <= now:
+                            break
+                        timeout = self.RESYNC_INTERVAL - (now - last_resync)
+                        if next_deadline is not None:
+                            timeout = min(timeout, next_deadline - now)
+                        self._condition.wait(timeout)
+
+                    if not self.running:
+                        break
+                    self.stats['wakeups'] += 1
+                    resync, self._resync = self._resync, False
+                    pending, self._pending = self._pending, set()
+                    due = self._pop_due(time.time())
+
+                if resync:
+                    self._load_schedule()
+                    last_resync = time.time()
+                elif pending:
+                    self._load_schedule(pending)
+                if due:
+                    self._transition_due(due)
             except Exception as e:
                 logger.error(f"Error in frame timing thread: {str(e)}", exc_info=True)
-            
-            # Sleep for the check interval
-            time.sleep(self.check_interval)
+                # Avoid a tight loop if the database is unavailable
+                time.sleep(1.0)
+
+    def _pop_due(self, now):
+        """Remove and return the ids of frames whose deadline has passed. Call with the lock held."""
+        due = []
+        while (deadline := self._next_deadline()) is not None and deadline <= now:
+            _, _, frame_id = heapq.heappop(self._heap)
+            del self._deadlines[frame_id]
+            due.append(frame_id)
+        return due
     
     def _ensure_aware(self, dt):
         """
         Ensure a datetime is timezone-aware by adding UTC timezone if needed.
         
         Args:
-            dt: A datetime object
+            dt: A datetime object (or None)
             
         Returns:
-            A timezone-aware datetime object
+            A timezone-aware datetime object (None for None)
         """
+        if dt is None:
+            return None
         if dt.tzinfo is None or dt.tzinfo.utcoffset(dt) is None:
             # Assume naive datetime is in UTC
             return dt.replace(tzinfo=timezone.utc)
         return dt
+
+    def _load_schedule(self, frame_ids=None):
+        """
+        Rebuild deadlines from the database.
+
+        Args:
+            frame_ids: Only reload these frames (None reloads every virtual frame)
+        """
+        session = self.Session()
+        try:
+            query = session.query(self.PhotoFrame.id, self.PhotoFrame.frame_type, self.PhotoFrame.next_wake_time)
+            if frame_ids is None:
+                query = query.filter(self.PhotoFrame.frame_type == 'virtual')
+            else:
+                query = query.filter(self.PhotoFrame.id.in_(list(frame_ids)))
+            rows = query.all()
+        finally:
+            session.close()
+
+        found = set()
+        for frame_id, frame_type, next_wake_time in rows:
+            found.add(frame_id)
+            if frame_type == 'virtual' and next_wake_time:
+                self._schedule(frame_id, self._ensure_aware(next_wake_time).timestamp())
+            else:
+                self._schedule(frame_id, None)
+
+        with self._condition:
+            # Frames that disappeared (or stopped being virtual) no longer need timers
+            stale = (set(self._deadlines) if frame_ids is None else set(frame_ids)) - found
+            for frame_id in stale:
+                self._deadlines.pop(frame_id, None)
+
+        if frame_ids is None:
+            self.stats['resyncs'] += 1
+            logger.debug(f"Frame timing schedule loaded: {len(found)} virtual frames")
     
-    def _check_frames(self):
-        """Check all virtual frames for needed transitions."""
-        # Create a new session for this check
+    def _transition_due(self, frame_ids):
+        """Transition the frames whose deadline passed (re-checked against the database)."""
         session = self.Session()
         try:
-            # Get current time in UTC
             now = datetime.now(timezone.utc)
-            
-            # Instead of filtering by datetime in the query, get all virtual frames
-            # and filter them in Python where we have more control over timezone handling
-            frames_to_update = []
-            
-            try:
-                # Fetch all virtual frames regardless of wake time
-                all_frames = session.query(self.PhotoFrame).filter(
-                    self.PhotoFrame.frame_type == 'virtual'
-                ).all()
-                
-                # Process each frame manually to handle timezone issues
-                for frame in all_frames:
-                    if not frame.next_wake_time:
-                        continue
-                        
-                    # Ensure timezone awareness
+            frames = session.query(self.PhotoFrame).filter(self.PhotoFrame.id.in_(frame_ids)).all()
+            logger.info(f"Found {len(frames)} frames that need to transition")
+
+            for frame in frames:
+                try:
                     next_wake = self._ensure_aware(frame.next_wake_time)
-                    
-                    try:
-                        # Determine if the frame needs transition now
-                        time_until_wake = (next_wake - now).total_seconds()
-                    except TypeError as e:
-                        logger.error(f"DATETIME ERROR: Cannot subtract {next_wake} (tzinfo: {next_wake.tzinfo}) from {now} (tzinfo: {now.tzinfo})")
-                        logger.error(f"TypeError details: {str(e)}")
-                        # Skip this frame to avoid crashing the thread
+                    if frame.frame_type != 'virtual' or next_wake is None:
                         continue
-                    
-                    if time_until_wake <= 0:  # Due now or overdue
-                        frames_to_update.append((frame, time_until_wake))
-                
-                # Log summary info
-                if frames_to_update:
-                    logger.info(f"Found {len(frames_to_update)} frames that need to transition")
-                
-                # Process frames that need updates
-                for frame_info in frames_to_update:
-                    frame, time_until_wake = frame_info
-                    try:
-                        # Only log significantly overdue frames
-                        if time_until_wake < -5:  # More than 5 seconds overdue
-                            logger.info(f"Frame {frame.id} ({frame.name}) is {-time_until_wake:.1f} seconds overdue for transition")
-                        
-                        self._transition_frame(session, frame, now)
-                    except Exception as e:
-                        logger.error(f"Error transitioning frame {frame.id}: {str(e)}", exc_info=True)
-                
-            except Exception as e:
-                logger.error(f"Error querying frames: {str(e)}", exc_info=True)
-        
+
+                    time_until_wake = (next_wake - now).total_seconds()
+                    if time_until_wake > 0:
+                        # Rescheduled meanwhile (or a rolled-back change armed the timer early)
+                        self._schedule(frame.id, next_wake.timestamp())
+                        continue
+
+                    # Only log significantly overdue frames
+                    if time_until_wake < -5:  # More than 5 seconds overdue
+                        logger.info(f"Frame {frame.id} ({frame.name}) is {-time_until_wake:.1f} seconds overdue for transition")
+
+                    # Committing the new wake time re-arms the timer through _on_frame_changed
+                    self._transition_frame(session, frame, now)
+                    self.stats['transitions'] += 1
+                except Exception as e:
+                    # The frame is retried on the next resync rather than in a tight loop
+                    session.rollback()
+                    logger.error(f"Error transitioning frame {frame.id}: {str(e)}", exc_info=True)
         finally:
             session.close()
     
@@ -163,13 +315,17 @@ class FrameTimingManager:
             # Ensure now is timezone-aware
             now = self._ensure_aware(now)
             
-            # Get all playlist entries ordered by order
-            playlist = session.query(self.PlaylistEntry).filter_by(
-                frame_id=frame.id
-            ).order_by(self.PlaylistEntry.order).all()
+            if frame.shuffle_enabled:
+                # If shuffle is enabled, draw the next photo from the frame's shuffle bag
+                next_entry = shuffle_bag.next_shuffled(session, self.PlaylistEntry, frame)
+                if next_entry:
+                    playlist_cursor.move_cursor(frame, next_entry, wrapped=False)
+            else:
+                # Sequential navigation - move the playback cursor (only the frame row changes)
+                next_entry = playlist_cursor.advance(session, self.PlaylistEntry, frame)
             
             # Check if playlist is empty
-            if not playlist:
+            if not next_entry:
                 logger.warning(f"Frame {frame.id} has an empty playlist, skipping transition")
                 # Update wake times anyway to prevent constant checking
                 frame.last_wake_time = now
@@ -177,35 +333,6 @@ class FrameTimingManager:
                 session.commit()
                 return
             
-            # Get the next photo (random if shuffle enabled, otherwise first in playlist)
-            if frame.shuffle_enabled:
-                # If shuffle is enabled, choose a random photo that's not the current one
-                import random
-                if len(playlist) > 1 and frame.current_photo_id:
-                    # Find entries that don't match the current photo
-                    other_entries = [entry for entry in playlist if entry.photo_id != frame.current_photo_id]
-                    if other_entries:
-                        next_entry = random.choice(other_entries)
-                    else:
-                        next_entry = playlist[0]
-                else:
-                    next_entry = random.choice(playlist)
-            else:
-                # Sequential navigation - take the first entry
-                next_entry = playlist[0]
-            
-            # Update the frame's current photo
-            frame.current_photo_id = next_entry.photo_id
-            
-            # Reorder the playlist:
-            # 1. Move all other entries up one position
-            current_entries = [entry for entry in playlist if entry.photo_id != next_entry.photo_id]
-            for i, entry in enumerate(current_entries):
-                entry.order = i
-            
-            # 2. Move current entry to the bottom
-            next_entry.order = len(playlist) - 1
-            
             # Update wake times (ensure timezone awareness)
             frame.last_wake_time = now
             
@@ -215,6 +342,7 @@ class FrameTimingManager:
             
             # Commit the changes
             session.commit()
+            self._notify_transition(session, frame)
             
             # Replace detailed debug log with more concise info log that only shows occasionally
             if isinstance(frame.id, str) or not frame.id % 10 == 0:  
@@ -224,6 +352,15 @@ class FrameTimingManager:
             logger.error(f"Error in _transition_frame: {str(e)}", exc_info=True)
             raise  # Re-raise to allow the caller to handle it
     
+    def _notify_transition(self, session, frame):
+        """Run the on_transition callback; its failures never undo a transition."""
+        if self.on_transition is None:
+            return
+        try:
+            self.on_transition(session, frame)
+        except Exception as e:
+            logger.error(f"Error in transition callback for frame {frame.id}: {str(e)}", exc_info=True)
+    
     def force_transition(self, frame_id, direction='next'):
         """
         Force a frame to transition to the next or previous photo.
@@ -242,56 +379,22 @@ class FrameTimingManager:
                 if not frame:
                     return {'error': 'Frame not found'}, 404
                 
-                # Get all playlist entries ordered by order
-                playlist = self.PlaylistEntry.query.filter_by(
-                    frame_id=frame_id
-                ).order_by(self.PlaylistEntry.order).all()
-                
-                # Check if playlist is empty
-                if not playlist:
-                    return {'error': 'Playlist is empty'}, 404
-                
                 # Get the next/prev photo based on direction
                 if direction == 'next':
-                    if frame.shuffle_enabled and len(playlist) > 1:
-                        # If shuffle is enabled, choose a random photo that's not the current one
-                        import random
-                        if frame.current_photo_id:
-                            # Find entries that don't match the current photo
-                            other_entries = [entry for entry in playlist if entry.photo_id != frame.current_photo_id]
-                            if other_entries:
-                                new_entry = random.choice(other_entries)
-                            else:
-                                new_entry = playlist[0]
-                        else:
-                            new_entry = random.choice(playlist)
+                    if frame.shuffle_enabled:
+                        new_entry = shuffle_bag.next_shuffled(self.db.session, self.PlaylistEntry, frame)
+                        if new_entry:
+                            playlist_cursor.move_cursor(frame, new_entry, wrapped=False)
                     else:
-                        # Sequential navigation - take the first entry
-                        new_entry = playlist[0]
+                        # Sequential navigation - the entry after the playback cursor
+                        new_entry = playlist_cursor.advance(self.db.session, self.PlaylistEntry, frame)
                 else:  # prev
-                    # Find the current photo's position in the playlist
-                    current_position = 0
-                    if frame.current_photo_id:
-                        for i, entry in enumerate(playlist):
-                            if entry.photo_id == frame.current_photo_id:
-                                current_position = i
-                                break
-                    
-                    # Get the previous photo (or loop to the end)
-                    new_position = (current_position - 1) % len(playlist)
-                    new_entry = playlist[new_position]
+                    # The entry before the playback cursor (or loop to the end)
+                    new_entry = playlist_cursor.rewind(self.db.session, self.PlaylistEntry, frame)
                 
-                # Update the frame's current photo
-                frame.current_photo_id = new_entry.photo_id
-                
-                # Reorder the playlist:
-                # 1. Move all other entries up one position
-                current_entries = [entry for entry in playlist if entry.photo_id != new_entry.photo_id]
-                for i, entry in enumerate(current_entries):
-                    entry.order = i
-                
-                # 2. Move current entry to the bottom
-                new_entry.order = len(playlist) - 1
+                # Check if playlist is empty
+                if not new_entry:
+                    return {'error': 'Playlist is empty'}, 404
                 
                 # Update wake times with timezone-aware datetimes
                 now = datetime.now(timezone.utc)  # Always use UTC
@@ -303,6 +406,7 @@ class FrameTimingManager:
                 
                 # Commit the changes
                 self.db.session.commit()
+                self._notify_transition(self.db.session, frame)
                 
                 # Get the updated photo
                 photo = self.db.session.get(self.Photo, new_entry.photo_id)
@@ -404,7 +508,8 @@ class FrameTimingManager:
                     'next_wake_time': next_wake_time.isoformat() if next_wake_time else None,
                     'time_since_last_wake': time_since_last,
                     'time_until_next_wake': time_until_next,
-                    'needs_transition': needs_transition
+                    'needs_transition': needs_transition,
+                    'timer_armed': frame_id in self._deadlines
                 }
         except Exception as e:
             logger.error(f"Error in check_frame_status: {str(e)}", exc_info=True)
@@ -3,6 +3,63 @@ import io
 import numpy as np
 import os
 from datetime import datetime
+from photo_processing import decode_for_size
+
+# The palette order is: Black, White, Yellow, Red, Black(duplicate), Blue, Green
+PANEL_PALETTE = (0,0,0, 255,255,255, 255,255,0, 255,0,0, 0,0,0, 0,0,255, 0,255,0) + (0,0,0)*249
+
+# Palette index used to pad an odd trailing pixel (white)
+PADDING_INDEX = 1
+
+def _build_palette_image():
+    """Build the 1x1 palette image used as the quantization target."""
+    pal_image = Image.new('P', (1, 1))
+    pal_image.putpalette(PANEL_PALETTE)
+    return pal_image
+
+# Created once at import instead of on every request
+PANEL_PALETTE_IMAGE = _build_palette_image()
+
+def pack_4bit(indices):
+    """
+    Pack palette indices two pixels per byte, high nibble first.
+    
+    Args:
+        indices: Bytes-like object (or uint8 array) of palette indices, one per pixel
+        
+    Returns:
+        bytes: Packed buffer; an odd trailing pixel is padded with white
+    """
+    if isinstance(indices, np.ndarray):
+        pixels = indices.astype(np.uint8, copy=False).ravel()
+    else:
+        pixels = np.frombuffer(indices, dtype=np.uint8)
+    
+    if pixels.size % 2:
+        pixels = np.append(pixels, np.uint8(PADDING_INDEX))
+    
+    # Even pixels go in the high nibble, odd pixels in the low nibble
+    packed = (pixels[0::2] << 4) | pixels[1::2]
+    return packed.tobytes()
+
+def unpack_4bit(buf, pixel_count=None):
+    """
+    Reverse pack_4bit, returning one palette index per pixel.
+    
+    Args:
+        buf: Packed bytes as produced by pack_4bit
+        pixel_count: Optional number of pixels to keep (drops padding)
+        
+    Returns:
+        numpy.ndarray: uint8 array of palette indices
+    """
+    packed = np.frombuffer(buf, dtype=np.uint8)
+    pixels = np.empty(packed.size * 2, dtype=np.uint8)
+    pixels[0::2] = packed >> 4
+    pixels[1::2] = packed & 0x0F
+    if pixel_count is not None:
+        pixels = pixels[:pixel_count]
+    return pixels
 
 def img_to_array(image, orientation='portrait'):
     """
@@ -16,6 +73,9 @@ def img_to_array(image, orientation='portrait'):
         bytes: Raw bytes of the image data in the format expected by the e-paper display
     """
     
+    # Decode (or shrink) large sources close to panel size before the resize below
+    image = decode_for_size(image, (1200, 1600))
+    
     # Ensure image is in RGB mode (not RGBA)
     if image.mode != 'RGB':
         image = image.convert('RGB')
@@ -61,32 +121,12 @@ def img_to_array(image, orientation='portrait'):
             # Crop the image to the target dimensions
             image = image.crop((left, top, right, bottom))
     
-    # Create a palette image with the 7 colors used by the e-paper display
-    pal_image = Image.new('P', (1, 1))
-    # The palette order is: Black, White, Yellow, Red, Black(duplicate), Blue, Green
-    pal_image.putpalette((0,0,0, 255,255,255, 255,255,0, 255,0,0, 0,0,0, 0,0,255, 0,255,0) + (0,0,0)*249)
-    
     # Convert the source image to the 7 colors, dithering if needed
-    image_7color = image.convert("RGB").quantize(palette=pal_image)
-    
-    # Get the raw bytes of the quantized image
-    buf_7color = bytearray(image_7color.tobytes('raw'))
+    image_7color = image.convert("RGB").quantize(palette=PANEL_PALETTE_IMAGE)
     
     # PIL does not support 4 bit color, so pack the 4 bits of color
     # into a single byte to transfer to the panel
-    buf = bytearray(int(image.width * image.height / 2))
-    idx = 0
-    
-    # Pack two 4-bit color values into each byte
-    for i in range(0, len(buf_7color), 2):
-        if i + 1 < len(buf_7color):
-            buf[idx] = (buf_7color[i] << 4) | buf_7color[i+1]
-        else:
-            # If we have an odd number of pixels, pad with white (1)
-            buf[idx] = (buf_7color[i] << 4) | 1
-        idx += 1
-    
-    return bytes(buf) 
+    return pack_4bit(image_7color.tobytes('raw'))
 
 def generate_demonstration_images(input_image_path, output_dir="upload/temp"):
     """
@@ -162,13 +202,8 @@ def generate_demonstration_images(input_image_path, output_dir="upload/temp"):
         cropped_image = resized_image
         cropped_path = resized_path
     
-    # Create a palette image with the 7 colors used by the e-paper display
-    pal_image = Image.new('P', (1, 1))
-    # The palette order is: Black, White, Yellow, Red, Black(duplicate), Blue, Green
-    pal_image.putpalette((0,0,0, 255,255,255, 255,255,0, 255,0,0, 0,0,0, 0,0,255, 0,255,0) + (0,0,0)*249)
-    
     # Convert the source image to the 7 colors
-    quantized_image = cropped_image.quantize(palette=pal_image)
+    quantized_image = cropped_image.quantize(palette=PANEL_PALETTE_IMAGE)
     quantized_path = os.path.join(output_dir, f"{timestamp}_5_quantized.jpg")
     quantized_image.convert('RGB').save(quantized_path)
     
@@ -177,7 +212,7 @@ def generate_demonstration_images(input_image_path, output_dir="upload/temp"):
     
     # This converts the byte array back to a viewable image to show what is sent to display
     reconstructed = Image.new('P', (target_width, target_height))
-    reconstructed.putpalette((0,0,0, 255,255,255, 255,255,0, 255,0,0, 0,0,0, 0,0,255, 0,255,0) + (0,0,0)*249)
+    reconstructed.putpalette(PANEL_PALETTE)
     reconstructed.putdata(buf_7color)
     
     final_path = os.path.join(output_dir, f"{timestamp}_6_final.jpg")
@@ -187,30 +222,16 @@ def generate_demonstration_images(input_image_path, output_dir="upload/temp"):
     # (unpacking the 4-bit values that would be packed in the actual data)
     final_bytes_path = os.path.join(output_dir, f"{timestamp}_7_byte_representation.jpg")
     
-    # Create an array to represent unpacked bytes
+    # Simulate the packing/unpacking process
     width = target_width
     height = target_height
-    unpacked_data = []
-    
-    # Simulate the packing/unpacking process
-    buf = bytearray(int(width * height / 2))
-    idx = 0
-    
-    for i in range(0, len(buf_7color), 2):
-        if i + 1 < len(buf_7color):
-            buf[idx] = (buf_7color[i] << 4) | buf_7color[i+1]
-            unpacked_data.append(buf_7color[i])
-            unpacked_data.append(buf_7color[i+1])
-        else:
-            buf[idx] = (buf_7color[i] << 4) | 1
-            unpacked_data.append(buf_7color[i])
-            unpacked_data.append(1)  # white padding
-        idx += 1
+    buf = pack_4bit(buf_7color)
+    unpacked_data = unpack_4bit(buf).tobytes()
     
     # Create image from unpacked data
     unpacked_image = Image.new('P', (width, height))
-    unpacked_image.putpalette((0,0,0, 255,255,255, 255,255,0, 255,0,0, 0,0,0, 0,0,255, 0,255,0) + (0,0,0)*249)
-    unpacked_image.putdata(unpacked_data)
+    unpacked_image.putpalette(PANEL_PALETTE)
+    unpacked_image.frombytes(unpacked_data[:width * height])
     unpacked_image.convert('RGB').save(final_bytes_path)
     
     # Return paths to all generated images
@@ -0,0 +1,259 @@
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# A job interrupted this many times (e.g. by a crash while transcoding) is given up on
+MAX_ATTEMPTS = 3
+
+class IngestQueue:
+    """
+    Persistent queue of uploaded files waiting to be ingested.
+
+    Uploads are staged on disk and recorded as IngestJob rows, so the HTTP
+    request returns as soon as the file is saved. A bounded pool of worker
+    threads converts, transcodes and generates derivatives for queued jobs and
+    records their progress on the row. Because both the staged file and the
+    job live on disk, jobs that were queued or running when the server stopped
+    are picked up again on the next start.
+    """
+
+    def __init__(self, app, db, models, process_job, staging_dir, max_workers=2):
+        """
+        Initialize the ingest queue.
+
+        Args:
+            app: Flask application instance
+            db: SQLAlchemy database instance
+            models: Dictionary containing database models (needs IngestJob)
+            process_job: Callable(job, report_progress) that ingests a job's staged
+                file and returns the new Photo's id; report_progress(stage, percent)
+                may be called to publish progress
+            staging_dir: Directory where uploaded files wait to be processed
+            max_workers: Number of jobs processed at the same time
+        """
+        self.app = app
+        self.db = db
+        self.IngestJob = models['IngestJob']
+        self.process_job = process_job
+        self.staging_dir = staging_dir
+        self.max_workers = max(1, max_workers or 1)
+
+        self.running = False
+        self.threads = []
+        self._condition = threading.Condition()
+        # Bumped by every enqueue(), so a worker can tell whether work arrived
+        # after it last looked at the queue
+        self._enqueue_count = 0
+
+        self.stats = {
+            'enqueued': 0,
+            'completed': 0,
+            'failed': 0,
+            'resumed': 0
+        }
+
+        os.makedirs(self.staging_dir, exist_ok=True)
+        logger.debug("Ingest queue initialized")
+
+    def start(self):
+        """Requeue interrupted jobs and start the worker threads."""
+        if self.running:
+            logger.debug("Ingest queue is already running")
+            return
+
+        with self.app.app_context():
+            try:
+                self._recover_jobs()
+            finally:
+                self.db.session.remove()
+
+        self.running = True
+        for i in range(self.max_workers):
+            thread = threading.Thread(target=self._worker_thread, name=f"ingest-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"Ingest queue started with {self.max_workers} workers")
+
+    def stop(self):
+        """Stop the worker threads. Jobs still running are resumed on the next start."""
+        if not self.running:
+            return
+
+        self.running = False
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=5.0)
+        self.threads = []
+        logger.info("Ingest queue stopped")
+
+    def staging_path(self, filename):
+        """Return a unique path in the staging directory for an uploaded file."""
+        return os.path.join(self.staging_dir, f"{uuid.uuid4().hex}_{filename}")
+
+    def enqueue(self, staged_path, original_filename, frame_id=None, heading=''):
+        """
+        Record a staged upload as a queued job and wake a worker.
+
+        Args:
+            staged_path: Path of the uploaded file in the staging directory
+            original_filename: Sanitized filename the photo is stored under
+            frame_id: Frame whose playlist the photo is added to (optional)
+            heading: Heading text for the photo
+
+        Returns:
+            IngestJob: The new job (committed)
+        """
+        job = self.IngestJob(
+            id=uuid.uuid4().hex,
+            status=JOB_QUEUED,
+            stage='queued',
+            progress=0,
+            original_filename=original_filename,
+            staged_path=staged_path,
+            frame_id=frame_id or None,
+            heading=heading or ''
+        )
+        self.db.session.add(job)
+        self.db.session.commit()
+        self.stats['enqueued'] += 1
+        logger.info(f"Queued ingest job {job.id} for {original_filename}")
+
+        with self._condition:
+            self._enqueue_count += 1
+            self._condition.notify()
+        return job
+
+    def get_stats(self):
+        """Return queue statistics for diagnostics."""
+        stats = dict(self.stats, running=self.running, workers=self.max_workers)
+        try:
+            stats['queued'] = self.IngestJob.query.filter_by(status=JOB_QUEUED).count()
+            stats['in_progress'] = self.IngestJob.query.filter_by(status=JOB_RUNNING).count()
+        except Exception as e:
+            logger.error(f"Error counting ingest jobs: {e}")
+        return stats
+
+    def _recover_jobs(self):
+        """Requeue jobs that were running when the server stopped."""
+        interrupted = self.IngestJob.query.filter_by(status=JOB_RUNNING).all()
+        for job in interrupted:
+            if not os.path.exists(job.staged_path or ''):
+                job.status = JOB_FAILED
+                job.error = 'Uploaded file was lost while the server was stopped'
+                job.finished_at = datetime.utcnow()
+            elif (job.attempts or 0) >= MAX_ATTEMPTS:
+                job.status = JOB_FAILED
+                job.error = f'Interrupted {job.attempts} times, giving up'
+                job.finished_at = datetime.utcnow()
+                self._remove_staged_file(job)
+            else:
+                job.status = JOB_QUEUED
+                job.stage = 'queued'
+                job.progress = 0
+                self.stats['resumed'] += 1
+            logger.info(f"Recovered interrupted ingest job {job.id}: {job.status}")
+        self.db.session.commit()
+
+        queued = self.IngestJob.query.filter_by(status=JOB_QUEUED).count()
+        if queued:
+            logger.info(f"Resuming {queued} queued ingest jobs")
+
+    def _claim_next_job(self):
+        """
+        Atomically move the oldest queued job to running.
+
+        Returns:
+            IngestJob or None if nothing is queued
+        """
+        candidates = (self.IngestJob.query
+                      .filter_by(status=JOB_QUEUED)
+                      .order_by(self.IngestJob.created_at, self.IngestJob.id)
+                      .limit(self.max_workers + 1)
+                      .all())
+        for candidate in candidates:
+            # Conditional update so two workers can never claim the same job
+            claimed = (self.IngestJob.query
+                       .filter_by(id=candidate.id, status=JOB_QUEUED)
+                       .update({
+                           self.IngestJob.status: JOB_RUNNING,
+                           self.IngestJob.stage: 'starting',
+                           self.IngestJob.started_at: datetime.utcnow(),
+                           self.IngestJob.attempts: self.IngestJob.attempts + 1
+                       }, synchronize_session=False))
+            self.db.session.commit()
+            if claimed:
+                self.db.session.refresh(candidate)
+                return candidate
+        return None
+
+    def _worker_thread(self):
+        """Background loop that processes queued jobs one at a time."""
+        while self.running:
+            job_id = None
+            with self._condition:
+                seen = self._enqueue_count
+            try:
+                with self.app.app_context():
+                    try:
+                        job = self._claim_next_job()
+                        if job is not None:
+                            job_id = job.id
+                            self._run_job(job)
+                    finally:
+                        # Release the thread-local session so we never hold stale rows
+                        self.db.session.remove()
+            except Exception as e:
+                logger.error(f"Error in ingest worker: {str(e)}", exc_info=True)
+
+            if job_id is None:
+                # Nothing to do; wait for enqueue() (or poll in case another process queued work).
+                # A job enqueued while we were looking has already bumped the count.
+                with self._condition:
+                    self._condition.wait_for(lambda: self._enqueue_count != seen or not self.running, timeout=30)
+
+    def _run_job(self, job):
+        """Process one claimed job and record the outcome."""
+        logger.info(f"Starting ingest job {job.id} ({job.original_filename}, attempt {job.attempts})")
+
+        def report_progress(stage, percent):
+            job.stage = stage
+            job.progress = max(0, min(100, int(percent)))
+            self.db.session.commit()
+
+        try:
+            photo_id = self.process_job(job, report_progress)
+            job.photo_id = photo_id
+            job.status = JOB_DONE
+            job.stage = 'done'
+            job.progress = 100
+            self.stats['completed'] += 1
+            logger.info(f"Finished ingest job {job.id} -> photo {photo_id}")
+        except Exception as e:
+            self.db.session.rollback()
+            job.status = JOB_FAILED
+            job.error = str(e)
+            self.stats['failed'] += 1
+            logger.error(f"Ingest job {job.id} failed: {e}", exc_info=True)
+
+        job.finished_at = datetime.utcnow()
+        self.db.session.commit()
+        self._remove_staged_file(job)
+
+    def _remove_staged_file(self, job):
+        """Delete a finished job's staged upload if the ingest didn't consume it."""
+        if job.staged_path and os.path.exists(job.staged_path):
+            try:
+                os.remove(job.staged_path)
+            except OSError as e:
+                logger.warning(f"Could not delete staged upload {job.staged_path}: {e}")
@@ -806,7 +806,7 @@ def import_from_network():
         
         # Import the necessary modules from server.py
         # We'll use these inside the app context to ensure proper database connections
-        from server import app, db, Photo, PlaylistEntry, photo_processor, generate_video_thumbnail
+        from server import app, db, Photo, PlaylistEntry, photo_processor, generate_video_thumbnail, add_photo_to_frame_playlist
         
         if SMB_AVAILABLE:
             # Create SMB connection
@@ -910,18 +910,8 @@ def import_from_network():
                             
                             # Add to playlist if frame_id is provided
                             if frame_id:
-                                # Shift existing entries
-                                PlaylistEntry.query.filter_by(frame_id=frame_id)\
-                                    .update({PlaylistEntry.order: PlaylistEntry.order + 1})
-                                
-                                # Add new entry at the beginning
-                                entry = PlaylistEntry(
-                                    frame_id=frame_id,
-                                    photo_id=new_photo.id,
-                                    order=0
-                                )
-                                db.session.add(entry)
-                                db.session.commit()
+                                # Add it right after the frame's playback cursor so it shows next
+                                add_photo_to_frame_playlist(new_photo.id, frame_id)
                             
                             # Process the file with the appropriate function based on type
                             if is_video:
@@ -1073,18 +1063,8 @@ def import_from_network():
                         
                         # Add to playlist if frame_id is provided
                         if frame_id:
-                            # Shift existing entries
-                            PlaylistEntry.query.filter_by(frame_id=frame_id)\
-                                .update({PlaylistEntry.order: PlaylistEntry.order + 1})
-                            
-                            # Add new entry at the beginning
-                            entry = PlaylistEntry(
-                                frame_id=frame_id,
-                                photo_id=new_photo.id,
-                                order=0
-                            )
-                            db.session.add(entry)
-                            db.session.commit()
+                            # Add it right after the frame's playback cursor so it shows next
+                            add_photo_to_frame_playlist(new_photo.id, frame_id)
                         
                         # Process the file with the appropriate function based on type
                         if is_video:
@@ -1826,19 +1806,9 @@ def import_file_to_frame(location, file_path, frame_id, app, db, Photo, Playlist
         db.session.add(new_photo)
         db.session.commit()
         
-        # Add to playlist
-        # Shift existing entries
-        PlaylistEntry.query.filter_by(frame_id=frame_id)\
-            .update({PlaylistEntry.order: PlaylistEntry.order + 1})
-        
-        # Add new entry at the beginning
-        entry = PlaylistEntry(
-            frame_id=frame_id,
-            photo_id=new_photo.id,
-            order=1
-        )
-        db.session.add(entry)
-        db.session.commit()
+        # Add to playlist, right after the frame's playback cursor so it shows next
+        from server import add_photo_to_frame_playlist
+        add_photo_to_frame_playlist(new_photo.id, frame_id)
         
         # Process the file with the appropriate function based on type
         if is_video:
@@ -1928,7 +1898,7 @@ def check_immich_for_new_media():
             return
         
         # Import necessary modules from server.py
-        from server import app, db, Photo, PlaylistEntry, photo_processor, extract_exif_metadata, generate_video_thumbnail
+        from server import app, db, Photo, PlaylistEntry, photo_processor, extract_exif_metadata, generate_video_thumbnail, add_photo_to_frame_playlist
         
         # Process each auto-import configuration
         for config in auto_imports:
@@ -1989,17 +1959,8 @@ def check_immich_for_new_media():
                         db.session.add(new_photo)
                         db.session.commit()
 
-                        # Add to playlist
-                        PlaylistEntry.query.filter_by(frame_id=frame_id)\
-                            .update({PlaylistEntry.order: PlaylistEntry.order + 1})
-                        
-                        entry = PlaylistEntry(
-                            frame_id=frame_id,
-                            photo_id=new_photo.id,
-                            order=0
-                        )
-                        db.session.add(entry)
-                        db.session.commit()
+                        # Add to playlist, right after the frame's playback cursor so it shows next
+                        add_photo_to_frame_playlist(new_photo.id, frame_id)
 
                         # Process the file
                         if new_photo.media_type == 'video':
@@ -2308,7 +2269,7 @@ def import_from_immich():
             return jsonify({"success": False, "error": "No assets found"}), 404
         
         # Import necessary modules from server.py
-        from server import app, db, Photo, PlaylistEntry, photo_processor, extract_exif_metadata, generate_video_thumbnail
+        from server import app, db, Photo, PlaylistEntry, photo_processor, extract_exif_metadata, generate_video_thumbnail, add_photo_to_frame_playlist
         
         # Get the upload directory from app config
         with app.app_context():
@@ -2363,19 +2324,8 @@ def import_from_immich():
                     db.session.add(new_photo)
                     db.session.commit()
                     
-                    # Add to playlist
-                    # Shift existing entries
-                    PlaylistEntry.query.filter_by(frame_id=data.get('frame_id'))\
-                        .update({PlaylistEntry.order: PlaylistEntry.order + 1})
-                    
-                    # Add new entry at the beginning
-                    entry = PlaylistEntry(
-                        frame_id=data.get('frame_id'),
-                        photo_id=new_photo.id,
-                        order=0
-                    )
-                    db.session.add(entry)
-                    db.session.commit()
+                    # Add to playlist, right after the frame's playback cursor so it shows next
+                    add_photo_to_frame_playlist(new_photo.id, data.get('frame_id'))
                     
                     # Process the file with the appropriate function based on type
                     if is_video:
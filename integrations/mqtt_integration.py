@@ -11,6 +11,9 @@ from datetime import timezone
 import re
 from datetime import datetime
 
+import playlist_cursor
+import playlist_ordering
+
 class MQTTIntegration:
     def __init__(self, settings, photo_dir, Frame, db, PlaylistEntry, app, CustomPlaylist):
         self.app = app
@@ -224,17 +227,8 @@ class MQTTIntegration:
                 if not selected_entry:
                     return
                 
-                # Get all playlist entries ordered by current order
-                entries = frame.playlist_entries.order_by(self.PlaylistEntry.order).all()
-                
-                # Remove selected entry from current position
-                entries.remove(selected_entry)
-                # Insert it at the beginning
-                entries.insert(0, selected_entry)
-                
-                # Update order for all entries
-                for i, entry in enumerate(entries):
-                    entry.order = i
+                # Move it right after the playback cursor so it plays next
+                playlist_cursor.move_to_next_up(self.db.session, self.PlaylistEntry, frame, selected_entry)
                 
                 # Commit changes
                 self.db.session.commit()
@@ -315,6 +309,7 @@ class MQTTIntegration:
                     if frame:
                         # Clear existing playlist entries
                         self.PlaylistEntry.query.filter_by(frame_id=frame_id).delete()
+                        playlist_cursor.reset_cursor(frame)
                         self.db.session.commit()
                         
                         # Update the state
@@ -367,6 +362,7 @@ class MQTTIntegration:
             
             # Clear existing playlist entries
             self.PlaylistEntry.query.filter_by(frame_id=frame_id).delete()
+            playlist_cursor.reset_cursor(frame)
             
             logging.warning(f"MQTT Debug: Applying playlist {playlist.name} to frame {frame.name}")
     
@@ -375,7 +371,7 @@ class MQTTIntegration:
                 new_entry = self.PlaylistEntry(
                     frame_id=frame_id,
                     photo_id=entry.photo_id,
-                    order=order
+                    order=order * playlist_ordering.ORDER_GAP
                 )
                 self.db.session.add(new_entry)
             
@@ -548,7 +544,7 @@ class MQTTIntegration:
                     logging.error(f"Frame {frame.id} not found when registering")
                     return
                     
-                playlist_entries = frame.playlist_entries.order_by(self.PlaylistEntry.order).all()
+                playlist_entries = playlist_cursor.play_order(frame.playlist_entries.order_by(self.PlaylistEntry.order, self.PlaylistEntry.id).all(), frame)
                 
                 # Create device info for this frame
                 device_info = {
@@ -718,7 +714,7 @@ class MQTTIntegration:
             return
             
         try:
-            playlist_entries = frame.playlist_entries.order_by(self.PlaylistEntry.order).all()
+            playlist_entries = playlist_cursor.play_order(frame.playlist_entries.order_by(self.PlaylistEntry.order, self.PlaylistEntry.id).all(), frame)
             options = [entry.photo.filename for entry in playlist_entries]
             
             # Update the options in Home Assistant
@@ -805,7 +801,7 @@ class MQTTIntegration:
     def _get_frame_playlist(self, frame):
         """Get list of photos from frame's playlist entries."""
         try:
-            playlist_entries = frame.playlist_entries.order_by(self.PlaylistEntry.order).all()
+            playlist_entries = playlist_cursor.play_order(frame.playlist_entries.order_by(self.PlaylistEntry.order, self.PlaylistEntry.id).all(), frame)
             return [entry.photo.filename for entry in playlist_entries]
         except Exception as e:
             logging.error(f"Error getting playlist for frame {frame.id}: {e}")
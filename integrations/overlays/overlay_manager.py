@@ -4,8 +4,11 @@ import json
 import requests
 from io import BytesIO
 import logging
+import threading
 import traceback
 from abc import ABC, abstractmethod
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
 from photo_processing import PhotoProcessor
 from .qrcode_integration import QRCodeIntegration
 from datetime import datetime
@@ -17,12 +20,90 @@ logging.basicConfig(
 )
 logger = logging.getLogger('overlay_manager')
 
+# Number of rendered overlay layers kept in memory. Layers are cropped to the
+# area the overlay actually draws on, so entries are usually a few hundred KB.
+LAYER_CACHE_SIZE = 16
+
+# A rendered overlay: an optional full-image tint (r, g, b, a) applied first,
+# then an RGBA patch composited at offset (x, y). patch is None for tint-only layers.
+OverlayLayer = namedtuple('OverlayLayer', ['tint', 'patch', 'offset'])
+
+@lru_cache(maxsize=64)
+def load_font(font_path, size):
+    """Load a TrueType font, shared by every overlay and render (LRU cached)."""
+    try:
+        font = ImageFont.truetype(font_path, size)
+        logger.debug(f"Successfully loaded font: {font_path}")
+        return font
+    except Exception as e:
+        logger.error(f"Failed to load font {font_path}: {e}")
+        return ImageFont.load_default()
+
+def build_layer(overlay, size, frame=None, photo=None):
+    """Render an overlay and crop it to the region it draws on.
+
+    Returns:
+        OverlayLayer, or None if the overlay has nothing to draw
+    """
+    layer = overlay.render_layer(size, frame, photo)
+    if layer is None:
+        return None
+
+    tint = overlay.background_tint(frame, photo)
+    bbox = layer.getbbox()
+    if bbox is None:
+        return OverlayLayer(tint, None, (0, 0))
+    return OverlayLayer(tint, layer.crop(bbox), bbox[:2])
+
+def composite_layer(img, layer):
+    """Composite an OverlayLayer onto an RGB image.
+
+    Only the patch's bounding box is converted to RGBA and pasted back; the
+    rest of the image is never copied. img is modified in place unless a tint
+    has to be applied, so always use the returned image.
+
+    Returns:
+        PIL.Image: RGB image with the layer applied
+    """
+    if layer.tint is not None:
+        r, g, b, a = layer.tint
+        img = Image.blend(img, Image.new('RGB', img.size, (r, g, b)), a / 255.0)
+
+    if layer.patch is not None:
+        x, y = layer.offset
+        box = (x, y, x + layer.patch.width, y + layer.patch.height)
+        region = img.crop(box).convert('RGBA')
+        region.alpha_composite(layer.patch)
+        img.paste(region.convert('RGB'), box)
+    return img
+
 class BaseOverlay(ABC):
-    """Abstract base class for all overlays."""
+    """Abstract base class for all overlays.
+
+    Overlays draw onto a transparent RGBA layer the size of the image. The
+    layer is cropped to what was drawn, cached by OverlayManager and reused
+    for every image with the same size and inputs.
+    """
     @abstractmethod
+    def layer_key(self, frame=None, photo=None):
+        """JSON-serializable description of everything the layer depends on (besides size)."""
+        pass
+
+    @abstractmethod
+    def render_layer(self, size, frame=None, photo=None):
+        """Draw this overlay onto a new transparent RGBA layer, or return None to skip it."""
+        pass
+
+    def background_tint(self, frame=None, photo=None):
+        """(r, g, b, a) color blended over the whole image before the layer, or None."""
+        return None
+
     def apply(self, img: Image, draw: ImageDraw, image_path: str, frame=None, photo=None) -> Image:
         """Apply this overlay to the image."""
-        pass
+        layer = build_layer(self, img.size, frame, photo)
+        if layer is None:
+            return img
+        return composite_layer(img.convert('RGB'), layer)
 
     @property
     @abstractmethod
@@ -53,15 +134,26 @@ class WeatherOverlay(BaseOverlay):
         logger.debug(f"Weather overlay enabled: {enabled}")
         return enabled
         
-    def apply(self, img: Image, draw: ImageDraw, image_path: str, frame=None, photo=None) -> Image:
-        """Add weather overlay to image."""
-        logger.debug(f"Applying weather overlay to image: {image_path}")
+    def layer_key(self, frame=None, photo=None):
+        return {
+            'style': self.weather.settings.get('style', {}),
+            'units': self.weather.settings.get('units'),
+            'weather': self.weather.get_weather()
+        }
+
+    def render_layer(self, size, frame=None, photo=None):
+        """Draw the weather text box onto a transparent layer."""
+        logger.debug(f"Rendering weather overlay layer for size {size}")
         weather_data = self.weather.get_weather()
         if not weather_data:
             logger.warning("No weather data available, skipping overlay")
-            return img
+            return None
             
         try:
+            width, height = size
+            layer = Image.new('RGBA', size, (0, 0, 0, 0))
+            draw = ImageDraw.Draw(layer)
+            
             # Get style settings
             style = self.weather.settings.get('style', {})
             format_str = style.get('format', '{temp}° {units}')
@@ -91,19 +183,11 @@ class WeatherOverlay(BaseOverlay):
                 text = text.replace('{' + key + '}', str(value))
             
             # Load font
-            font_size = self.weather._parse_size(style.get('font_size', '5%'), img.height)
+            font_size = self.weather._parse_size(style.get('font_size', '5%'), height)
             font_family = style.get('font_family', 'BebasNeue-Regular.ttf')
             if not font_family.endswith('.ttf'):
                 font_family += '.ttf'
-            font_path = os.path.join(self.font_path, font_family)
-            
-            try:
-                font = ImageFont.truetype(font_path, font_size)
-                logger.debug(f"Successfully loaded font: {font_path}")
-            except Exception as e:
-                logger.error(f"Failed to load font {font_path}: {e}")
-                font = ImageFont.load_default()
-                logger.debug("Using default font as fallback")
+            font = load_font(os.path.join(self.font_path, font_family), font_size)
             
             # Calculate text size
             text_bbox = draw.textbbox((0, 0), text, font=font)
@@ -112,8 +196,8 @@ class WeatherOverlay(BaseOverlay):
             
             # Calculate position
             position = style.get('position', 'top-left')
-            margin = self.weather._parse_size(style.get('margin', '5%'), min(img.width, img.height))
-            pos = self._calculate_position(position, img.size, (text_width, text_height), margin)
+            margin = self.weather._parse_size(style.get('margin', '5%'), min(width, height))
+            pos = self._calculate_position(position, size, (text_width, text_height), margin)
             
             # Apply background if enabled
             if style.get('background', {}).get('enabled', False):
@@ -123,9 +207,9 @@ class WeatherOverlay(BaseOverlay):
                 bg_opacity = int(style['background'].get('opacity', 30) * 255 / 100)
                 bg_color_rgba = self.weather._parse_color(bg_color, bg_opacity)
                 
-                bg_pos = self._calculate_position(position, img.size, (bg_width, bg_height), margin)
+                bg_pos = self._calculate_position(position, size, (bg_width, bg_height), margin)
                 bg = Image.new('RGBA', (bg_width, bg_height), bg_color_rgba)
-                img.paste(bg, bg_pos, bg)
+                layer.paste(bg, bg_pos)
                 
                 # Adjust text position relative to background
                 text_pos = (
@@ -138,12 +222,12 @@ class WeatherOverlay(BaseOverlay):
             # Draw text
             draw.text(text_pos, text, font=font, fill=style.get('color', 'white'))
             
-            return img
+            return layer
             
         except Exception as e:
             logger.error(f"Error adding weather overlay: {e}")
             logger.error(traceback.format_exc())
-            return img
+            return None
             
     def _calculate_position(self, position_str, img_size, element_size, margin):
         """Calculate position coordinates based on position string.
@@ -190,29 +274,39 @@ class MetadataOverlay(BaseOverlay):
     def enabled(self) -> bool:
         return True
         
-    def apply(self, img: Image, draw: ImageDraw, image_path: str, frame=None, photo=None) -> Image:
-        """Add metadata overlay to image."""
-        logger.debug(f"Applying metadata overlay to image: {image_path}")
+    def layer_key(self, frame=None, photo=None):
+        return {
+            'styles': self.metadata.styles,
+            'metadata': self.metadata.parse_metadata(photo)
+        }
+
+    def background_tint(self, frame=None, photo=None):
+        background = self.metadata.styles['background']
+        if not background['enabled']:
+            return None
+        # Applied with Image.blend rather than as a full-size RGBA layer
+        return self.metadata._parse_color(background['color'],
+                                          int(255 * float(background['opacity']) / 100))
+
+    def render_layer(self, size, frame=None, photo=None):
+        """Draw the photo's metadata fields onto a transparent layer."""
+        logger.debug(f"Rendering metadata overlay layer for size {size}")
         try:
             # Get metadata from photo object
             metadata = self.metadata.parse_metadata(photo)
             if not metadata:
                 logger.warning("No metadata found for image")
-                return img
+                return None
 
             # Get styles configuration
             styles = self.metadata.styles
             logger.debug(f"Using styles: {styles}")
             
-            # Calculate background if enabled
-            if styles['background']['enabled']:
-                # Create semi-transparent overlay
-                overlay = Image.new('RGBA', img.size, 
-                                  self.metadata._parse_color(styles['background']['color'], 
-                                  int(255 * float(styles['background']['opacity']) / 100)))
-                img = Image.alpha_composite(img.convert('RGBA'), overlay)
-                draw = ImageDraw.Draw(img)
-                logger.debug("Applied background overlay")
+            width, height = size
+            
+            # The optional background is a tint (see background_tint), so only text goes on the layer
+            layer = Image.new('RGBA', size, (0, 0, 0, 0))
+            draw = ImageDraw.Draw(layer)
 
             # Fixed 30px spacing between fields
             spacing = 30
@@ -237,17 +331,10 @@ class MetadataOverlay(BaseOverlay):
                     logger.debug(f"No text for field '{field_name}', skipping")
                     continue
 
-                try:
-                    # Load font with calculated size
-                    font_size = self.metadata._parse_size(field_config['font_size'], img.height)
-                    font_file = field_config['font_family'] if field_config['font_family'].endswith('.ttf') else f"{field_config['font_family']}.ttf"
-                    font_path = os.path.join(self.font_path, font_file)
-                    logger.debug(f"Loading font: {font_path} at size {font_size}")
-                    font = ImageFont.truetype(font_path, font_size)
-                except Exception as e:
-                    logger.error(f"Font error for {field_name}: {e}")
-                    font = ImageFont.load_default()
-                    logger.debug(f"Using default font for field '{field_name}'")
+                # Load font with calculated size
+                font_size = self.metadata._parse_size(field_config['font_size'], height)
+                font_file = field_config['font_family'] if field_config['font_family'].endswith('.ttf') else f"{field_config['font_family']}.ttf"
+                font = load_font(os.path.join(self.font_path, font_file), font_size)
 
                 # Get text size
                 text_bbox = draw.textbbox((0, 0), text, font=font)
@@ -285,7 +372,7 @@ class MetadataOverlay(BaseOverlay):
                 # Calculate base position with global padding
                 x, base_y = self.metadata._parse_position(
                     field_config['position'],
-                    img.size,
+                    size,
                     text_size,
                     field_config['margin']
                 )
@@ -307,12 +394,12 @@ class MetadataOverlay(BaseOverlay):
                 current_y_offset += field_data['height'] + spacing
 
             logger.info("Metadata overlay successfully applied")
-            return img
+            return layer
             
         except Exception as e:
             logger.error(f"Error adding metadata overlay: {e}")
             logger.error(traceback.format_exc())
-            return img
+            return None
 
     def _parse_position(self, position_str, img_size, text_size, margin_str):
         """Parse position string and return x,y coordinates."""
@@ -385,24 +472,33 @@ class QRCodeOverlay(BaseOverlay):
         logger.debug(f"QR Code overlay enabled: {enabled}")
         return enabled
         
-    def apply(self, img: Image, draw: ImageDraw, image_path: str, frame=None, photo=None) -> Image:
-        """Add QR code overlay to image."""
-        logger.debug(f"Applying QR code overlay to image: {image_path}")
+    def layer_key(self, frame=None, photo=None):
+        frame_id = frame.id if frame else None
+        return {
+            'settings': self.qrcode.settings,
+            'url': self.qrcode.get_qr_url(frame_id)
+        }
+
+    def render_layer(self, size, frame=None, photo=None):
+        """Draw the QR code and its backing card onto a transparent layer."""
+        logger.debug(f"Rendering QR code overlay layer for size {size}")
         try:
+            width, height = size
+            
             # Get frame ID if available
             frame_id = frame.id if frame else None
             logger.debug(f"Using frame_id: {frame_id}")
             
             # Calculate QR code size based on image height
-            qr_size = int(img.height * 0.2)  # Base size for QR code
-            margin = int(img.height * 0.05)   # Margin will be 5% of image height
+            qr_size = int(height * 0.2)  # Base size for QR code
+            margin = int(height * 0.05)   # Margin will be 5% of image height
             logger.debug(f"QR code parameters: size={qr_size}, margin={margin}")
             
             # Generate QR code with frame_id
             qr_img = self.qrcode.generate_qr_code(qr_size, frame_id)
             if not qr_img:
                 logger.warning("Failed to generate QR code")
-                return img
+                return None
             
             # Get actual QR code size after generation
             qr_size = qr_img.size[0]
@@ -410,12 +506,12 @@ class QRCodeOverlay(BaseOverlay):
             # Calculate position based on settings
             positions = {
                 'top-left': (margin, margin),
-                'top-right': (img.width - qr_size - margin, margin),
-                'top-center': ((img.width - qr_size) // 2, margin),
-                'bottom-left': (margin, img.height - qr_size - margin),
-                'bottom-right': (img.width - qr_size - margin, img.height - qr_size - margin),
-                'bottom-center': ((img.width - qr_size) // 2, img.height - qr_size - margin),
-                'center': ((img.width - qr_size) // 2, (img.height - qr_size) // 2)
+                'top-right': (width - qr_size - margin, margin),
+                'top-center': ((width - qr_size) // 2, margin),
+                'bottom-left': (margin, height - qr_size - margin),
+                'bottom-right': (width - qr_size - margin, height - qr_size - margin),
+                'bottom-center': ((width - qr_size) // 2, height - qr_size - margin),
+                'center': ((width - qr_size) // 2, (height - qr_size) // 2)
             }
             
             position = self.qrcode.settings.get('position', 'bottom-right')
@@ -430,16 +526,17 @@ class QRCodeOverlay(BaseOverlay):
             bg_pos = (qr_pos[0] - 10, qr_pos[1] - 10)  # Adjust for padding
             
             # Paste background and QR code
-            img.paste(bg, bg_pos, bg)
-            img.paste(qr_img, qr_pos)
+            layer = Image.new('RGBA', size, (0, 0, 0, 0))
+            layer.paste(bg, bg_pos)
+            layer.paste(qr_img.convert('RGBA'), qr_pos)
             logger.info("QR code successfully applied")
             
-            return img
+            return layer
             
         except Exception as e:
             logger.error(f"Error adding QR code overlay: {e}")
             logger.error(traceback.format_exc())
-            return img
+            return None
 
 class OverlayManager:
     """Manages the application of multiple overlays to images."""
@@ -454,23 +551,118 @@ class OverlayManager:
             "metadata": MetadataOverlay(metadata_integration),
             "qrcode": QRCodeOverlay(qrcode_integration)
         }
-        logger.info(f"OverlayManager initialized with overlays: {', '.join(self.overlays.keys())}")
         
-    def apply_overlays(self, image_path, preferences, frame=None, photo=None):
+        # Rendered overlay layers, least recently used first
+        self._layer_cache = OrderedDict()
+        self._layer_lock = threading.Lock()
+        self.layer_stats = {'hits': 0, 'misses': 0}
+        logger.info(f"OverlayManager initialized with overlays: {', '.join(self.overlays.keys())}")
+
+    def _layer_cache_key(self, overlay_name, size, layer_key):
+        return json.dumps([overlay_name, list(size), layer_key], sort_keys=True, default=str)
+
+    def get_layer(self, overlay_name, size, frame=None, photo=None):
+        """Return the overlay's RGBA layer for an image size, rendering it on a cache miss.
+
+        Layers are keyed by the overlay name, image size and everything the
+        overlay draws from (style config, weather payload, QR URL, photo
+        metadata), so a cached layer is identical to a fresh render.
+
+        Args:
+            overlay_name (str): Name of the overlay
+            size (tuple): (width, height) of the image the layer is composited onto
+            frame (PhotoFrame, optional): Frame the overlay is rendered for
+            photo (Photo, optional): Photo database object containing metadata
+
+        Returns:
+            OverlayLayer: Cropped layer, or None if the overlay has nothing to draw
+        """
+        overlay = self.overlays[overlay_name]
+        key = self._layer_cache_key(overlay_name, size, overlay.layer_key(frame, photo))
+
+        with self._layer_lock:
+            if key in self._layer_cache:
+                self._layer_cache.move_to_end(key)
+                self.layer_stats['hits'] += 1
+                logger.debug(f"Overlay layer cache hit for {overlay_name}")
+                return self._layer_cache[key]
+            self.layer_stats['misses'] += 1
+
+        layer = build_layer(overlay, size, frame, photo)
+        if layer is None:
+            # Not cached: a missing weather payload or failed render may succeed next time
+            return None
+
+        with self._layer_lock:
+            self._layer_cache[key] = layer
+            self._layer_cache.move_to_end(key)
+            while len(self._layer_cache) > LAYER_CACHE_SIZE:
+                self._layer_cache.popitem(last=False)
+        return layer
+
+    def clear_layer_cache(self):
+        """Drop every cached overlay layer."""
+        with self._layer_lock:
+            self._layer_cache.clear()
+
+    def get_layer_stats(self):
+        """Return overlay layer cache statistics for diagnostics."""
+        with self._layer_lock:
+            lookups = self.layer_stats['hits'] + self.layer_stats['misses']
+            return {
+                'entries': len(self._layer_cache),
+                'max_entries': LAYER_CACHE_SIZE,
+                'hits': self.layer_stats['hits'],
+                'misses': self.layer_stats['misses'],
+                'hit_rate': round(self.layer_stats['hits'] / lookups, 3) if lookups else None
+            }
+
+    def get_cache_inputs(self, preferences, frame=None, photo=None):
+        """Describe everything the enabled overlays depend on, for render cache keys.
+
+        Args:
+            preferences (str or dict): Overlay preferences (JSON string or dictionary)
+            frame (PhotoFrame, optional): Frame the overlays are rendered for
+            photo (Photo, optional): Photo database object containing metadata
+
+        Returns:
+            dict: JSON-serializable inputs per enabled overlay
+        """
+        if isinstance(preferences, str):
+            try:
+                preferences = json.loads(preferences)
+            except json.JSONDecodeError:
+                preferences = {}
+        preferences = preferences or {}
+
+        inputs = {}
+        for overlay_name, overlay in self.overlays.items():
+            if not (preferences.get(overlay_name, False) and overlay.enabled):
+                continue
+            # Same inputs that key the layer cache
+            inputs[overlay_name] = overlay.layer_key(frame, photo)
+        return inputs
+
+    def apply_overlays(self, image, preferences, frame=None, photo=None):
         """Apply overlays to an image.
         
         Args:
-            image_path (str): Path to the image file
+            image (PIL.Image or str): Image object to draw on, or path to an image file
             preferences (str or dict): Overlay preferences (JSON string or dictionary)
             frame (PhotoFrame, optional): Frame object containing frame settings
             photo (Photo, optional): Photo database object containing metadata
+            
+        Returns:
+            PIL.Image: New RGB image with the overlays applied, or None on failure
         """
         try:
+            # Label used for logging; overlays only use it for diagnostics
+            image_path = image if isinstance(image, str) else 'in-memory image'
             logger.info(f"Starting overlay application for: {image_path}")
             
             # Validate the image path exists
-            if not os.path.exists(image_path):
-                logger.error(f"Image path does not exist: {image_path}")
+            if isinstance(image, str) and not os.path.exists(image):
+                logger.error(f"Image path does not exist: {image}")
                 return None
                 
             # Get orientation from frame if provided, otherwise default to portrait
@@ -492,7 +684,7 @@ class OverlayManager:
             
             # Open and prepare the image
             try:
-                img = Image.open(image_path)
+                img = Image.open(image) if isinstance(image, str) else image
                 logger.debug(f"Opened image: {image_path}, size: {img.size}, mode: {img.mode}")
                 
                 # Convert P mode (palette) to RGB immediately after opening
@@ -508,6 +700,8 @@ class OverlayManager:
             try:
                 if hasattr(img, '_getexif') and img._getexif():
                     exif_data = img.info.get('exif')
+                elif img.info.get('exif'):
+                    exif_data = img.info.get('exif')
                     logger.info("Extracted EXIF data from original image")
             except Exception as e:
                 logger.error(f"Error extracting EXIF data: {e}")
@@ -520,12 +714,23 @@ class OverlayManager:
             except Exception as e:
                 logger.error(f"Error ensuring orientation: {e}")
             
-            # Create a fresh copy and convert to RGBA
-            img = img.copy()
-            img.load()  # Ensure the image data is loaded
-            if img.mode != 'RGBA':
-                img = img.convert('RGBA')
-                logger.debug("Converted image to RGBA mode")
+            # Work on an RGB copy; overlays only convert the regions they touch
+            try:
+                if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+                    # Flatten transparency onto a white background, as for the final JPEG
+                    rgba = img.convert('RGBA')
+                    background = Image.new('RGB', img.size, (255, 255, 255))
+                    background.paste(rgba, mask=rgba.split()[-1])
+                    img = background
+                    logger.debug("Flattened transparent image onto white background")
+                elif img.mode != 'RGB':
+                    img = img.convert('RGB')
+                    logger.debug(f"Converted {img.mode} to RGB")
+                else:
+                    img = img.copy()
+            except Exception as conversion_error:
+                logger.error(f"Error converting image to RGB: {conversion_error}")
+                img = img.convert('RGB')
             
             # Apply each enabled overlay
             for overlay_name, overlay in self.overlays.items():
@@ -537,23 +742,11 @@ class OverlayManager:
                 if preferences.get(overlay_name, False) and overlay.enabled:
                     try:
                         logger.info(f"Applying {overlay_name} overlay")
-                        # Create a fresh draw object for each overlay
-                        draw = ImageDraw.Draw(img)
-                        new_img = overlay.apply(img, draw, image_path, frame, photo)
+                        # Layers are cached, so compositing is usually the only work per render
+                        layer = self.get_layer(overlay_name, img.size, frame, photo)
                         
-                        # Ensure we have a valid image after overlay
-                        if new_img is not None:
-                            img = new_img.copy()
-                            img.load()  # Ensure the image data is loaded
-                            
-                            # Handle various image modes that might be problematic when saving
-                            if img.mode == 'P':
-                                img = img.convert('RGB')
-                                logger.debug(f"Converted result from P mode to RGB after {overlay_name} overlay")
-                            elif img.mode != 'RGBA' and img.mode != 'RGB':
-                                img = img.convert('RGB')
-                                logger.debug(f"Converted result from {img.mode} mode to RGB after {overlay_name} overlay")
-                            
+                        if layer is not None:
+                            img = composite_layer(img, layer)
                             logger.debug(f"Successfully applied {overlay_name} overlay")
                         else:
                             logger.warning(f"{overlay_name} overlay returned None")
@@ -564,32 +757,10 @@ class OverlayManager:
                 else:
                     logger.info(f"Skipping {overlay_name} overlay (enabled: {overlay.enabled}, preference: {preferences.get(overlay_name, False)})")
             
-            # Ensure image is in RGB mode for JPEG compatibility
-            try:
-                if img.mode != 'RGB':
-                    # Handle transparency if exists
-                    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-                        # Create white background for transparent images
-                        background = Image.new('RGB', img.size, (255, 255, 255))
-                        background.paste(img, mask=img.split()[-1])  # Use alpha channel as mask
-                        img = background
-                        logger.debug(f"Converted {img.mode} with transparency to RGB")
-                    else:
-                        # Direct conversion for other modes
-                        img = img.convert('RGB')
-                        logger.debug(f"Converted {img.mode} to RGB")
-            except Exception as conversion_error:
-                logger.error(f"Error during final mode conversion: {conversion_error}")
-                # Fallback to RGB conversion
-                img = img.convert('RGB')
-            
             # If we have EXIF data, reattach it
             if exif_data:
-                # Create a new image with the original EXIF data
-                img_with_exif = img.copy()
-                img_with_exif.info['exif'] = exif_data
+                img.info['exif'] = exif_data
                 logger.info("Reattached EXIF data to modified image")
-                return img_with_exif
             
             logger.info("Overlay application completed successfully")
             return img
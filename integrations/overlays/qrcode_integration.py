@@ -4,6 +4,26 @@ import socket
 import os
 import logging
 import json
+import time
+from functools import lru_cache
+
+# How long a detected server IP address is reused before checking again
+SERVER_IP_TTL = 300  # seconds
+
+@lru_cache(maxsize=32)
+def _make_qr_image(url, size):
+    """Build a QR code image for a URL at a pixel size (cached; treat the result as read-only)."""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=2,
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    
+    qr_img = qr.make_image(fill_color="black", back_color="white")
+    return qr_img.resize((size, size), Image.Resampling.LANCZOS)
 
 class QRCodeIntegration:
     def __init__(self, config_path=None):
@@ -17,6 +37,8 @@ class QRCodeIntegration:
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
             'static', 'fonts', 'BebasNeue-Regular.ttf'
         )
+        self._server_ip = None
+        self._server_ip_checked = 0
 
     def load_settings(self):
         """Load QR code settings from config file."""
@@ -78,12 +100,7 @@ class QRCodeIntegration:
             if self.settings.get('custom_url'):
                 base_url = self.settings['custom_url']
             else:
-                # Get server IP address
-                s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                s.connect(("8.8.8.8", 80))
-                ip_address = s.getsockname()[0]
-                s.close()
-                
+                ip_address = self.get_server_ip()
                 port = self.settings.get('port', 5000)
                 base_url = f"http://{ip_address}:{port}"
             
@@ -96,6 +113,26 @@ class QRCodeIntegration:
             logging.error(f"Error getting server URL: {e}")
             return None
 
+    def get_server_ip(self):
+        """Get this server's LAN IP address, re-detecting it at most every SERVER_IP_TTL seconds."""
+        now = time.time()
+        if self._server_ip is None or now - self._server_ip_checked > SERVER_IP_TTL:
+            # Connecting a UDP socket sends nothing; it just selects the outbound interface
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                s.connect(("8.8.8.8", 80))
+                self._server_ip = s.getsockname()[0]
+            finally:
+                s.close()
+            self._server_ip_checked = now
+        return self._server_ip
+
+    def get_qr_url(self, frame_id=None):
+        """Get the URL the QR code should link to, based on the link_type setting."""
+        if self.settings['link_type'] == 'server_home':
+            return self.get_server_url()
+        return self.get_server_url(frame_id)  # frame_playlist
+
     def generate_qr_code(self, size, frame_id=None):
         """Generate QR code image of specified size.
         
@@ -105,10 +142,7 @@ class QRCodeIntegration:
         """
         try:
             # Determine URL based on link_type setting
-            if self.settings['link_type'] == 'server_home':
-                url = self.get_server_url()
-            else:  # frame_playlist
-                url = self.get_server_url(frame_id)
+            url = self.get_qr_url(frame_id)
             
             if not url:
                 return None
@@ -122,19 +156,7 @@ class QRCodeIntegration:
             multiplier = size_multipliers.get(self.settings['size'], 0.15)  # default to medium
             adjusted_size = int(size * multiplier)
             
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=2,
-            )
-            qr.add_data(url)
-            qr.make(fit=True)
-            
-            qr_img = qr.make_image(fill_color="black", back_color="white")
-            qr_img = qr_img.resize((adjusted_size, adjusted_size), Image.Resampling.LANCZOS)
-            
-            return qr_img
+            return _make_qr_image(url, adjusted_size)
         except Exception as e:
             logging.error(f"Error generating QR code: {e}")
             return None 
\ No newline at end of file
@@ -0,0 +1,182 @@
+import base64
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+# Keyset-paginated photo listing
+#
+# Photos are listed newest first by (uploaded_at, id). A page ends with an
+# opaque cursor holding the (uploaded_at, id) of its last photo, and the next
+# page continues strictly after it. Each page is therefore a range scan on the
+# uploaded_at index (SQLite appends the rowid, i.e. the id, to every index),
+# regardless of how deep into the library the client has scrolled, and photos
+# uploaded while a client is scrolling never shift the pages it has not read.
+# ------------------------------------------------------------------------------
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Fields a client can request with ?fields=...
+FIELDS = {
+    'id': lambda photo: photo.id,
+    'filename': lambda photo: photo.filename,
+    'thumbnail': lambda photo: photo.thumbnail,
+    'portrait_version': lambda photo: photo.portrait_version,
+    'landscape_version': lambda photo: photo.landscape_version,
+    'media_type': lambda photo: photo.media_type or 'photo',
+    'duration': lambda photo: photo.duration,
+    'heading': lambda photo: photo.heading,
+    'uploaded_at': lambda photo: photo.uploaded_at.isoformat() if photo.uploaded_at else None,
+    'analyzed': lambda photo: photo.ai_analyzed_at is not None
+}
+
+DEFAULT_FIELDS = ('id', 'filename', 'thumbnail', 'media_type', 'uploaded_at')
+
+def encode_cursor(photo):
+    """Build the opaque cursor pointing just past a photo."""
+    payload = json.dumps([photo.uploaded_at.isoformat() if photo.uploaded_at else None, photo.id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor produced by encode_cursor.
+
+    Returns:
+        tuple: (uploaded_at datetime or None, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        uploaded_at, photo_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return (datetime.fromisoformat(uploaded_at) if uploaded_at else None), int(photo_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def _parse_date(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name} date: {value}")
+
+def parse_query(args):
+    """
+    Read listing options from request arguments.
+
+    Args:
+        args: Request arguments (limit, cursor, order, fields, media_type,
+            since, until, analyzed)
+
+    Returns:
+        dict: Options for list_photos plus 'fields'
+
+    Raises:
+        ValueError: If an argument is invalid
+    """
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+
+    order = args.get('order', 'desc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+
+    fields = DEFAULT_FIELDS
+    if args.get('fields'):
+        fields = tuple(field.strip() for field in args['fields'].split(',') if field.strip())
+        unknown = [field for field in fields if field not in FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    analyzed = args.get('analyzed')
+    if analyzed is not None:
+        if analyzed.lower() not in ('true', 'false', '1', '0'):
+            raise ValueError("analyzed must be 'true' or 'false'")
+        analyzed = analyzed.lower() in ('true', '1')
+
+    return {
+        'limit': min(limit, MAX_PAGE_SIZE),
+        'cursor': decode_cursor(args['cursor']) if args.get('cursor') else None,
+        'descending': order == 'desc',
+        'media_type': args.get('media_type') or None,
+        'since': _parse_date(args['since'], 'since') if args.get('since') else None,
+        'until': _parse_date(args['until'], 'until') if args.get('until') else None,
+        'analyzed': analyzed,
+        'fields': fields
+    }
+
+def list_photos(session, Photo, limit=DEFAULT_PAGE_SIZE, cursor=None, descending=True,
+                media_type=None, since=None, until=None, analyzed=None):
+    """
+    Fetch one page of photos.
+
+    Args:
+        session: SQLAlchemy session
+        Photo: Photo model
+        limit: Page size
+        cursor: (uploaded_at, id) of the last photo of the previous page
+        descending: Newest first when True
+        media_type: Only 'photo' or 'video' items
+        since / until: Upload date range (inclusive / exclusive)
+        analyzed: Only photos with (True) or without (False) an AI analysis
+
+    Returns:
+        tuple: (list of Photo, cursor string for the next page or None)
+    """
+    query = session.query(Photo)
+
+    if media_type == 'photo':
+        # Rows from before media_type existed count as photos
+        query = query.filter(or_(Photo.media_type == 'photo', Photo.media_type.is_(None)))
+    elif media_type:
+        query = query.filter(Photo.media_type == media_type)
+    if since is not None:
+        query = query.filter(Photo.uploaded_at >= since)
+    if until is not None:
+        query = query.filter(Photo.uploaded_at < until)
+    if analyzed is True:
+        query = query.filter(Photo.ai_analyzed_at.isnot(None))
+    elif analyzed is False:
+        query = query.filter(Photo.ai_analyzed_at.is_(None))
+
+    if cursor is not None:
+        uploaded_at, photo_id = cursor
+        # SQLite sorts NULL upload dates first ascending and last descending
+        if uploaded_at is None and descending:
+            query = query.filter(and_(Photo.uploaded_at.is_(None), Photo.id < photo_id))
+        elif uploaded_at is None:
+            query = query.filter(or_(and_(Photo.uploaded_at.is_(None), Photo.id > photo_id),
+                                     Photo.uploaded_at.isnot(None)))
+        elif descending:
+            query = query.filter(or_(Photo.uploaded_at < uploaded_at,
+                                     and_(Photo.uploaded_at == uploaded_at, Photo.id < photo_id),
+                                     Photo.uploaded_at.is_(None)))
+        else:
+            query = query.filter(or_(Photo.uploaded_at > uploaded_at,
+                                     and_(Photo.uploaded_at == uploaded_at, Photo.id > photo_id)))
+
+    if descending:
+        query = query.order_by(Photo.uploaded_at.desc(), Photo.id.desc())
+    else:
+        query = query.order_by(Photo.uploaded_at, Photo.id)
+
+    # One extra row tells whether there is a next page
+    photos = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(photos) > limit:
+        photos = photos[:limit]
+        next_cursor = encode_cursor(photos[-1])
+    return photos, next_cursor
+
+def serialize(photo, fields=DEFAULT_FIELDS):
+    """Plain-dict view of a photo restricted to the requested fields."""
+    return {field: FIELDS[field](photo) for field in fields}
@@ -1,6 +1,14 @@
-from PIL import Image
+from PIL import Image, ImageOps, ExifTags
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import numpy as np
 import logging
+import io
+import json
+import math
 import os
+import threading
+import time
 
 # Configure logging for this module
 logger = logging.getLogger(__name__)
@@ -22,15 +30,280 @@ WAND_AVAILABLE = False
 try:
     from wand.image import Image as WandImage
     from wand.color import Color
-    import io
     WAND_AVAILABLE = True
     logger.info("Wand library is available for image enhancement")
 except ImportError:
-    logger.warning("Wand library is not available. Image enhancement features will be limited.")
-    logger.warning("To enable full image enhancement, install Wand: pip install Wand")
-    logger.warning("You will also need to install ImageMagick: https://imagemagick.org/script/download.php")
+    logger.info("Wand library is not available, using the Pillow enhancement backend")
+
+# Enhancement engines: 'pillow' runs in-process on pixel arrays, 'wand' uses ImageMagick
+ENHANCEMENT_BACKENDS = ('pillow', 'wand')
+DEFAULT_ENHANCEMENT_BACKEND = 'pillow'
+
+# Maximum mean absolute per-channel difference (0-255) between the two backends
+BACKEND_TOLERANCE = 12.0
+
+# Reduce-on-load keeps the decoded image at least this many times larger than
+# what the final resample needs. JPEG DCT scaling and Image.reduce are proper
+# area filters, so 1.0 already leaves the final LANCZOS pass a clean downscale.
+REDUCING_GAP = 1.0
+
+# Size of the thumbnails generated for uploads
+THUMBNAIL_SIZE = (400, 400)
+
+# Decode counters; the render executor merges in the counts from its workers
+_decode_stats_lock = threading.Lock()
+DECODE_STATS = {
+    'images': 0,          # images decoded through decode_for_size
+    'reduced': 0,         # of which were decoded at a reduced size
+    'full_pixels': 0,     # pixels a full decode would have produced
+    'decoded_pixels': 0,  # pixels actually decoded
+    'full_bytes': 0,
+    'decoded_bytes': 0,
+    'decode_seconds': 0.0
+}
+
+# Modes Image.reduce can't handle, and what they are converted to first
+# (the same conversions the later RGB pipeline would apply anyway)
+REDUCE_CONVERSIONS = {'1': 'L', 'I': 'RGB', 'I;16': 'RGB', 'I;16L': 'RGB', 'I;16B': 'RGB', 'I;16N': 'RGB'}
+
+def _reducible(img):
+    """Convert an image to a mode Image.reduce supports (palette images keep their transparency)."""
+    if img.mode == 'P':
+        return img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+    if img.mode in REDUCE_CONVERSIONS:
+        return img.convert(REDUCE_CONVERSIONS[img.mode])
+    return img
+
+def decode_for_size(source, target_size, reducing_gap=REDUCING_GAP):
+    """
+    Decode an image no larger than needed for a later resize to target_size.
+    
+    JPEGs are decoded with draft mode (DCT scaling by 1/2, 1/4 or 1/8); other
+    formats are shrunk with Image.reduce right after decoding (palette, 1-bit
+    and 16-bit images are converted to a mode it supports first). The result keeps
+    at least reducing_gap times the resolution the final high-quality resample
+    needs, whatever orientation or crop is applied afterwards.
+    Args:
+        source: Path to an image file, or a PIL Image that has not been loaded yet
+        target_size: (width, height) the image will eventually be resized to
+        reducing_gap: Headroom to keep above the target resolution
+    Returns:
+        Loaded PIL Image object (EXIF and other info preserved)
+    """
+    start_time = time.time()
+    img = Image.open(source) if isinstance(source, str) else source
+    
+    full_width, full_height = img.size
+    bands = len(img.getbands())
+    
+    # The shorter source side may end up spanning the longer target side
+    # (e.g. a landscape photo cropped to portrait), so that sets the bound
+    needed_side = max(target_size) * reducing_gap
+    factor = int(min(full_width, full_height) // needed_side) if needed_side > 0 else 1
+    
+    if factor >= 2:
+        if img.format == 'JPEG' and getattr(img, 'tile', None):
+            # Let libjpeg decode at a reduced scale (only valid before load)
+            requested = (math.ceil(full_width / factor), math.ceil(full_height / factor))
+            img.draft(img.mode, requested)
+        img.load()
+        
+        # Finish (or, for non-JPEG formats, do) the integer reduction
+        remaining = int(min(img.size) // needed_side)
+        if remaining >= 2:
+            info = img.info
+            img = _reducible(img).reduce(remaining)
+            img.info.update(info)
+    else:
+        img.load()
+    
+    _record_decode(full_width * full_height, img.width * img.height, bands, time.time() - start_time)
+    if img.size != (full_width, full_height):
+        logger.info(f"Reduced-on-load decode: {full_width}x{full_height} -> {img.width}x{img.height}")
+    return img
+
+def _record_decode(full_pixels, decoded_pixels, bands, seconds):
+    with _decode_stats_lock:
+        DECODE_STATS['images'] += 1
+        if decoded_pixels < full_pixels:
+            DECODE_STATS['reduced'] += 1
+        DECODE_STATS['full_pixels'] += full_pixels
+        DECODE_STATS['decoded_pixels'] += decoded_pixels
+        DECODE_STATS['full_bytes'] += full_pixels * bands
+        DECODE_STATS['decoded_bytes'] += decoded_pixels * bands
+        DECODE_STATS['decode_seconds'] += seconds
+
+def snapshot_decode_stats():
+    """Return a copy of the raw decode counters."""
+    with _decode_stats_lock:
+        return dict(DECODE_STATS)
+
+def merge_decode_stats(delta):
+    """Add counters collected elsewhere (e.g. in a render worker process)."""
+    with _decode_stats_lock:
+        for key, value in delta.items():
+            if key in DECODE_STATS:
+                DECODE_STATS[key] += value
+
+def get_decode_stats():
+    """
+    Summarize how much reduce-on-load decoding has saved.
+    
+    Time saved is estimated by assuming decode time scales with pixel count.
+    Returns:
+        dict of counters plus memory_saved_mb and estimated_seconds_saved
+    """
+    stats = snapshot_decode_stats()
+    stats['memory_saved_mb'] = round((stats['full_bytes'] - stats['decoded_bytes']) / (1024 * 1024), 1)
+    if stats['decoded_pixels']:
+        seconds_per_pixel = stats['decode_seconds'] / stats['decoded_pixels']
+        stats['estimated_seconds_saved'] = round((stats['full_pixels'] - stats['decoded_pixels']) * seconds_per_pixel, 3)
+    else:
+        stats['estimated_seconds_saved'] = 0.0
+    stats['decode_seconds'] = round(stats['decode_seconds'], 3)
+    return stats
+
+def extract_exif_from_image(img, image_path):
+    """
+    Extract EXIF metadata from an opened image, handling various types and potential errors.
+    
+    Args:
+        img: PIL Image opened from image_path (EXIF is read from its header)
+        image_path: Path of the image file, used for the modification-time fallback
+    Returns:
+        dict of JSON-serializable metadata, or None on failure
+    """
+    try:
+        logger.debug(f"Extracting EXIF from: {image_path}")
+        exif_data = img._getexif()
+        if not exif_data:
+            # Create basic metadata using file modification time if EXIF is missing
+            mtime = os.path.getmtime(image_path)
+            upload_time = datetime.fromtimestamp(mtime, tz=timezone.utc)
+            formatted_time_utc = upload_time.strftime('%Y:%m:%d %H:%M:%S')
+            metadata = {
+                'DateTime': formatted_time_utc,
+                'DateTimeOriginal': formatted_time_utc,
+                'DateTimeDigitized': formatted_time_utc,
+                'SourceFileInfo': {'FileModifyDate': upload_time.isoformat()},
+                # Add formatted date/time based on server settings later if needed
+            }
+            logger.info(f"No EXIF found for {os.path.basename(image_path)}, using file modify time.")
+            return metadata
+
+        metadata = {}
+        for tag_id, value in exif_data.items():
+            tag_name = ExifTags.TAGS.get(tag_id, str(tag_id))
+
+            if isinstance(value, bytes):
+                # Attempt to decode bytes, replace errors
+                try:
+                    metadata[tag_name] = value.decode('utf-8', errors='replace').strip()
+                except Exception:
+                     metadata[tag_name] = repr(value) # Fallback to repr
+            elif isinstance(value, tuple) and len(value) > 0 and isinstance(value[0], int):
+                 # Handle rational numbers typically stored as (numerator, denominator) tuples
+                 if len(value) == 2 and value[1] != 0:
+                      try:
+                           metadata[tag_name] = float(value[0]) / float(value[1])
+                      except ZeroDivisionError:
+                           metadata[tag_name] = 0.0
+                      except TypeError: # Handle cases where tuple elements are not numbers
+                           metadata[tag_name] = str(value)
+                 else:
+                     # Store other integer tuples as lists
+                     metadata[tag_name] = list(value)
+            elif isinstance(value, (int, float, str, bool)) or value is None:
+                 metadata[tag_name] = value
+            else:
+                 # Fallback for other non-serializable types
+                 try:
+                    json.dumps(value) # Test serializability
+                    metadata[tag_name] = value
+                 except (TypeError, OverflowError):
+                    metadata[tag_name] = str(value)
+
+        # Special handling for GPS Info
+        if 34853 in exif_data: # GPSInfo IFD tag ID
+            gps_info_raw = exif_data[34853]
+            gps_data = {}
+            for gps_tag_id, gps_value in gps_info_raw.items():
+                gps_tag_name = ExifTags.GPSTAGS.get(gps_tag_id, str(gps_tag_id))
+                # Process GPS values similarly to main EXIF
+                if isinstance(gps_value, bytes):
+                    try:
+                        gps_data[gps_tag_name] = gps_value.decode('utf-8', errors='replace').strip()
+                    except Exception:
+                        gps_data[gps_tag_name] = repr(gps_value)
+                elif isinstance(gps_value, tuple) and len(gps_value) > 0 and isinstance(gps_value[0], (int, float)):
+                     # GPS Coordinates (Degrees, Minutes, Seconds often as rationals)
+                     if len(gps_value) == 3: # DMS format
+                         try:
+                             d = float(gps_value[0]) if not isinstance(gps_value[0], tuple) else float(gps_value[0][0])/float(gps_value[0][1])
+                             m = float(gps_value[1]) if not isinstance(gps_value[1], tuple) else float(gps_value[1][0])/float(gps_value[1][1])
+                             s = float(gps_value[2]) if not isinstance(gps_value[2], tuple) else float(gps_value[2][0])/float(gps_value[2][1])
+                             gps_data[gps_tag_name] = [d, m, s] # Store as list [D, M, S]
+                         except (ValueError, TypeError, ZeroDivisionError, IndexError):
+                             gps_data[gps_tag_name] = str(gps_value) # Fallback
+                     elif len(gps_value) == 2 and isinstance(gps_value[0], int) and gps_value[1] != 0: # Simple rational
+                          try:
+                               gps_data[gps_tag_name] = float(gps_value[0]) / float(gps_value[1])
+                          except (ZeroDivisionError, TypeError):
+                               gps_data[gps_tag_name] = str(gps_value)
+                     else:
+                         gps_data[gps_tag_name] = list(gps_value) # Store other tuples as list
+                elif isinstance(gps_value, (int, float, str, bool)) or gps_value is None:
+                    gps_data[gps_tag_name] = gps_value
+                else:
+                    try:
+                       json.dumps(gps_value)
+                       gps_data[gps_tag_name] = gps_value
+                    except (TypeError, OverflowError):
+                       gps_data[gps_tag_name] = str(gps_value)
+            metadata['GPSInfo'] = gps_data # Replace raw GPS data with processed dict
+
+            # Attempt to calculate decimal coordinates
+            try:
+                lat_dms = gps_data.get('GPSLatitude')
+                lat_ref = gps_data.get('GPSLatitudeRef', 'N')
+                lon_dms = gps_data.get('GPSLongitude')
+                lon_ref = gps_data.get('GPSLongitudeRef', 'E')
+
+                if isinstance(lat_dms, list) and len(lat_dms) == 3 and isinstance(lon_dms, list) and len(lon_dms) == 3:
+                    lat = lat_dms[0] + lat_dms[1] / 60.0 + lat_dms[2] / 3600.0
+                    lon = lon_dms[0] + lon_dms[1] / 60.0 + lon_dms[2] / 3600.0
+                    if lat_ref == 'S': lat = -lat
+                    if lon_ref == 'W': lon = -lon
+                    metadata['decimal_latitude'] = round(lat, 6)
+                    metadata['decimal_longitude'] = round(lon, 6)
+                    metadata['formatted_location'] = f"{abs(lat):.4f}°{'N' if lat >= 0 else 'S'}, {abs(lon):.4f}°{'E' if lon >= 0 else 'W'}"
+            except Exception as gps_calc_e:
+                logger.warning(f"Could not calculate decimal GPS coordinates: {gps_calc_e}")
+
+        # Add formatted date/time if DateTime exists (using server's timezone setting)
+        if 'DateTimeOriginal' in metadata or 'DateTime' in metadata:
+            dt_str = metadata.get('DateTimeOriginal') or metadata.get('DateTime')
+            try:
+                # Common EXIF format: 'YYYY:MM:DD HH:MM:SS'
+                naive_dt = datetime.strptime(dt_str, '%Y:%m:%d %H:%M:%S')
+                # Assume the EXIF time is local to where the photo was taken, but store UTC reference
+                # For simplicity here, we just store the naive string, formatting happens on display
+                metadata['formatted_date'] = naive_dt.strftime('%B %d, %Y')
+                metadata['formatted_time'] = naive_dt.strftime('%I:%M %p')
+            except (ValueError, TypeError) as fmt_e:
+                logger.warning(f"Could not parse or format EXIF DateTime '{dt_str}': {fmt_e}")
+
+        logger.debug(f"Successfully extracted EXIF for {os.path.basename(image_path)}")
+        return metadata
+
+    except Exception as e:
+        logger.error(f"Error extracting EXIF metadata from {image_path}: {e}", exc_info=True)
+        return None # Return None on failure
 
 class PhotoProcessor:
+    # Backend used by enhance_image; the server sets this from its settings
+    enhancement_backend = DEFAULT_ENHANCEMENT_BACKEND
+
     def ensure_orientation(self, img, desired_orientation='portrait', exif_orientation=None):
         """
         Ensure image is in the desired orientation by cropping.
@@ -54,34 +327,7 @@ class PhotoProcessor:
         # 8: Rotated 270° CW
         
         # First, apply EXIF orientation to get the image right side up
-        if exif_orientation:
-            logger.info(f"Applying EXIF orientation: {exif_orientation}")
-            try:
-                if exif_orientation == 2:
-                    logger.info("Flipping image horizontally")
-                    img = img.transpose(Image.FLIP_LEFT_RIGHT)
-                elif exif_orientation == 3:
-                    logger.info("Rotating image 180 degrees")
-                    img = img.rotate(180, expand=True)
-                elif exif_orientation == 4:
-                    logger.info("Flipping image vertically")
-                    img = img.transpose(Image.FLIP_TOP_BOTTOM)
-                elif exif_orientation == 5:
-                    logger.info("Rotating image 270 degrees CW and flipping horizontally")
-                    img = img.rotate(-270, expand=True)
-                    img = img.transpose(Image.FLIP_LEFT_RIGHT)
-                elif exif_orientation == 6:
-                    logger.info("Rotating image 90 degrees CW")
-                    img = img.rotate(-90, expand=True)
-                elif exif_orientation == 7:
-                    logger.info("Rotating image 90 degrees CW and flipping horizontally")
-                    img = img.rotate(-90, expand=True)
-                    img = img.transpose(Image.FLIP_LEFT_RIGHT)
-                elif exif_orientation == 8:
-                    logger.info("Rotating image 270 degrees CW")
-                    img = img.rotate(-270, expand=True)
-            except Exception as e:
-                logger.error(f"Error applying EXIF orientation: {e}")
+        img = self.apply_exif_orientation(img, exif_orientation)
         
         # Get current dimensions
         width, height = img.size
@@ -137,6 +383,45 @@ class PhotoProcessor:
         logger.info(f"Final image dimensions: {img.width}x{img.height}")
         return img
 
+    def apply_exif_orientation(self, img, exif_orientation):
+        """
+        Rotate/flip an image according to its EXIF orientation value.
+        Args:
+            img: PIL Image object
+            exif_orientation: Orientation value from EXIF data (None or 1 = unchanged)
+        Returns:
+            PIL Image object, right side up
+        """
+        if exif_orientation:
+            logger.info(f"Applying EXIF orientation: {exif_orientation}")
+            try:
+                if exif_orientation == 2:
+                    logger.info("Flipping image horizontally")
+                    img = img.transpose(Image.FLIP_LEFT_RIGHT)
+                elif exif_orientation == 3:
+                    logger.info("Rotating image 180 degrees")
+                    img = img.rotate(180, expand=True)
+                elif exif_orientation == 4:
+                    logger.info("Flipping image vertically")
+                    img = img.transpose(Image.FLIP_TOP_BOTTOM)
+                elif exif_orientation == 5:
+                    logger.info("Rotating image 270 degrees CW and flipping horizontally")
+                    img = img.rotate(-270, expand=True)
+                    img = img.transpose(Image.FLIP_LEFT_RIGHT)
+                elif exif_orientation == 6:
+                    logger.info("Rotating image 90 degrees CW")
+                    img = img.rotate(-90, expand=True)
+                elif exif_orientation == 7:
+                    logger.info("Rotating image 90 degrees CW and flipping horizontally")
+                    img = img.rotate(-90, expand=True)
+                    img = img.transpose(Image.FLIP_LEFT_RIGHT)
+                elif exif_orientation == 8:
+                    logger.info("Rotating image 270 degrees CW")
+                    img = img.rotate(-270, expand=True)
+            except Exception as e:
+                logger.error(f"Error applying EXIF orientation: {e}")
+        return img
+
     def process_for_orientation(self, image_path, orientation='portrait', frame=None):
         """
         Process image for target dimensions and ensure correct orientation.
@@ -149,88 +434,16 @@ class PhotoProcessor:
         """
         logger.info(f"Processing image for {orientation}: {image_path}")
         try:
-            # Open the image
+            # Open the image (header only; pixels are decoded below)
             img = Image.open(image_path)
+            exif_orientation, exif_data = self._read_exif_orientation(img)
             
-            # Get EXIF orientation if it exists
-            exif_orientation = None
-            exif_data = None
-            try:
-                exif = img._getexif()
-                if exif:
-                    exif_orientation = exif.get(274)  # 274 is the EXIF tag for orientation
-                    # Store original EXIF data to preserve it
-                    exif_data = img.info.get('exif')
-            except (AttributeError, KeyError, IndexError, TypeError) as e:
-                logger.warning(f"Could not get EXIF data: {e}")
-            
-            # Convert RGBA to RGB if necessary
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-            
-            # Determine natural orientation based on EXIF
-            if exif_orientation in [5, 6, 7, 8]:
-                # These orientations indicate the image is naturally portrait
-                natural_orientation = 'portrait'
-            elif exif_orientation in [1, 2, 3, 4]:
-                # These orientations indicate the image is naturally landscape
-                natural_orientation = 'landscape'
-            else:
-                # If no EXIF orientation, use dimensions
-                natural_orientation = 'portrait' if img.height > img.width else 'landscape'
-            
-            logger.info(f"Natural orientation determined to be {natural_orientation} (EXIF: {exif_orientation})")
-            
-            # Ensure correct orientation
-            img = self.ensure_orientation(img, orientation, exif_orientation)
-            
-            # Apply image enhancements if frame is provided
-            if frame:
-                logger.info(f"Applying image enhancements for frame: {frame.id}")
-                img = self.enhance_image(img, frame)
-            
-            # Define target dimensions based on orientation
-            if orientation == 'portrait':
-                target_width = 1200
-                target_height = 1600
-            else:  # landscape
-                target_width = 1600
-                target_height = 1200
-            
-            # Calculate aspect ratios
-            target_ratio = target_width / target_height
-            img_ratio = img.width / img.height
-            
-            # Resize image maintaining aspect ratio
-            if img_ratio > target_ratio:
-                # Image is wider than target
-                new_height = target_height
-                new_width = int(img_ratio * new_height)
-            else:
-                # Image is taller than target
-                new_width = target_width
-                new_height = int(new_width / img_ratio)
-            
-            # Resize the image
-            resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Generate output filename
-            filename = os.path.basename(image_path)
-            name, ext = os.path.splitext(filename)
-            output_path = os.path.join(
-                os.path.dirname(image_path),
-                f"{name}_{orientation}{ext}"
-            )
+            # Decode large originals at a reduced size before the final resample
+            img = decode_for_size(img, self.get_orientation_size(orientation))
             
-            # Save the processed image - with or without EXIF data
-            if exif_data:
-                logger.info(f"Preserved EXIF data in {orientation} version")
-                resized.save(output_path, quality=95, exif=exif_data)
-            else:
-                logger.info(f"No EXIF data to preserve in {orientation} version")
-                resized.save(output_path, quality=95)
-                
-            logger.info(f"Saved {orientation} version to {output_path}")
+            resized = self.render_orientation(img, orientation, exif_orientation, frame)
+            output_path = self.get_orientation_path(image_path, orientation)
+            self._save_derivative(resized, output_path, exif_data, orientation)
             return output_path
             
         except Exception as e:
@@ -238,6 +451,173 @@ class PhotoProcessor:
             logger.exception("Full traceback:")
             return None
 
+    @staticmethod
+    def get_orientation_size(orientation):
+        """Target (width, height) of the stored portrait or landscape version."""
+        return (1200, 1600) if orientation == 'portrait' else (1600, 1200)
+
+    @staticmethod
+    def get_orientation_path(image_path, orientation):
+        """Path of the portrait or landscape version stored next to an image."""
+        name, ext = os.path.splitext(os.path.basename(image_path))
+        return os.path.join(os.path.dirname(image_path), f"{name}_{orientation}{ext}")
+
+    def _read_exif_orientation(self, img):
+        """
+        Read the EXIF orientation and raw EXIF bytes from an opened image.
+        Returns:
+            tuple: (exif_orientation or None, exif bytes or None)
+        """
+        exif_orientation = None
+        exif_data = None
+        try:
+            exif = img._getexif()
+            if exif:
+                exif_orientation = exif.get(274)  # 274 is the EXIF tag for orientation
+                # Store original EXIF data to preserve it
+                exif_data = img.info.get('exif')
+        except (AttributeError, KeyError, IndexError, TypeError) as e:
+            logger.warning(f"Could not get EXIF data: {e}")
+        return exif_orientation, exif_data
+
+    def _save_derivative(self, img, output_path, exif_data, label):
+        """Save a generated version of a photo, preserving EXIF data when there is any."""
+        if exif_data:
+            logger.info(f"Preserved EXIF data in {label} version")
+            img.save(output_path, quality=95, exif=exif_data)
+        else:
+            logger.info(f"No EXIF data to preserve in {label} version")
+            img.save(output_path, quality=95)
+        logger.info(f"Saved {label} version to {output_path}")
+
+    def render_orientation(self, img, orientation='portrait', exif_orientation=None, frame=None):
+        """
+        Crop and resize a decoded image for the given orientation.
+        Args:
+            img: Decoded PIL Image object
+            orientation: 'portrait' or 'landscape'
+            exif_orientation: Orientation value from EXIF data, applied before cropping
+            frame: PhotoFrame object with image settings (applies enhancements)
+        Returns:
+            Resized PIL Image object
+        """
+        # Define target dimensions based on orientation
+        target_width, target_height = self.get_orientation_size(orientation)
+        
+        # Convert RGBA to RGB if necessary
+        if img.mode == 'RGBA':
+            img = img.convert('RGB')
+        
+        # Determine natural orientation based on EXIF
+        if exif_orientation in [5, 6, 7, 8]:
+            # These orientations indicate the image is naturally portrait
+            natural_orientation = 'portrait'
+        elif exif_orientation in [1, 2, 3, 4]:
+            # These orientations indicate the image is naturally landscape
+            natural_orientation = 'landscape'
+        else:
+            # If no EXIF orientation, use dimensions
+            natural_orientation = 'portrait' if img.height > img.width else 'landscape'
+        
+        logger.info(f"Natural orientation determined to be {natural_orientation} (EXIF: {exif_orientation})")
+        
+        # Ensure correct orientation
+        img = self.ensure_orientation(img, orientation, exif_orientation)
+        
+        # Apply image enhancements if frame is provided
+        if frame:
+            logger.info(f"Applying image enhancements for frame: {frame.id}")
+            img = self.enhance_image(img, frame)
+        
+        # Calculate aspect ratios
+        target_ratio = target_width / target_height
+        img_ratio = img.width / img.height
+        
+        # Resize image maintaining aspect ratio
+        if img_ratio > target_ratio:
+            # Image is wider than target
+            new_height = target_height
+            new_width = int(img_ratio * new_height)
+        else:
+            # Image is taller than target
+            new_width = target_width
+            new_height = int(new_width / img_ratio)
+        
+        # Resize the image
+        return img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+    def generate_derivatives(self, image_path, thumbnail_path=None, normalize_original=False):
+        """
+        Produce everything an uploaded photo needs from a single decode: EXIF
+        metadata, the thumbnail and the portrait and landscape versions. The
+        derivatives are resized, encoded and written in parallel.
+        Args:
+            image_path: Path to the uploaded image
+            thumbnail_path: Where to write the thumbnail (None = no thumbnail)
+            normalize_original: Rewrite the original with its EXIF rotation applied
+                (only when it actually has one)
+        Returns:
+            dict with exif_metadata, thumbnail, portrait and landscape; the paths
+            are None for derivatives that could not be created
+        """
+        result = {'exif_metadata': None, 'thumbnail': None, 'portrait': None, 'landscape': None}
+        
+        img = Image.open(image_path)
+        try:
+            result['exif_metadata'] = extract_exif_from_image(img, image_path)
+            exif_orientation, exif_data = self._read_exif_orientation(img)
+            
+            if normalize_original and exif_orientation not in (None, 1):
+                # The original is rewritten upright, which needs the full-size image
+                img = ImageOps.exif_transpose(img)
+                exif_data = img.info.get('exif')
+                exif_orientation = None
+                img.save(image_path, quality=95, exif=exif_data or b'')
+                logger.info(f"Applied EXIF orientation to {os.path.basename(image_path)}")
+            else:
+                # One reduced decode covers the thumbnail and both orientations
+                img = decode_for_size(img, (1600, 1600))
+        except Exception as e:
+            logger.error(f"Error decoding {image_path}: {str(e)}")
+            logger.exception("Full traceback:")
+            img.close()
+            return result
+        
+        def make_thumbnail():
+            thumb = self.apply_exif_orientation(img, exif_orientation)
+            if thumb is img:
+                thumb = img.copy()
+            thumb.thumbnail(THUMBNAIL_SIZE)
+            if thumb.mode not in ('RGB', 'L'):
+                thumb = thumb.convert('RGB')
+            thumb.save(thumbnail_path, "JPEG", quality=85)
+            return thumbnail_path
+        
+        def make_orientation(orientation):
+            resized = self.render_orientation(img, orientation, exif_orientation)
+            output_path = self.get_orientation_path(image_path, orientation)
+            self._save_derivative(resized, output_path, exif_data, orientation)
+            return output_path
+        
+        tasks = {
+            'portrait': lambda: make_orientation('portrait'),
+            'landscape': lambda: make_orientation('landscape')
+        }
+        if thumbnail_path:
+            tasks['thumbnail'] = make_thumbnail
+        
+        # Resampling and JPEG encoding release the GIL, so threads run them in parallel
+        with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+            futures = {name: pool.submit(task) for name, task in tasks.items()}
+            for name, future in futures.items():
+                try:
+                    result[name] = future.result()
+                except Exception as e:
+                    logger.error(f"Error creating {name} version of {image_path}: {str(e)}")
+                    logger.exception("Full traceback:")
+        
+        return result
+
     def check_orientation(self, image_path):
         """
         Check the orientation of an image.
@@ -261,11 +641,6 @@ class PhotoProcessor:
         """
         logger.info("Starting image enhancement")
         
-        # If no Wand library, return original image
-        if not WAND_AVAILABLE:
-            logger.warning("Wand library not available. Skipping image enhancement.")
-            return img
-            
         if frame is None:
             logger.warning("No frame provided for image enhancement. Using defaults.")
             contrast_factor = 1.0
@@ -274,10 +649,6 @@ class PhotoProcessor:
             padding = 0
             color_map = None
         else:
-            # Log frame object details
-            logger.info(f"Frame object: id={frame.id}, type={type(frame)}")
-            logger.info(f"Frame attributes: {dir(frame)}")
-            
             contrast_factor = frame.contrast_factor
             saturation = frame.saturation
             blue_adjustment = frame.blue_adjustment
@@ -297,123 +668,356 @@ class PhotoProcessor:
                 logger.info("Frame is using default settings, skipping enhancement")
                 return img
         
+        backend = self.get_enhancement_backend()
+        logger.info(f"Using '{backend}' enhancement backend")
+        
         try:
-            # Get original dimensions
-            orig_width, orig_height = img.size
-            
-            # Get frame dimensions if available
-            frame_width = None
-            frame_height = None
-            if frame and hasattr(frame, 'screen_resolution') and frame.screen_resolution:
-                try:
-                    # Parse resolution string (e.g., "800x600")
-                    resolution_parts = frame.screen_resolution.split('x')
-                    if len(resolution_parts) == 2:
-                        frame_width = int(resolution_parts[0])
-                        frame_height = int(resolution_parts[1])
-                        logger.info(f"Using frame dimensions: {frame_width}x{frame_height}")
-                except (ValueError, AttributeError) as e:
-                    logger.warning(f"Could not parse frame resolution: {e}")
-            
-            # If we don't have frame dimensions, use default dimensions
-            if not frame_width or not frame_height:
-                # Use orientation to determine default dimensions
-                if frame and hasattr(frame, 'orientation') and frame.orientation == 'portrait':
-                    frame_width = 1200
-                    frame_height = 1600
-                else:  # landscape or default
-                    frame_width = 1600
-                    frame_height = 1200
-                logger.info(f"Using default dimensions based on orientation: {frame_width}x{frame_height}")
-            
             # First resize the image to fit the frame dimensions (without padding)
             # This saves resources for subsequent processing
-            img_aspect = orig_width / orig_height
-            frame_aspect = frame_width / frame_height
-            
-            if img_aspect > frame_aspect:
-                # Image is wider than frame, fit to width
-                resize_width = frame_width
-                resize_height = int(resize_width / img_aspect)
-            else:
-                # Image is taller than frame, fit to height
-                resize_height = frame_height
-                resize_width = int(resize_height * img_aspect)
+            img = self._resize_for_frame(img, frame)
             
-            # Ensure resize dimensions are at least 1px
-            resize_width = max(1, resize_width)
-            resize_height = max(1, resize_height)
-            
-            # Resize original image
-            img = img.resize((resize_width, resize_height), Image.LANCZOS)
-            
-            # Convert to RGB if necessary and save as JPEG
+            # Convert to RGB if necessary
             if img.mode != 'RGB':
                 img = img.convert('RGB')
             
-            # Convert PIL image to bytes for Wand processing using JPEG
-            img_byte_arr = io.BytesIO()
-            img.save(img_byte_arr, format='JPEG', quality=95, subsampling=0)  # Highest quality JPEG
-            img_byte_arr.seek(0)
-            
-            # Process with ImageMagick via Wand using JPEG format
-            with WandImage(blob=img_byte_arr.getvalue(), format='jpeg') as wand_img:
-                # Apply padding if needed using ImageMagick's border functionality
-                if padding > 0:
-                    logger.info(f"Applying padding of {padding}px to image using ImageMagick border")
-                    wand_img.border(Color('black'), width=padding, height=padding)
-                    logger.info(f"Padding applied. New dimensions: {wand_img.width}x{wand_img.height}")
-                
-                # Apply auto gamma correction for better tonal balance
-                #logger.info("Applying auto gamma correction")
-                #wand_img.auto_gamma()
-                
-                # Apply light noise reduction (0.5 is a conservative value that reduces noise while preserving detail)
-                #logger.info("Applying noise reduction")
-                #wand_img.noise('gaussian', attenuate=0.0)
-                
-                # Calculate black and white points based on contrast factor
-                black_point = 0.10 * contrast_factor
-                white_point = 1.0 - (0.10 * contrast_factor)
-                # Ensure values stay in valid range
-                black_point = min(0.3, max(0.0, black_point))
-                white_point = max(0.7, min(1.0, white_point))
-                
-                wand_img.contrast_stretch(black_point=black_point, white_point=white_point)
-                
-                # Apply saturation and hue adjustment
-                wand_img.modulate(brightness=103, saturation=saturation, hue=100 - blue_adjustment)
-                
-                # Apply color quantization if color map is provided and not empty
-                if color_map and len(color_map) > 0:
-                    # Create color map for quantization
-                    color_map_wand = []
-                    for color in color_map:
-                        color_map_wand.append(Color(color))
-                    
-                    # Log color map information
-                    logger.info(f"Using color map with {len(color_map)} colors for image enhancement")
-                    logger.info(f"First few colors in map: {color_map[:5] if len(color_map) > 5 else color_map}")
-                    
-                    try:
-                        logger.info(f"Applying color quantization with {len(color_map)} colors")
-                        wand_img.quantize(number_colors=len(color_map), dither=True)
-                        logger.info("Color quantization with Floyd-Steinberg dithering applied successfully")
-                    except Exception as e:
-                        logger.warning(f"Floyd-Steinberg dithering failed: {e}, falling back to no dithering")
-                        try:
-                            wand_img.quantize(number_colors=len(color_map), dither=False)
-                            logger.info("Color quantization without dithering applied as fallback")
-                        except Exception as e2:
-                            logger.error(f"Color quantization failed completely: {e2}")
-                
-                # Convert back to PIL image as JPEG
-                img_data = wand_img.make_blob(format='jpeg')
-                enhanced_img = Image.open(io.BytesIO(img_data))
-                
-                return enhanced_img
+            if backend == 'wand':
+                return self._enhance_with_wand(img, contrast_factor, saturation, blue_adjustment, padding, color_map)
+            return self._enhance_with_pillow(img, contrast_factor, saturation, blue_adjustment, padding, color_map)
                 
         except Exception as e:
             logger.error(f"Error enhancing image: {str(e)}")
             logger.exception("Full traceback:")
-            return img  # Return original image if enhancement fails
\ No newline at end of file
+            return img  # Return original image if enhancement fails
+
+    def get_enhancement_backend(self):
+        """
+        Resolve the enhancement backend to use for this processor.
+        Returns:
+            'pillow' or 'wand'
+        """
+        backend = self.enhancement_backend
+        if backend not in ENHANCEMENT_BACKENDS:
+            logger.warning(f"Unknown enhancement backend '{backend}', using '{DEFAULT_ENHANCEMENT_BACKEND}'")
+            backend = DEFAULT_ENHANCEMENT_BACKEND
+        if backend == 'wand' and not WAND_AVAILABLE:
+            logger.warning("Wand backend requested but Wand is not available, using 'pillow'")
+            backend = 'pillow'
+        return backend
+
+    def _resize_for_frame(self, img, frame=None):
+        """
+        Resize an image to fit within the frame's screen dimensions.
+        Args:
+            img: PIL Image object
+            frame: PhotoFrame object with screen_resolution/orientation
+        Returns:
+            Resized PIL Image object
+        """
+        # Get original dimensions
+        orig_width, orig_height = img.size
+        
+        # Get frame dimensions if available
+        frame_width = None
+        frame_height = None
+        if frame and hasattr(frame, 'screen_resolution') and frame.screen_resolution:
+            try:
+                # Parse resolution string (e.g., "800x600")
+                resolution_parts = frame.screen_resolution.split('x')
+                if len(resolution_parts) == 2:
+                    frame_width = int(resolution_parts[0])
+                    frame_height = int(resolution_parts[1])
+                    logger.info(f"Using frame dimensions: {frame_width}x{frame_height}")
+            except (ValueError, AttributeError) as e:
+                logger.warning(f"Could not parse frame resolution: {e}")
+        
+        # If we don't have frame dimensions, use default dimensions
+        if not frame_width or not frame_height:
+            # Use orientation to determine default dimensions
+            if frame and hasattr(frame, 'orientation') and frame.orientation == 'portrait':
+                frame_width = 1200
+                frame_height = 1600
+            else:  # landscape or default
+                frame_width = 1600
+                frame_height = 1200
+            logger.info(f"Using default dimensions based on orientation: {frame_width}x{frame_height}")
+        
+        img_aspect = orig_width / orig_height
+        frame_aspect = frame_width / frame_height
+        
+        if img_aspect > frame_aspect:
+            # Image is wider than frame, fit to width
+            resize_width = frame_width
+            resize_height = int(resize_width / img_aspect)
+        else:
+            # Image is taller than frame, fit to height
+            resize_height = frame_height
+            resize_width = int(resize_height * img_aspect)
+        
+        # Ensure resize dimensions are at least 1px
+        resize_width = max(1, resize_width)
+        resize_height = max(1, resize_height)
+        
+        return img.resize((resize_width, resize_height), Image.LANCZOS)
+
+    def _enhance_with_pillow(self, img, contrast_factor, saturation, blue_adjustment, padding, color_map):
+        """
+        Apply the enhancement chain in-process on pixel arrays.
+        
+        Mirrors the Wand backend step for step (border, contrast stretch,
+        HSL modulate, dithered quantize) without any intermediate encode.
+        Args:
+            img: RGB PIL Image already resized for the frame
+        Returns:
+            Enhanced RGB PIL Image object
+        """
+        # Apply padding as a black border
+        if padding > 0:
+            logger.info(f"Applying padding of {padding}px to image")
+            img = ImageOps.expand(img, border=padding, fill='black')
+            logger.info(f"Padding applied. New dimensions: {img.width}x{img.height}")
+        
+        # Same black/white points as the Wand backend
+        black_point, white_point = contrast_stretch_points(contrast_factor)
+        img = contrast_stretch(img, black_point, white_point)
+        
+        # Apply saturation and hue adjustment
+        img = modulate(img, brightness=103, saturation=saturation, hue=100 - blue_adjustment)
+        
+        # Apply color quantization if color map is provided and not empty
+        if color_map and len(color_map) > 0:
+            number_colors = max(2, min(256, len(color_map)))
+            logger.info(f"Applying color quantization with {number_colors} colors")
+            # Build an adaptive palette first, then map onto it with
+            # Floyd-Steinberg dithering (quantize() alone does not dither)
+            palette_img = img.quantize(colors=number_colors)
+            img = img.quantize(palette=palette_img, dither=Image.Dither.FLOYDSTEINBERG).convert('RGB')
+        
+        return img
+
+    def _enhance_with_wand(self, img, contrast_factor, saturation, blue_adjustment, padding, color_map):
+        """
+        Apply the enhancement chain with ImageMagick via Wand.
+        Args:
+            img: RGB PIL Image already resized for the frame
+        Returns:
+            Enhanced PIL Image object
+        """
+        # Convert PIL image to bytes for Wand processing using JPEG
+        img_byte_arr = io.BytesIO()
+        img.save(img_byte_arr, format='JPEG', quality=95, subsampling=0)  # Highest quality JPEG
+        img_byte_arr.seek(0)
+
+        # Process with ImageMagick via Wand using JPEG format
+        with WandImage(blob=img_byte_arr.getvalue(), format='jpeg') as wand_img:
+            # Apply padding if needed using ImageMagick's border functionality
+            if padding > 0:
+                logger.info(f"Applying padding of {padding}px to image using ImageMagick border")
+                wand_img.border(Color('black'), width=padding, height=padding)
+                logger.info(f"Padding applied. New dimensions: {wand_img.width}x{wand_img.height}")
+
+            # Apply auto gamma correction for better tonal balance
+            #logger.info("Applying auto gamma correction")
+            #wand_img.auto_gamma()
+
+            # Apply light noise reduction (0.5 is a conservative value that reduces noise while preserving detail)
+            #logger.info("Applying noise reduction")
+            #wand_img.noise('gaussian', attenuate=0.0)
+
+            # Calculate black and white points based on contrast factor
+            black_point, white_point = contrast_stretch_points(contrast_factor)
+
+            wand_img.contrast_stretch(black_point=black_point, white_point=white_point)
+
+            # Apply saturation and hue adjustment
+            wand_img.modulate(brightness=103, saturation=saturation, hue=100 - blue_adjustment)
+
+            # Apply color quantization if color map is provided and not empty
+            if color_map and len(color_map) > 0:
+                # Create color map for quantization
+                color_map_wand = []
+                for color in color_map:
+                    color_map_wand.append(Color(color))
+
+                # Log color map information
+                logger.info(f"Using color map with {len(color_map)} colors for image enhancement")
+                logger.info(f"First few colors in map: {color_map[:5] if len(color_map) > 5 else color_map}")
+
+                try:
+                    logger.info(f"Applying color quantization with {len(color_map)} colors")
+                    wand_img.quantize(number_colors=len(color_map), dither=True)
+                    logger.info("Color quantization with Floyd-Steinberg dithering applied successfully")
+                except Exception as e:
+                    logger.warning(f"Floyd-Steinberg dithering failed: {e}, falling back to no dithering")
+                    try:
+                        wand_img.quantize(number_colors=len(color_map), dither=False)
+                        logger.info("Color quantization without dithering applied as fallback")
+                    except Exception as e2:
+                        logger.error(f"Color quantization failed completely: {e2}")
+
+            # Convert back to PIL image as JPEG
+            img_data = wand_img.make_blob(format='jpeg')
+            enhanced_img = Image.open(io.BytesIO(img_data))
+
+            return enhanced_img
+
+    def compare_backends(self, img, frame, tolerance=BACKEND_TOLERANCE):
+        """
+        Render an image with both backends and measure how far apart they are.
+        Args:
+            img: PIL Image object
+            frame: PhotoFrame (or any object with the image settings attributes)
+            tolerance: Maximum mean absolute per-channel difference (0-255)
+        Returns:
+            dict with the mean/max difference and whether it is within tolerance
+        """
+        if not WAND_AVAILABLE:
+            raise RuntimeError("Wand is not available, cannot compare enhancement backends")
+        
+        original_backend = self.enhancement_backend
+        try:
+            self.enhancement_backend = 'pillow'
+            pillow_img = self.enhance_image(img.copy(), frame).convert('RGB')
+            self.enhancement_backend = 'wand'
+            wand_img = self.enhance_image(img.copy(), frame).convert('RGB')
+        finally:
+            self.enhancement_backend = original_backend
+        
+        if pillow_img.size != wand_img.size:
+            return {'within_tolerance': False, 'error': f"Size mismatch: {pillow_img.size} vs {wand_img.size}"}
+        
+        diff = np.abs(np.asarray(pillow_img, dtype=np.int16) - np.asarray(wand_img, dtype=np.int16))
+        mean_diff = float(diff.mean())
+        return {
+            'mean_abs_diff': round(mean_diff, 2),
+            'max_abs_diff': int(diff.max()),
+            'tolerance': tolerance,
+            'within_tolerance': mean_diff <= tolerance
+        }
+
+def contrast_stretch_points(contrast_factor):
+    """
+    Compute black/white points (fractions of pixels) for a contrast factor.
+    Returns:
+        (black_point, white_point) tuple
+    """
+    black_point = 0.10 * contrast_factor
+    white_point = 1.0 - (0.10 * contrast_factor)
+    # Ensure values stay in valid range
+    black_point = min(0.3, max(0.0, black_point))
+    white_point = max(0.7, min(1.0, white_point))
+    return black_point, white_point
+
+def contrast_stretch(img, black_point, white_point):
+    """
+    Per-channel histogram stretch, equivalent to Wand's contrast_stretch.
+    
+    Follows Wand's reading of the arguments: black_point * pixels are clipped
+    to 0, and Wand turns white_point into a count of pixels clipped from the
+    top (pixels - white_point * pixels), found by scanning the histogram down
+    from 255. Channels whose thresholds meet are left unchanged, as
+    ImageMagick does.
+    Args:
+        img: RGB PIL Image object
+        black_point: Fraction of pixels to clip to black (0.0-1.0)
+        white_point: 1.0 minus the fraction of pixels to clip to white (0.0-1.0)
+    Returns:
+        Stretched RGB PIL Image object
+    """
+    pixel_count = img.width * img.height
+    histogram = img.histogram()
+    black_count = black_point * pixel_count
+    white_count = pixel_count - white_point * pixel_count
+    lut = []
+    
+    for channel in range(3):
+        counts = np.asarray(histogram[channel * 256:(channel + 1) * 256])
+        # First level where the clipped-to-black count is reached from below...
+        low = min(int(np.searchsorted(np.cumsum(counts), black_count, side='left')), 255)
+        # ...and from above for the clipped-to-white count
+        high = 255 - min(int(np.searchsorted(np.cumsum(counts[::-1]), white_count, side='left')), 255)
+        
+        if high - low < 1:
+            # Flat channel (or thresholds crossed), nothing to stretch
+            lut.extend(range(256))
+            continue
+        
+        levels = (np.arange(256, dtype=np.float32) - low) * (255.0 / (high - low))
+        lut.extend(np.clip(np.rint(levels), 0, 255).astype(np.uint8).tolist())
+    
+    return img.point(lut)
+
+def modulate(img, brightness=100, saturation=100, hue=100):
+    """
+    Scale lightness/saturation and rotate hue in HSL space, like ImageMagick's modulate.
+    Args:
+        img: RGB PIL Image object
+        brightness: Lightness percentage (100 = unchanged)
+        saturation: Saturation percentage (100 = unchanged)
+        hue: Hue percentage (100 = unchanged, 0/200 = 180 degree rotation)
+    Returns:
+        Modulated RGB PIL Image object
+    """
+    rgb = np.asarray(img, dtype=np.float32) / 255.0
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    
+    # RGB -> HSL
+    maxc = rgb.max(axis=-1)
+    minc = rgb.min(axis=-1)
+    delta = maxc - minc
+    lightness = (maxc + minc) / 2.0
+    
+    chroma_mask = delta > 0
+    safe_delta = np.where(chroma_mask, delta, 1.0)
+    denom = 1.0 - np.abs(2.0 * lightness - 1.0)
+    sat = np.where(chroma_mask & (denom > 0), delta / np.where(denom > 0, denom, 1.0), 0.0)
+    
+    h = np.where(maxc == r, ((g - b) / safe_delta) % 6.0,
+        np.where(maxc == g, (b - r) / safe_delta + 2.0,
+                 (r - g) / safe_delta + 4.0))
+    h = np.where(chroma_mask, h / 6.0, 0.0)
+    
+    # Modulate
+    lightness = np.clip(lightness * (brightness / 100.0), 0.0, 1.0)
+    sat = np.clip(sat * (saturation / 100.0), 0.0, 1.0)
+    h = (h + (hue - 100) / 200.0) % 1.0
+    
+    # HSL -> RGB
+    c = (1.0 - np.abs(2.0 * lightness - 1.0)) * sat
+    h6 = h * 6.0
+    x = c * (1.0 - np.abs(h6 % 2.0 - 1.0))
+    m = lightness - c / 2.0
+    sector = np.floor(h6).astype(np.int8) % 6
+    zeros = np.zeros_like(c)
+    
+    r_out = np.choose(sector, [c, x, zeros, zeros, x, c])
+    g_out = np.choose(sector, [x, c, c, x, zeros, zeros])
+    b_out = np.choose(sector, [zeros, zeros, x, c, c, x])
+    
+    out = np.stack([r_out + m, g_out + m, b_out + m], axis=-1)
+    out = np.clip(np.rint(out * 255.0), 0, 255).astype(np.uint8)
+    return Image.fromarray(out, 'RGB')
+
+if __name__ == "__main__":
+    import sys
+    from types import SimpleNamespace
+    
+    if len(sys.argv) < 2:
+        print("Usage: python photo_processing.py <input_image_path> [contrast_factor] [saturation] [blue_adjustment]")
+        sys.exit(1)
+    
+    settings = SimpleNamespace(
+        id='cli',
+        contrast_factor=float(sys.argv[2]) if len(sys.argv) > 2 else 1.2,
+        saturation=int(sys.argv[3]) if len(sys.argv) > 3 else 120,
+        blue_adjustment=int(sys.argv[4]) if len(sys.argv) > 4 else 0,
+        padding=0,
+        color_map=None,
+        screen_resolution=None,
+        orientation='portrait'
+    )
+    
+    with Image.open(sys.argv[1]) as source:
+        result = PhotoProcessor().compare_backends(source.convert('RGB'), settings)
+    
+    print(f"Pillow vs Wand enhancement: {result}")
+    sys.exit(0 if result.get('within_tolerance') else 1)
@@ -0,0 +1,202 @@
+import logging
+
+from sqlalchemy import and_, or_
+
+import playlist_ordering
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+# Playlist playback cursor
+#
+# A frame's playlist entries keep the order the user gave them. Playback
+# position is tracked on the frame itself: the entry that was served last
+# (playlist_cursor_id), its order value when it was served
+# (playlist_cursor_order) and how many times playback has wrapped around the
+# playlist (playlist_epoch). The next entry is the first one that sorts after
+# the cursor by (order, id), wrapping to the start of the playlist.
+#
+# Advancing therefore only updates the frame row instead of rewriting the
+# order of every entry. These helpers take the session explicitly so they work
+# both with Flask-SQLAlchemy's db.session and with the private sessions of
+# background threads.
+# ------------------------------------------------------------------------------
+
+def _frame_entries(session, PlaylistEntry, frame):
+    """Query for a frame's playlist entries."""
+    return session.query(PlaylistEntry).filter(PlaylistEntry.frame_id == frame.id)
+
+def _sorted(query, PlaylistEntry, descending=False):
+    if descending:
+        return query.order_by(PlaylistEntry.order.desc(), PlaylistEntry.id.desc())
+    return query.order_by(PlaylistEntry.order, PlaylistEntry.id)
+
+def cursor_position(session, PlaylistEntry, frame):
+    """
+    Get the (order, id) position of the last served entry.
+
+    The cursor entry's current order is used when it still exists, so moving
+    it in the editor moves the playback position with it. If it was removed,
+    the order it had when it was served is used instead.
+
+    Returns:
+        tuple or None: (order, id), or None if playback hasn't started
+    """
+    if frame.playlist_cursor_id is not None:
+        entry = session.get(PlaylistEntry, frame.playlist_cursor_id)
+        if entry is not None and entry.frame_id == frame.id:
+            return (entry.order, entry.id)
+    if frame.playlist_cursor_order is not None:
+        return (frame.playlist_cursor_order, frame.playlist_cursor_id or 0)
+    return None
+
+def _after(PlaylistEntry, position):
+    order, entry_id = position
+    return or_(PlaylistEntry.order > order,
+               and_(PlaylistEntry.order == order, PlaylistEntry.id > entry_id))
+
+def _before(PlaylistEntry, position):
+    order, entry_id = position
+    return or_(PlaylistEntry.order < order,
+               and_(PlaylistEntry.order == order, PlaylistEntry.id < entry_id))
+
+def peek_next(session, PlaylistEntry, frame):
+    """
+    Get the entry that plays after the cursor, without moving it.
+
+    Returns:
+        tuple: (entry or None if the playlist is empty, wrapped) where wrapped
+            is True when playback starts over from the beginning
+    """
+    entries = _frame_entries(session, PlaylistEntry, frame)
+    position = cursor_position(session, PlaylistEntry, frame)
+    if position is not None:
+        entry = _sorted(entries.filter(_after(PlaylistEntry, position)), PlaylistEntry).first()
+        if entry is not None:
+            return entry, False
+    entry = _sorted(entries, PlaylistEntry).first()
+    return entry, entry is not None and position is not None
+
+def upcoming(session, PlaylistEntry, frame, count):
+    """
+    Get the next few entries in play order, without moving the cursor.
+
+    Returns:
+        list: Up to count entries (never repeating one), the next one first
+    """
+    entries = _frame_entries(session, PlaylistEntry, frame)
+    position = cursor_position(session, PlaylistEntry, frame)
+    if position is None:
+        return _sorted(entries, PlaylistEntry).limit(count).all()
+
+    result = _sorted(entries.filter(_after(PlaylistEntry, position)), PlaylistEntry).limit(count).all()
+    if len(result) < count:
+        # Wrap around to the start of the playlist, up to and including the cursor
+        wrapped = entries.filter(~_after(PlaylistEntry, position))
+        result += _sorted(wrapped, PlaylistEntry).limit(count - len(result)).all()
+    return result
+
+def peek_previous(session, PlaylistEntry, frame):
+    """Get the entry that played before the cursor, wrapping to the end of the playlist."""
+    entries = _frame_entries(session, PlaylistEntry, frame)
+    position = cursor_position(session, PlaylistEntry, frame)
+    if position is not None:
+        entry = _sorted(entries.filter(_before(PlaylistEntry, position)), PlaylistEntry, descending=True).first()
+        if entry is not None:
+            return entry
+    return _sorted(entries, PlaylistEntry, descending=True).first()
+
+def move_cursor(frame, entry, wrapped=None):
+    """
+    Point the cursor (and the frame's current photo) at an entry.
+
+    Args:
+        frame: PhotoFrame to update (the caller commits)
+        entry: PlaylistEntry being served
+        wrapped: True when playback went past the end of the playlist; None
+            works it out from the entry's position relative to the cursor
+    """
+    if wrapped is None:
+        wrapped = (frame.playlist_cursor_order is not None and
+                   (entry.order, entry.id) <= (frame.playlist_cursor_order, frame.playlist_cursor_id or 0))
+    frame.playlist_cursor_id = entry.id
+    frame.playlist_cursor_order = entry.order
+    frame.current_photo_id = entry.photo_id
+    if wrapped:
+        frame.playlist_epoch = (frame.playlist_epoch or 0) + 1
+
+def advance(session, PlaylistEntry, frame):
+    """
+    Move the cursor to the next entry. Only the frame row is modified.
+
+    Returns:
+        PlaylistEntry or None if the playlist is empty
+    """
+    entry, wrapped = peek_next(session, PlaylistEntry, frame)
+    if entry is not None:
+        move_cursor(frame, entry, wrapped)
+    return entry
+
+def rewind(session, PlaylistEntry, frame):
+    """
+    Move the cursor back to the previous entry.
+
+    Returns:
+        PlaylistEntry or None if the playlist is empty
+    """
+    entry = peek_previous(session, PlaylistEntry, frame)
+    if entry is not None:
+        move_cursor(frame, entry, wrapped=False)
+    return entry
+
+def reset_cursor(frame):
+    """Start playback over from the first entry (e.g. after the playlist was rebuilt)."""
+    frame.playlist_cursor_id = None
+    frame.playlist_cursor_order = None
+
+def play_order(entries, frame):
+    """
+    Arrange a frame's entries in the order they will be played.
+
+    Args:
+        entries: The frame's entries sorted by (order, id)
+        frame: PhotoFrame whose cursor is used
+
+    Returns:
+        list: Entries starting with the one that plays next
+    """
+    if frame.playlist_cursor_id is None and frame.playlist_cursor_order is None:
+        return list(entries)
+
+    position = None
+    for entry in entries:
+        if entry.id == frame.playlist_cursor_id:
+            position = (entry.order, entry.id)
+            break
+    if position is None:
+        position = (frame.playlist_cursor_order, frame.playlist_cursor_id or 0)
+
+    split = next((i for i, entry in enumerate(entries) if (entry.order, entry.id) > position), len(entries))
+    return list(entries[split:]) + list(entries[:split])
+
+def next_up_order(session, PlaylistEntry, frame):
+    """
+    Order value for an entry that should play next.
+
+    The value falls directly after the cursor, so no other entry is touched
+    (see playlist_ordering).
+
+    Returns:
+        int: Order value to give the entry that plays next
+    """
+    position = cursor_position(session, PlaylistEntry, frame)
+    return playlist_ordering.order_after(session, PlaylistEntry, position, frame_id=frame.id, frame=frame)
+
+def move_to_next_up(session, PlaylistEntry, frame, entry):
+    """Reposition an existing entry so it plays next."""
+    if entry.id == frame.playlist_cursor_id:
+        # Re-queuing what's on screen: put the cursor just in front of it
+        frame.playlist_cursor_id = None
+        frame.playlist_cursor_order = entry.order
+        return
+    entry.order = next_up_order(session, PlaylistEntry, frame)
@@ -0,0 +1,182 @@
+import logging
+
+from sqlalchemy import and_, or_
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+# Gap-based playlist ordering
+#
+# PlaylistEntry.order values are spaced ORDER_GAP apart instead of being
+# consecutive, so an entry can be inserted or moved between two neighbours by
+# giving it the midpoint of their orders - a single-row write. Only when two
+# neighbours have run out of room is the playlist renumbered (rebalanced),
+# which is rare enough to be amortized away; GenerationScheduler also
+# rebalances crowded playlists in the background.
+#
+# A playlist is either a frame's playlist (frame_id) or a custom playlist
+# (custom_playlist_id). Orders may be negative.
+# ------------------------------------------------------------------------------
+
+# Distance between neighbouring orders after a rebalance
+ORDER_GAP = 1024
+
+# Playlists with neighbours closer than this are rebalanced in the background
+MIN_GAP = ORDER_GAP // 32
+
+def _scope(PlaylistEntry, frame_id=None, custom_playlist_id=None):
+    """Filter selecting the entries of one playlist."""
+    if custom_playlist_id is not None:
+        return PlaylistEntry.custom_playlist_id == custom_playlist_id
+    return PlaylistEntry.frame_id == frame_id
+
+def order_between(before, after):
+    """
+    Pick an order value between two neighbours.
+
+    Args:
+        before: Order of the entry in front (None at the start of the playlist)
+        after: Order of the entry behind (None at the end of the playlist)
+
+    Returns:
+        int or None if there is no room left between them
+    """
+    if before is None and after is None:
+        return 0
+    if before is None:
+        return after - ORDER_GAP
+    if after is None:
+        return before + ORDER_GAP
+    if after - before < 2:
+        return None
+    return (before + after) // 2
+
+def order_at_end(session, PlaylistEntry, frame_id=None, custom_playlist_id=None):
+    """Order value that appends an entry to the end of a playlist."""
+    last = (session.query(PlaylistEntry.order)
+            .filter(_scope(PlaylistEntry, frame_id, custom_playlist_id))
+            .order_by(PlaylistEntry.order.desc())
+            .limit(1).scalar())
+    return order_between(last, None)
+
+def order_after(session, PlaylistEntry, position, frame_id=None, custom_playlist_id=None, frame=None):
+    """
+    Order value for an entry inserted directly after a position.
+
+    Args:
+        session: SQLAlchemy session
+        PlaylistEntry: PlaylistEntry model
+        position: (order, id) to insert after, or None to insert at the start
+        frame_id / custom_playlist_id: Playlist to insert into
+        frame: The PhotoFrame when inserting into a frame playlist, so its
+            playback cursor is kept in place if a rebalance is needed
+
+    Returns:
+        int: Order for the new entry (the playlist is rebalanced first when the
+            neighbours have no room between them)
+    """
+    scope = _scope(PlaylistEntry, frame_id, custom_playlist_id)
+    for attempt in range(2):
+        query = session.query(PlaylistEntry.order).filter(scope)
+        if position is not None:
+            order, entry_id = position
+            query = query.filter(or_(PlaylistEntry.order > order,
+                                     and_(PlaylistEntry.order == order, PlaylistEntry.id > entry_id)))
+        following = query.order_by(PlaylistEntry.order, PlaylistEntry.id).limit(1).scalar()
+
+        slot = order_between(position[0] if position is not None else None, following)
+        if slot is not None or attempt:
+            break
+
+        # No room between the neighbours: renumber, then find the position again
+        remap = rebalance(session, PlaylistEntry, frame_id, custom_playlist_id, frame=frame)
+        if position is not None:
+            position = (remap(*position), position[1])
+
+    if slot is None:
+        # Unreachable after a rebalance unless orders are corrupt; fall back to appending
+        slot = order_at_end(session, PlaylistEntry, frame_id, custom_playlist_id)
+    return slot
+
+def move_between(session, PlaylistEntry, entry, before, after, frame=None):
+    """
+    Move one entry between two neighbours by rewriting only its own order.
+
+    Args:
+        entry: PlaylistEntry to move
+        before: Entry it should follow (None for the start of the playlist)
+        after: Entry it should precede (None for the end of the playlist)
+        frame: The entry's PhotoFrame for frame playlists (see order_after)
+    """
+    slot = order_between(before.order if before is not None else None,
+                         after.order if after is not None else None)
+    if slot is None:
+        rebalance(session, PlaylistEntry, entry.frame_id if entry.custom_playlist_id is None else None,
+                  entry.custom_playlist_id, frame=frame)
+        slot = order_between(before.order if before is not None else None,
+                             after.order if after is not None else None)
+    entry.order = slot
+
+def rebalance(session, PlaylistEntry, frame_id=None, custom_playlist_id=None, frame=None):
+    """
+    Renumber a playlist so neighbouring orders are ORDER_GAP apart.
+
+    The current (order, id) sequence is kept. If a frame is given, the order
+    stored with its playback cursor is translated too.
+
+    Returns:
+        callable: Maps an order value from before the rebalance to one that
+            sits at the same place in the renumbered playlist
+    """
+    entries = (session.query(PlaylistEntry)
+               .filter(_scope(PlaylistEntry, frame_id, custom_playlist_id))
+               .order_by(PlaylistEntry.order, PlaylistEntry.id)
+               .all())
+    old_positions = [(entry.order, entry.id) for entry in entries]
+    for index, entry in enumerate(entries):
+        entry.order = index * ORDER_GAP
+
+    def remap(order, entry_id=None):
+        # Positions of existing entries map exactly; others land just before the next entry
+        if entry_id is not None:
+            for index, position in enumerate(old_positions):
+                if position == (order, entry_id):
+                    return index * ORDER_GAP
+        following = next((i for i, position in enumerate(old_positions) if position[0] > order), len(old_positions))
+        return following * ORDER_GAP - 1
+
+    if frame is not None and frame.playlist_cursor_order is not None:
+        frame.playlist_cursor_order = remap(frame.playlist_cursor_order, frame.playlist_cursor_id)
+
+    logger.info(f"Rebalanced {len(entries)} playlist entries "
+                f"({'custom playlist ' + str(custom_playlist_id) if custom_playlist_id is not None else 'frame ' + str(frame_id)})")
+    return remap
+
+def is_crowded(orders):
+    """Check whether any neighbours in a sorted list of orders are closer than MIN_GAP."""
+    return any(b - a < MIN_GAP for a, b in zip(orders, orders[1:]))
+
+def rebalance_crowded_playlists(session, PlaylistEntry, PhotoFrame):
+    """
+    Rebalance every playlist whose entries have run short of room.
+
+    Returns:
+        int: Number of playlists rebalanced (the caller commits)
+    """
+    rebalanced = 0
+    rows = (session.query(PlaylistEntry.frame_id, PlaylistEntry.custom_playlist_id, PlaylistEntry.order)
+            .order_by(PlaylistEntry.frame_id, PlaylistEntry.custom_playlist_id, PlaylistEntry.order)
+            .all())
+
+    playlists = {}
+    for frame_id, custom_playlist_id, order in rows:
+        key = (None, custom_playlist_id) if custom_playlist_id is not None else (frame_id, None)
+        playlists.setdefault(key, []).append(order)
+
+    for (frame_id, custom_playlist_id), orders in playlists.items():
+        if not is_crowded(sorted(orders)):
+            continue
+        frame = session.get(PhotoFrame, frame_id) if frame_id is not None else None
+        rebalance(session, PlaylistEntry, frame_id, custom_playlist_id, frame=frame)
+        rebalanced += 1
+    return rebalanced
@@ -0,0 +1,153 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+class PrerenderWorker:
+    """
+    Renders each frame's upcoming photo into the render cache shortly before
+    the frame wakes up.
+
+    Physical frames report when they will next wake (next_wake_time) and,
+    unless shuffle is enabled, the playlist order tells us exactly which photo
+    /api/next_photo will serve. Rendering that photo ahead of time means the
+    request itself is a cache hit and battery-powered frames spend less time
+    with their radio on.
+    """
+
+    def __init__(self, app, db, models, peek_next_entry, warm_render_cache,
+                 lead_seconds=120, check_interval=15, skip_sync_groups=False):
+        """
+        Initialize the pre-render worker.
+
+        Args:
+            app: Flask application instance
+            db: SQLAlchemy database instance
+            models: Dictionary containing database models
+            peek_next_entry: Callable(frame) returning the entry the frame will be
+                served next, or None when it cannot be predicted
+            warm_render_cache: Callable(frame, photo) that renders a photo into the
+                render cache and returns the number of variants rendered
+            lead_seconds: How long before a frame's wake time to render its next photo
+            check_interval: Seconds between scans of the frame list
+            skip_sync_groups: Leave frames in sync groups to the sync group
+                renderer, which renders each group in one batch
+        """
+        self.app = app
+        self.db = db
+        self.PhotoFrame = models['PhotoFrame']
+        self.peek_next_entry = peek_next_entry
+        self.warm_render_cache = warm_render_cache
+        self.lead_seconds = lead_seconds
+        self.check_interval = check_interval
+        self.skip_sync_groups = skip_sync_groups
+
+        self.running = False
+        self.thread = None
+        self._wake_event = threading.Event()
+
+        self.stats = {
+            'renders': 0,
+            'already_cached': 0,
+            'skipped_unpredictable': 0,
+            'errors': 0,
+            'last_run': None
+        }
+
+        logger.debug("Pre-render worker initialized")
+
+    def start(self):
+        """Start the background pre-render thread."""
+        if self.running:
+            logger.debug("Pre-render worker is already running")
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self._worker_thread, daemon=True)
+        self.thread.start()
+        logger.info(f"Pre-render worker started (lead time {self.lead_seconds}s)")
+
+    def stop(self):
+        """Stop the background thread."""
+        if not self.running:
+            return
+
+        self.running = False
+        self._wake_event.set()
+        if self.thread:
+            self.thread.join(timeout=5.0)
+            logger.info("Pre-render worker stopped")
+
+    def trigger(self):
+        """Run a scan now instead of waiting for the next interval (e.g. after a playlist edit)."""
+        self._wake_event.set()
+
+    def get_stats(self):
+        """Return worker statistics for diagnostics."""
+        return dict(self.stats, running=self.running, lead_seconds=self.lead_seconds)
+
+    def _worker_thread(self):
+        """Background loop that scans frames for upcoming wakes."""
+        while self.running:
+            try:
+                with self.app.app_context():
+                    try:
+                        self._check_frames()
+                    finally:
+                        # Release the thread-local session so we never hold stale rows
+                        self.db.session.remove()
+            except Exception as e:
+                logger.error(f"Error in pre-render thread: {str(e)}", exc_info=True)
+
+            self._wake_event.wait(self.check_interval)
+            self._wake_event.clear()
+
+    def _ensure_aware(self, dt):
+        """Treat naive datetimes as UTC."""
+        if dt.tzinfo is None or dt.tzinfo.utcoffset(dt) is None:
+            return dt.replace(tzinfo=timezone.utc)
+        return dt
+
+    def _check_frames(self):
+        """Render the next photo of every frame that wakes within the lead time."""
+        now = datetime.now(timezone.utc)
+        self.stats['last_run'] = now.isoformat()
+
+        query = self.PhotoFrame.query.filter(
+            self.PhotoFrame.next_wake_time.isnot(None),
+            self.PhotoFrame.frame_type != 'virtual'
+        )
+        if self.skip_sync_groups:
+            query = query.filter(self.PhotoFrame.sync_group_id.is_(None))
+        frames = query.all()
+
+        for frame in frames:
+            time_until_wake = (self._ensure_aware(frame.next_wake_time) - now).total_seconds()
+
+            # Not due soon enough yet
+            if time_until_wake > self.lead_seconds:
+                continue
+
+            # A frame that missed its wake by more than a full interval is probably
+            # offline; don't keep re-rendering for it every time overlay inputs change
+            grace = max(timedelta(minutes=frame.sleep_interval or 0), timedelta(minutes=10))
+            if time_until_wake < -grace.total_seconds():
+                continue
+
+            try:
+                entry = self.peek_next_entry(frame)
+                if entry is None or entry.photo is None:
+                    self.stats['skipped_unpredictable'] += 1
+                    continue
+
+                rendered = self.warm_render_cache(frame, entry.photo)
+                if rendered:
+                    self.stats['renders'] += rendered
+                    logger.info(f"Pre-rendered photo {entry.photo_id} for frame {frame.id} "
+                                f"({time_until_wake:.0f}s before wake)")
+                else:
+                    self.stats['already_cached'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Error pre-rendering for frame {frame.id}: {str(e)}", exc_info=True)
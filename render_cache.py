@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the rendering pipeline changes in a way that alters its output,
+# so stale renders from a previous version are never served.
+RENDER_PIPELINE_VERSION = 1
+
+class RenderCache:
+    """
+    Persistent, size-bounded cache of fully rendered frame images.
+
+    Entries are content-addressed: the key is a hash of everything that can
+    influence the rendered bytes (photo, frame image settings, overlay inputs
+    and output type), so a cache hit is always safe to serve as-is. Files are
+    stored on disk and evicted least-recently-used first once the total size
+    exceeds the configured budget.
+    """
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        """
+        Initialize the render cache.
+
+        Args:
+            cache_dir: Directory where rendered files are stored
+            max_bytes: Size budget for all cached files, in bytes
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+        logger.info(f"Render cache initialized at {self.cache_dir} with {len(self._entries)} entries "
+                    f"({self._total_bytes / (1024 * 1024):.1f} MB of {self.max_bytes / (1024 * 1024):.0f} MB)")
+
+    @staticmethod
+    def make_key(*parts):
+        """
+        Build a cache key from arbitrary JSON-serializable parts.
+
+        Returns:
+            str: Hex digest identifying the render inputs
+        """
+        payload = json.dumps([RENDER_PIPELINE_VERSION, *parts], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.bin")
+
+    def _load_index(self):
+        """Rebuild the in-memory LRU index from the files already on disk."""
+        try:
+            files = []
+            for filename in os.listdir(self.cache_dir):
+                if not filename.endswith('.bin'):
+                    continue
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, filename[:-4], stat.st_size))
+
+            # Oldest files first so they are the first to be evicted
+            for _, key, size in sorted(files):
+                self._entries[key] = size
+                self._total_bytes += size
+            self._evict()
+        except Exception as e:
+            logger.error(f"Error loading render cache index: {e}")
+
+    def get(self, key):
+        """
+        Return the cached bytes for a key, or None on a miss.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+        except OSError:
+            # File vanished underneath us; drop the index entry
+            with self._lock:
+                size = self._entries.pop(key, None)
+                if size is not None:
+                    self._total_bytes -= size
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        logger.debug(f"Render cache hit for {key[:12]}")
+        return data
+
+    def contains(self, key):
+        """
+        Check whether a key is cached without reading it or touching the LRU order.
+        """
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, data):
+        """
+        Store rendered bytes under a key, evicting old entries if over budget.
+        """
+        if len(data) > self.max_bytes:
+            logger.debug(f"Render of {len(data)} bytes exceeds cache budget, not caching")
+            return
+
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing render cache entry {key[:12]}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def set_max_bytes(self, max_bytes):
+        """Change the size budget, evicting right away if the cache is now over it."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until within the size budget. Caller holds the lock."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            logger.debug(f"Evicted render cache entry {key[:12]} ({size} bytes)")
+
+    def clear(self):
+        """Remove every cached render."""
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._total_bytes = 0
+        logger.info("Render cache cleared")
+
+    def stats(self):
+        """Return cache statistics for diagnostics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
@@ -0,0 +1,249 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Collapses concurrent work on the same key into one execution.
+
+    The first caller for a key (the leader) does the work; callers arriving
+    while it runs wait for and share its result instead of repeating it. Used
+    around render cache misses, so frames of a sync group waking in the same
+    second, or a frame request racing the pre-renderer, render each output
+    only once.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'leaders': 0, 'shared': 0}
+
+    def begin(self, key):
+        """
+        Claim a key.
+
+        Returns:
+            tuple: (call, is_leader). A leader must call finish() for the key;
+                others wait() on the call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.stats['shared'] += 1
+                return call, False
+            call = self._calls[key] = self._Call()
+            self.stats['leaders'] += 1
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        """Publish the leader's result (or exception) to everyone waiting on the key."""
+        call.result, call.error = result, error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
+
+    @staticmethod
+    def wait(call, timeout=None):
+        """
+        Wait for a leader's result.
+
+        Raises:
+            The leader's exception, or TimeoutError if it didn't finish in time
+        """
+        if not call.done.wait(timeout):
+            raise TimeoutError('Timed out waiting for a shared render')
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key, fn, timeout=None):
+        """Run fn() for a key unless the same key is already running, and return its result."""
+        call, leader = self.begin(key)
+        if not leader:
+            return self.wait(call, timeout)
+        try:
+            result = fn()
+        except Exception as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result=result)
+        return result
+
+    def get_stats(self):
+        """Return single-flight statistics for diagnostics."""
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._calls))
+
+class SyncGroupRenderer:
+    """
+    Renders the upcoming photos of every sync group's frames in one batch,
+    shortly before the group's next boundary.
+
+    Members of a sync group sleep until the same epoch boundary
+    (SyncGroup.get_next_sync_time), so they all request their next image in
+    the same second. Rendering them together ahead of time turns that burst
+    into render cache hits, and lets members that show the same photo share
+    one decode of the source. Requests arriving while the batch still runs
+    wait for it through the single-flight instead of rendering again.
+    """
+
+    def __init__(self, app, db, models, peek_next_entry, warm_render_batch,
+                 lead_seconds=90, check_interval=30):
+        """
+        Initialize the sync group renderer.
+
+        Args:
+            app: Flask application instance
+            db: SQLAlchemy database instance
+            models: Dictionary containing database models (SyncGroup)
+            peek_next_entry: Callable(frame) returning the entry the frame will be
+                served next, or None when it cannot be predicted
+            warm_render_batch: Callable(list of (frame, photo)) that renders the
+                photos into the render cache and returns the number of variants rendered
+            lead_seconds: How long before a boundary to render the group
+            check_interval: Longest sleep between checks (picks up new groups and
+                interval changes)
+        """
+        self.app = app
+        self.db = db
+        self.SyncGroup = models['SyncGroup']
+        self.peek_next_entry = peek_next_entry
+        self.warm_render_batch = warm_render_batch
+        self.lead_seconds = lead_seconds
+        self.check_interval = check_interval
+
+        self.running = False
+        self.thread = None
+        self._wake_event = threading.Event()
+
+        self.stats = {
+            'batches': 0,
+            'frames': 0,
+            'renders': 0,
+            'skipped_unpredictable': 0,
+            'errors': 0,
+            'last_batch_seconds': None
+        }
+
+        logger.debug("Sync group renderer initialized")
+
+    def start(self):
+        """Start the background thread."""
+        if self.running:
+            logger.debug("Sync group renderer is already running")
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self._worker_thread, daemon=True)
+        self.thread.start()
+        logger.info(f"Sync group renderer started (lead time {self.lead_seconds}s)")
+
+    def stop(self):
+        """Stop the background thread."""
+        if not self.running:
+            return
+
+        self.running = False
+        self._wake_event.set()
+        if self.thread:
+            self.thread.join(timeout=5.0)
+            logger.info("Sync group renderer stopped")
+
+    def trigger(self):
+        """Check the groups now instead of waiting for the next interval (e.g. after a playlist edit)."""
+        self._wake_event.set()
+
+    def get_stats(self):
+        """Return renderer statistics for diagnostics."""
+        return dict(self.stats, running=self.running, lead_seconds=self.lead_seconds)
+
+    def _worker_thread(self):
+        """Background loop that renders each group's batch as its boundary approaches."""
+        while self.running:
+            wait = self.check_interval
+            try:
+                with self.app.app_context():
+                    try:
+                        wait = min(wait, self._check_groups())
+                    finally:
+                        # Release the thread-local session so we never hold stale rows
+                        self.db.session.remove()
+            except Exception as e:
+                logger.error(f"Error in sync group render thread: {str(e)}", exc_info=True)
+
+            self._wake_event.wait(max(wait, 1))
+            self._wake_event.clear()
+
+    def _check_groups(self):
+        """
+        Render every group whose boundary is within the lead time.
+
+        Returns:
+            float: Seconds until the next group becomes due
+        """
+        now = datetime.now(timezone.utc)
+        next_due = self.check_interval
+
+        for group in self.SyncGroup.query.all():
+            members = [frame for frame in group.frames if frame.frame_type != 'virtual']
+            if not members:
+                continue
+
+            boundary = group.get_next_sync_time()
+            if boundary.tzinfo is None:
+                boundary = boundary.replace(tzinfo=timezone.utc)
+            until_boundary = (boundary - now).total_seconds()
+
+            # Stay clear of the previous boundary: members must have fetched
+            # their current photo before the next one can be predicted
+            lead = min(self.lead_seconds, (group.sleep_interval or 0) * 60 / 2)
+            if until_boundary > lead:
+                next_due = min(next_due, until_boundary - lead)
+                continue
+
+            # Checked again on every pass inside the window; outputs already
+            # cached are skipped, so playlist edits made meanwhile are still covered
+            self._render_group(group, members, until_boundary)
+
+        return next_due
+
+    def _render_group(self, group, members, until_boundary):
+        """Render the next photo of every member of a group in one batch."""
+        pairs = []
+        for frame in members:
+            entry = self.peek_next_entry(frame)
+            if entry is None or entry.photo is None:
+                self.stats['skipped_unpredictable'] += 1
+                continue
+            pairs.append((frame, entry.photo))
+        if not pairs:
+            return
+
+        start_time = time.time()
+        try:
+            rendered = self.warm_render_batch(pairs)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error rendering sync group {group.id}: {str(e)}", exc_info=True)
+            return
+
+        if not rendered:
+            return
+
+        elapsed = time.time() - start_time
+        self.stats['batches'] += 1
+        self.stats['frames'] += len(pairs)
+        self.stats['renders'] += rendered
+        self.stats['last_batch_seconds'] = round(elapsed, 3)
+        logger.info(f"Rendered {rendered} outputs for {len(pairs)} frames of sync group {group.name} "
+                    f"in {elapsed:.1f}s ({until_boundary:.0f}s before the boundary)")
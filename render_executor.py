@@ -0,0 +1,303 @@
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+from PIL import Image
+
+from imgToArray import img_to_array
+from photo_processing import PhotoProcessor, decode_for_size, snapshot_decode_stats, merge_decode_stats
+
+logger = logging.getLogger(__name__)
+
+class RenderTimeoutError(Exception):
+    """Raised when a render job does not finish within the executor timeout."""
+    pass
+
+# ------------------------------------------------------------------------------
+# Worker functions
+#
+# These run inside the pool processes. They only receive plain, picklable data
+# (paths, dicts of frame settings, raw pixel buffers) - never ORM objects.
+# ------------------------------------------------------------------------------
+
+def image_to_payload(img):
+    """Flatten a PIL image into a picklable (mode, size, bytes) tuple."""
+    if img.mode not in ('RGB', 'RGBA', 'L'):
+        img = img.convert('RGB')
+    return (img.mode, img.size, img.tobytes())
+
+def image_from_payload(payload):
+    """Rebuild a PIL image from image_to_payload output."""
+    mode, size, data = payload
+    return Image.frombytes(mode, size, data)
+
+def _encode(img, output, orientation):
+    """Produce the requested output from a rendered image."""
+    if output == 'raw':
+        return image_to_payload(img)
+    if output == 'compressed':
+        return img_to_array(img, orientation)
+
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    img_io = io.BytesIO()
+    img.save(img_io, 'JPEG')
+    return img_io.getvalue()
+
+def _decodes_reduced(job):
+    """Whether a job's output is resized downstream, so its source can be decoded reduced."""
+    return job['enhance'] or job['output'] == 'compressed'
+
+def _decode_source(job):
+    """Decode a job's source image the way its output needs."""
+    if _decodes_reduced(job):
+        # The image is resized downstream, so large sources can be decoded reduced
+        return decode_for_size(job['source_path'], job.get('target_size') or (1200, 1600))
+    # Served at its stored size; decode in full
+    with Image.open(job['source_path']) as source:
+        return source.copy()
+
+def _render_decoded(img, job):
+    """Enhance and encode an already decoded source image."""
+    if job['enhance']:
+        processor = PhotoProcessor()
+        processor.enhancement_backend = job['enhancement_backend']
+        img = processor.enhance_image(img, SimpleNamespace(**job['frame']))
+
+    return _encode(img, job['output'], job['orientation'])
+
+def render_job(job):
+    """
+    Load and enhance a photo, then encode it.
+
+    Args:
+        job: dict with source_path, frame (plain image settings), enhance,
+            enhancement_backend, output ('raw', 'compressed' or 'jpeg') and orientation
+    Returns:
+        bytes for 'compressed'/'jpeg', or an image payload tuple for 'raw'
+    """
+    return _render_decoded(_decode_source(job), job)
+
+def render_batch_job(jobs):
+    """
+    Render several jobs that read the same source file, decoding it only once.
+
+    The jobs must share source_path and target_size, so every output is
+    identical to what render_job would produce for it.
+
+    Returns:
+        list: One render_job result per job, in order
+    """
+    decoded = {}
+    results = []
+    for job in jobs:
+        mode = _decodes_reduced(job)
+        if mode not in decoded:
+            decoded[mode] = _decode_source(job)
+        # Enhancement and encoding may modify the image, so each job gets its own copy
+        results.append(_render_decoded(decoded[mode].copy(), job))
+    return results
+
+def encode_job(job):
+    """
+    Encode an already rendered image (e.g. after overlays were applied).
+
+    Args:
+        job: dict with image (payload tuple), output and orientation
+    """
+    return _encode(image_from_payload(job['image']), job['output'], job['orientation'])
+
+def derivatives_job(image_path, thumbnail_path, normalize_original):
+    """Decode an uploaded photo once and create its thumbnail, portrait and landscape versions."""
+    return PhotoProcessor().generate_derivatives(image_path, thumbnail_path, normalize_original)
+
+def _noop():
+    return os.getpid()
+
+def _pool_context(fork):
+    """
+    Multiprocessing context for a worker pool.
+
+    Fork keeps worker start-up cheap (the children inherit the already imported
+    imaging modules) but is only used while the process has a single thread.
+    Pools created later, e.g. after a timeout restarted the pool, use a
+    forkserver: a single-threaded helper process that imports the modules once
+    and forks the workers.
+    """
+    methods = ('fork',) if fork else ('forkserver', 'spawn')
+    for method in methods:
+        try:
+            context = multiprocessing.get_context(method)
+        except ValueError:
+            continue
+        if method == 'forkserver':
+            context.set_forkserver_preload(['__main__', 'render_executor'])
+        return context
+    return None
+
+def _call_with_stats(fn, *args):
+    """Run a worker function and return its result with the decode counters it added."""
+    before = snapshot_decode_stats()
+    result = fn(*args)
+    after = snapshot_decode_stats()
+    return result, {key: after[key] - before[key] for key in after}
+
+# ------------------------------------------------------------------------------
+# Executor
+# ------------------------------------------------------------------------------
+
+class RenderExecutor:
+    """
+    Runs CPU-bound image work (decode, resize, enhancement, quantization,
+    encoding) in a pool of worker processes so concurrent renders are not
+    serialized by the GIL of the Flask process.
+
+    Jobs that time out terminate the pool so a wedged worker can't hold a slot
+    forever; jobs of other requests caught in that restart are retried on the
+    new pool. If the pool breaks otherwise, jobs fall back to running in-process.
+    """
+
+    def __init__(self, max_workers=None, timeout=60):
+        """
+        Initialize the render executor.
+
+        Args:
+            max_workers: Number of worker processes (None = number of CPU cores,
+                0 = run everything in-process)
+            timeout: Seconds to wait for a single job before giving up
+        """
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.timeout = timeout
+        self._pool = None
+        self._lock = threading.Lock()
+        self.stats = {
+            'jobs': 0,
+            'inline_jobs': 0,
+            'retried_jobs': 0,
+            'timeouts': 0,
+            'pool_restarts': 0,
+            'total_seconds': 0.0
+        }
+        logger.info(f"Render executor configured with {self.max_workers} worker processes (timeout {self.timeout}s)")
+
+    def _get_pool(self, fork=False):
+        """
+        Return the process pool, creating it on first use.
+
+        Args:
+            fork: Fork the workers straight from this process. Only safe while
+                no other threads exist (start() at server startup): a child forked
+                from a threaded process can inherit a lock another thread held
+                (logging, the SQLAlchemy pool) and deadlock on it.
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=_pool_context(fork))
+            return self._pool
+
+    def start(self):
+        """Start the worker processes now (before other threads exist) instead of on the first job."""
+        if self.max_workers > 0:
+            self._get_pool(fork=True).submit(_noop).result()
+
+    def _reset_pool(self, pool, terminate=False):
+        """Discard a pool if it is still the current one; a new one is created on the next job."""
+        with self._lock:
+            if self._pool is not pool:
+                # Another job already replaced it
+                return
+            self._pool = None
+        if terminate:
+            # A timed-out job may be stuck; kill the workers rather than wait for them
+            for process in list(getattr(pool, '_processes', {}).values()):
+                try:
+                    process.terminate()
+                except Exception:
+                    pass
+        pool.shutdown(wait=False, cancel_futures=True)
+        self.stats['pool_restarts'] += 1
+
+    def run(self, fn, *args):
+        """
+        Run a worker function in the pool and return its result.
+
+        Raises:
+            RenderTimeoutError: If the job doesn't finish within the timeout
+        """
+        return self.run_many(fn, [args])[0]
+
+    def run_many(self, fn, arg_list, timeout=None):
+        """
+        Run a worker function once per argument tuple, in parallel, and return
+        the results in order.
+
+        Args:
+            fn: Worker function
+            arg_list: One argument tuple per job
+            timeout: Seconds allowed for all jobs together (default: the executor timeout)
+
+        Raises:
+            RenderTimeoutError: If any job doesn't finish within the timeout
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start_time = time.time()
+        self.stats['jobs'] += len(arg_list)
+
+        if self.max_workers <= 0:
+            self.stats['inline_jobs'] += len(arg_list)
+            return [fn(*args) for args in arg_list]
+
+        deadline = start_time + timeout
+        for attempt in range(2):
+            pool = self._get_pool()
+            try:
+                futures = [pool.submit(_call_with_stats, fn, *args) for args in arg_list]
+                results = []
+                for future in futures:
+                    result, decode_stats = future.result(timeout=max(0, deadline - time.time()))
+                    merge_decode_stats(decode_stats)
+                    results.append(result)
+                break
+            except FutureTimeoutError:
+                self.stats['timeouts'] += 1
+                logger.error(f"Render job {fn.__name__} timed out after {timeout}s, restarting worker pool")
+                self._reset_pool(pool, terminate=True)
+                raise RenderTimeoutError(f"{fn.__name__} did not finish within {timeout} seconds")
+            except BrokenProcessPool as e:
+                if attempt == 0 and self._pool is not pool:
+                    # Another job's timeout restarted the pool under us; our jobs
+                    # weren't at fault, so run them again on the new pool
+                    self.stats['retried_jobs'] += len(arg_list)
+                    logger.info(f"Worker pool was restarted during {fn.__name__}, retrying on the new pool")
+                    continue
+                logger.error(f"Render worker pool is broken ({e}), running {fn.__name__} in-process")
+                self._reset_pool(pool)
+                self.stats['inline_jobs'] += len(arg_list)
+                results = [fn(*args) for args in arg_list]
+                break
+
+        self.stats['total_seconds'] += time.time() - start_time
+        return results
+
+    def get_stats(self):
+        """Return executor statistics for diagnostics."""
+        stats = dict(self.stats)
+        stats['max_workers'] = self.max_workers
+        stats['timeout'] = self.timeout
+        stats['total_seconds'] = round(stats['total_seconds'], 3)
+        return stats
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            logger.info("Render executor shut down")
@@ -7,6 +7,9 @@ import os
 import json
 import time  
 
+import playlist_cursor
+import playlist_ordering
+
 logger = logging.getLogger(__name__)
 
 class GenerationScheduler:
@@ -20,6 +23,7 @@ class GenerationScheduler:
         self.GenerationHistory = models['GenerationHistory']
         self.PlaylistEntry = models['PlaylistEntry']
         self.CustomPlaylist = models['CustomPlaylist']
+        self.PhotoFrame = models.get('PhotoFrame')
         
         self.scheduler = BackgroundScheduler()
         self.scheduler.start()   
@@ -52,6 +56,15 @@ class GenerationScheduler:
         )
         logger.info(f"Scheduled Immich auto-import job to run at {immich_start_time} and then every 60 minutes")
         
+        # Renumber playlists whose order gaps have run out, once a day
+        self.scheduler.add_job(
+            func=self.rebalance_playlists,
+            trigger='interval',
+            hours=24,
+            id='rebalance_playlists',
+            next_run_time=datetime.now() + timedelta(minutes=5)
+        )
+
         # Load and schedule all active generations
         self.load_scheduled_generations()
 
@@ -94,13 +107,14 @@ class GenerationScheduler:
                         self.db.session.query(self.PlaylistEntry)\
                             .filter_by(frame_id=schedule.frame_id)\
                             .delete()
+                        playlist_cursor.reset_cursor(schedule.frame)
 
                         # Add new entries
                         for order, entry in enumerate(valid_entries, 1):
                             new_entry = self.PlaylistEntry(
                                 frame_id=schedule.frame_id,
                                 photo_id=entry.photo_id,
-                                order=order
+                                order=order * playlist_ordering.ORDER_GAP
                             )
                             self.db.session.add(new_entry)
 
@@ -183,16 +197,11 @@ class GenerationScheduler:
                 self.db.session.add(photo)
                 self.db.session.commit()
 
-                # Shift all existing entries up by 1
-                self.db.session.query(self.PlaylistEntry)\
-                    .filter_by(frame_id=schedule.frame_id)\
-                    .update({self.PlaylistEntry.order: self.PlaylistEntry.order + 1})
-
-                # Insert new entry as first in playlist (order = 1)
+                # Insert new entry right after the frame's playback cursor so it shows next
                 playlist_entry = self.PlaylistEntry(
                     frame_id=schedule.frame_id,
                     photo_id=photo.id,
-                    order=1  # Always first position
+                    order=playlist_cursor.next_up_order(self.db.session, self.PlaylistEntry, schedule.frame)
                 )
                 self.db.session.add(playlist_entry)
 
@@ -280,6 +289,19 @@ class GenerationScheduler:
             'day_of_week': parts[4]
         }
 
+    def rebalance_playlists(self):
+        """Rebalance playlists whose entries are crowded together (see playlist_ordering)."""
+        with self.app.app_context():
+            try:
+                rebalanced = playlist_ordering.rebalance_crowded_playlists(
+                    self.db.session, self.PlaylistEntry, self.PhotoFrame)
+                self.db.session.commit()
+                if rebalanced:
+                    logger.info(f"Rebalanced {rebalanced} playlists")
+            except Exception as e:
+                self.db.session.rollback()
+                logger.error(f"Error rebalancing playlists: {e}")
+
     def check_network_locations_for_new_media(self):
         """Check network locations for new media and import to selected frames."""
         with self.app.app_context():
@@ -37,13 +37,29 @@ import pyheif       # Add HEIC/HEIF support
 # Local application imports
 from discovery import FrameDiscovery
 from photo_generation import PhotoGenerator
-from photo_processing import PhotoProcessor
+from photo_processing import (PhotoProcessor, ENHANCEMENT_BACKENDS, decode_for_size, get_decode_stats,
+                              extract_exif_from_image)
 from photo_analysis import PhotoAnalyzer
 from logger_config import setup_logger
 from scheduler import GenerationScheduler
 from integration_routes import integration_routes  # Blueprint for external integration routes
 from frame_timing_manager import FrameTimingManager
 from imgToArray import img_to_array # For e-paper compression
+from render_cache import RenderCache
+import db_tuning
+from prerender import PrerenderWorker
+from ingest_queue import IngestQueue
+import playlist_cursor
+import playlist_ordering
+import shuffle_bag
+import photo_listing
+import epaper_encoding
+from dashboard import DashboardLoader, DashboardFeed
+from event_stream import EventBroker
+from wake_scheduler import WakeScheduler
+from render_executor import (RenderExecutor, RenderTimeoutError, render_job, render_batch_job, encode_job,
+                             derivatives_job, image_to_payload, image_from_payload)
+from render_coordinator import SingleFlight, SyncGroupRenderer
 
 # Integration specific imports
 from integrations.mqtt_integration import MQTTIntegration
@@ -75,6 +91,8 @@ CONFIG_DIR = os.path.join(basedir, 'config')
 CREDENTIALS_DIR = os.path.join(basedir, 'credentials')
 INTEGRATIONS_DIR = os.path.join(basedir, 'integrations')
 OVERLAYS_DIR = os.path.join(INTEGRATIONS_DIR, 'overlays')
+RENDER_CACHE_DIR = os.path.join(basedir, 'cache', 'render')
+INGEST_STAGING_DIR = os.path.join(UPLOAD_FOLDER, 'ingest')
 
 # Ensure config directories exist
 os.makedirs(CONFIG_DIR, exist_ok=True)
@@ -101,7 +119,11 @@ logger = setup_logger()
 # ------------------------------------------------------------------------------
 # Flask Extensions Initialization
 # ------------------------------------------------------------------------------
+# WAL, busy timeout and a shared connection pool (see db_tuning)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_tuning.engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 db = SQLAlchemy(app)
+with app.app_context():
+    db_tuning.install_sqlite_pragmas(db.engine)
 
 # Register Blueprints
 app.register_blueprint(integration_routes)
@@ -115,7 +137,7 @@ class Photo(db.Model):
     portrait_version = db.Column(db.String(256))
     landscape_version = db.Column(db.String(256))
     thumbnail = db.Column(db.String(256))
-    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     heading = db.Column(db.Text)
     ai_description = db.Column(JSON)
     ai_analyzed_at = db.Column(db.DateTime)
@@ -146,6 +168,16 @@ class PhotoFrame(db.Model):
     deep_sleep_end = db.Column(db.Integer)   # Hour in UTC (0-23)
     frame_type = db.Column(db.String(20), default='physical') # 'physical' or 'virtual'
 
+    # Playback cursor: last served entry, its order when served and how often the playlist wrapped
+    playlist_cursor_id = db.Column(db.Integer)
+    playlist_cursor_order = db.Column(db.Integer)
+    playlist_epoch = db.Column(db.Integer, default=0)
+
+    # Shuffle bag: permutation of entry ids for the current cycle and how far into it we are
+    shuffle_bag = db.Column(JSON)
+    shuffle_position = db.Column(db.Integer, default=0)
+    shuffle_seed = db.Column(db.Integer)
+
     # Image settings
     contrast_factor = db.Column(db.Float, default=1.0)
     saturation = db.Column(db.Integer, default=100)
@@ -242,6 +274,13 @@ class PlaylistEntry(db.Model):
     date_added = db.Column(db.DateTime, default=datetime.utcnow)
     custom_playlist_id = db.Column(db.Integer, db.ForeignKey('custom_playlist.id'), nullable=True) # FK to CustomPlaylist
 
+    # Playlists are always read in (order, id) order per frame or custom playlist
+    __table_args__ = (
+        db.Index('ix_playlist_entry_frame_order', 'frame_id', 'order', 'id'),
+        db.Index('ix_playlist_entry_custom_order', 'custom_playlist_id', 'order', 'id'),
+        db.Index('ix_playlist_entry_photo_id', 'photo_id'),
+    )
+
     # Relationships defined via backref in PhotoFrame and CustomPlaylist
 
     def __repr__(self):
@@ -282,7 +321,7 @@ class ScheduledGeneration(db.Model):
 class GenerationHistory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     schedule_id = db.Column(db.Integer, db.ForeignKey('scheduled_generation.id'))
-    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     success = db.Column(db.Boolean, default=True)
     error_message = db.Column(db.Text)
     photo_id = db.Column(db.Integer, db.ForeignKey('photo.id')) # ID of the generated/added photo
@@ -295,6 +334,8 @@ class SyncGroup(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(256), nullable=False, unique=True)
     sleep_interval = db.Column(db.Float, default=5.0) # Default interval for the group
+    shuffle_seed = db.Column(db.Integer) # When set, member frames shuffle in the same order
+    shuffle_cycle = db.Column(db.Integer, default=0) # Shared shuffle cycle the members are dealing
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     frames = db.relationship('PhotoFrame', backref='sync_group', lazy=True)
@@ -320,6 +361,44 @@ class SyncGroup(db.Model):
         logger.debug(f"Group {self.id} sync calc: Base={base_time.isoformat()}, Interval={self.sleep_interval}m, NextSync={next_sync_naive_utc.isoformat()}Z")
         return next_sync_naive_utc
 
+class IngestJob(db.Model):
+    id = db.Column(db.String(32), primary_key=True) # uuid hex, returned to the uploader
+    status = db.Column(db.String(20), nullable=False, default='queued') # 'queued', 'running', 'done', 'failed'
+    stage = db.Column(db.String(50), default='queued') # Current step, e.g. 'transcoding'
+    progress = db.Column(db.Integer, default=0) # 0-100
+    original_filename = db.Column(db.String(256), nullable=False)
+    staged_path = db.Column(db.String(512)) # Uploaded file waiting to be processed
+    frame_id = db.Column(db.String(50)) # Playlist to add the photo to, if any
+    heading = db.Column(db.Text)
+    photo_id = db.Column(db.Integer, db.ForeignKey('photo.id'), nullable=True) # Set when done
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.progress,
+            'filename': self.original_filename,
+            'frame_id': self.frame_id,
+            'photo_id': self.photo_id,
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f"<IngestJob {self.id}: {self.original_filename} {self.status}>"
+
+# New playlist entries invalidate the frame's shuffle bag
+shuffle_bag.register_invalidation(PlaylistEntry, PhotoFrame)
+
 # ------------------------------------------------------------------------------
 # Global Variables & Initializations
 # ------------------------------------------------------------------------------
@@ -330,6 +409,10 @@ photo_processor = PhotoProcessor()
 photo_generator = PhotoGenerator(app.config['UPLOAD_FOLDER'])
 scheduler = None # Initialized in init_scheduler
 frame_timing_manager = None # Initialized in init_app
+dashboard_feed = None # Initialized in init_app
+prerender_worker = None # Initialized in init_app_services
+sync_group_renderer = None # Initialized in init_app_services
+ingest_queue = None # Initialized in init_app_services
 
 # Integrations (initialized in init_integrations or main block)
 weather_integration = None
@@ -375,7 +458,21 @@ def load_server_settings():
         'max_upload_size': 10,  # MB
         'discovery_port': ZEROCONF_PORT,
         'ai_analysis_enabled': False,
-        'dark_mode': False
+        'dark_mode': False,
+        'render_cache_size_mb': 256,
+        'enhancement_backend': 'pillow',
+        'prerender_enabled': True,
+        'prerender_lead_seconds': 120,
+        'sync_group_prerender_enabled': True,  # Render each sync group's frames in one batch before the boundary
+        'sync_group_prerender_lead_seconds': 90,
+        'render_workers': None,  # None = one per CPU core, 0 = render in-process
+        'render_timeout_seconds': 60,
+        'ingest_workers': 2,  # Uploads processed concurrently in the background
+        'dashboard_cache_seconds': 5,  # How long the frame dashboard's view model is reused
+        'dashboard_refresh_seconds': 60,  # How often open dashboards re-check time-based frame status
+        'wake_smoothing_enabled': False,  # Nudge non-grouped frames' wakes apart to spread render load
+        'wake_smoothing_tolerance_percent': 5,  # Largest nudge as a percentage of the sleep interval
+        'wake_smoothing_max_shift_seconds': 60  # ...and in seconds
     }
     try:
         if os.path.exists(SERVER_SETTINGS_FILE):
@@ -469,6 +566,45 @@ server_settings = load_server_settings()
 app.config['MAX_CONTENT_LENGTH'] = server_settings.get('max_upload_size', 10) * 1024 * 1024
 logging.getLogger().setLevel(server_settings.get('log_level', 'INFO'))
 
+# Select the image enhancement engine ('pillow' in-process, or 'wand' via ImageMagick)
+PhotoProcessor.enhancement_backend = server_settings.get('enhancement_backend', 'pillow')
+
+# Rendered frame images, keyed by photo + frame settings + overlay inputs
+render_cache = RenderCache(RENDER_CACHE_DIR, max_bytes=server_settings.get('render_cache_size_mb', 256) * 1024 * 1024)
+
+# Concurrent misses on the same render cache key share one render
+render_flights = SingleFlight()
+
+# Most renders of one source that warm_render_batch puts in a single executor
+# job (they share one decode but run one after another)
+RENDER_BATCH_MAX_JOBS = 4
+
+# Packed render (cache key) last delivered to each frame in delta mode, the
+# default base for its next delta update
+last_delivered_renders = {}
+
+# Worker processes for CPU-bound image work (decode, resize, enhance, encode)
+render_executor = RenderExecutor(
+    max_workers=server_settings.get('render_workers'),
+    timeout=server_settings.get('render_timeout_seconds', 60)
+)
+
+# Batched, briefly cached view model for the frame dashboard
+dashboard_loader = DashboardLoader(
+    db, {'PhotoFrame': PhotoFrame, 'Photo': Photo, 'PlaylistEntry': PlaylistEntry},
+    ttl=server_settings.get('dashboard_cache_seconds', 5)
+)
+
+# Server-Sent Events hub; browser frames receive their transitions from it
+event_broker = EventBroker()
+
+# Projected frame wakes per time slot, optionally used to spread wakes out
+wake_scheduler = WakeScheduler(
+    enabled=server_settings.get('wake_smoothing_enabled', False),
+    tolerance_percent=server_settings.get('wake_smoothing_tolerance_percent', 5),
+    max_shift_seconds=server_settings.get('wake_smoothing_max_shift_seconds', 60)
+)
+
 def init_scheduler():
     """Initialize the GenerationScheduler."""
     global scheduler
@@ -541,23 +677,67 @@ def cleanup_discovery_service():
 
 def init_app_services():
     """Initialize all necessary application services on startup."""
-    global frame_timing_manager
+    global frame_timing_manager, prerender_worker, sync_group_renderer, ingest_queue, dashboard_feed
     init_integrations() # Initialize weather, metadata, overlays etc.
     init_scheduler()    # Initialize and load scheduled jobs
 
     # Initialize frame timing manager
     if not frame_timing_manager:
         models = {'PhotoFrame': PhotoFrame, 'Photo': Photo, 'PlaylistEntry': PlaylistEntry}
-        frame_timing_manager = FrameTimingManager(app, db, models)
+        frame_timing_manager = FrameTimingManager(app, db, models, on_transition=publish_frame_transition)
         frame_timing_manager.start()
         logger.info("FrameTimingManager initialized and started.")
 
+    # Start tracking the wakes frames were last given
+    with app.app_context():
+        wake_scheduler.seed(db.session.query(PhotoFrame.id, PhotoFrame.next_wake_time)
+                            .filter(PhotoFrame.frame_type != 'virtual').all())
+
+    # Push frame changes to open dashboards
+    if not dashboard_feed:
+        dashboard_feed = DashboardFeed(app, dashboard_loader, event_broker,
+                                       refresh_interval=server_settings.get('dashboard_refresh_seconds', 60))
+        dashboard_feed.start()
+
+    # Render each sync group's next photos in one batch before its boundary
+    group_batching = (server_settings.get('prerender_enabled', True)
+                      and server_settings.get('sync_group_prerender_enabled', True))
+    if not sync_group_renderer and group_batching:
+        sync_group_renderer = SyncGroupRenderer(
+            app, db, {'SyncGroup': SyncGroup},
+            peek_next_entry=peek_next_entry,
+            warm_render_batch=warm_render_batch,
+            lead_seconds=server_settings.get('sync_group_prerender_lead_seconds', 90)
+        )
+        sync_group_renderer.start()
+
+    # Render each frame's next photo before it wakes
+    if not prerender_worker and server_settings.get('prerender_enabled', True):
+        prerender_worker = PrerenderWorker(
+            app, db, {'PhotoFrame': PhotoFrame},
+            peek_next_entry=peek_next_entry,
+            warm_render_cache=warm_render_cache,
+            lead_seconds=server_settings.get('prerender_lead_seconds', 120),
+            skip_sync_groups=bool(group_batching)
+        )
+        prerender_worker.start()
+
+    # Process uploads in the background (resumes jobs left over from the last run)
+    if not ingest_queue:
+        ingest_queue = IngestQueue(
+            app, db, {'IngestJob': IngestJob},
+            process_job=run_ingest_job,
+            staging_dir=INGEST_STAGING_DIR,
+            max_workers=server_settings.get('ingest_workers', 2)
+        )
+        ingest_queue.start()
+
     # Start discovery last
     start_discovery_service()
 
 def cleanup_app_services():
     """Cleanup services on application exit."""
-    global scheduler, frame_timing_manager, app
+    global scheduler, frame_timing_manager, prerender_worker, sync_group_renderer, ingest_queue, dashboard_feed, app
     logger.info("Shutting down application services...")
     cleanup_discovery_service()
     if scheduler:
@@ -566,6 +746,15 @@ def cleanup_app_services():
     if frame_timing_manager:
         frame_timing_manager.stop()
         logger.info("FrameTimingManager stopped.")
+    if prerender_worker:
+        prerender_worker.stop()
+    if sync_group_renderer:
+        sync_group_renderer.stop()
+    if dashboard_feed:
+        dashboard_feed.stop()
+    if ingest_queue:
+        ingest_queue.stop()
+    render_executor.shutdown()
     if hasattr(app, 'mqtt_integration') and app.mqtt_integration:
         app.mqtt_integration.stop()
         logger.info("MQTT Integration stopped.")
@@ -682,129 +871,8 @@ def calculate_sleep_interval(frame, current_time_utc=None):
 def extract_exif_metadata(image_path):
     """Extract EXIF metadata, handling various types and potential errors."""
     try:
-        logger.debug(f"Extracting EXIF from: {image_path}")
         with Image.open(image_path) as img:
-            exif_data = img._getexif()
-            if not exif_data:
-                # Create basic metadata using file modification time if EXIF is missing
-                mtime = os.path.getmtime(image_path)
-                upload_time = datetime.fromtimestamp(mtime, tz=timezone.utc)
-                formatted_time_utc = upload_time.strftime('%Y:%m:%d %H:%M:%S')
-                metadata = {
-                    'DateTime': formatted_time_utc,
-                    'DateTimeOriginal': formatted_time_utc,
-                    'DateTimeDigitized': formatted_time_utc,
-                    'SourceFileInfo': {'FileModifyDate': upload_time.isoformat()},
-                    # Add formatted date/time based on server settings later if needed
-                }
-                logger.info(f"No EXIF found for {os.path.basename(image_path)}, using file modify time.")
-                return metadata
-
-            metadata = {}
-            for tag_id, value in exif_data.items():
-                tag_name = ExifTags.TAGS.get(tag_id, str(tag_id))
-
-                if isinstance(value, bytes):
-                    # Attempt to decode bytes, replace errors
-                    try:
-                        metadata[tag_name] = value.decode('utf-8', errors='replace').strip()
-                    except Exception:
-                         metadata[tag_name] = repr(value) # Fallback to repr
-                elif isinstance(value, tuple) and len(value) > 0 and isinstance(value[0], int):
-                     # Handle rational numbers typically stored as (numerator, denominator) tuples
-                     if len(value) == 2 and value[1] != 0:
-                          try:
-                               metadata[tag_name] = float(value[0]) / float(value[1])
-                          except ZeroDivisionError:
-                               metadata[tag_name] = 0.0
-                          except TypeError: # Handle cases where tuple elements are not numbers
-                               metadata[tag_name] = str(value)
-                     else:
-                         # Store other integer tuples as lists
-                         metadata[tag_name] = list(value)
-                elif isinstance(value, (int, float, str, bool)) or value is None:
-                     metadata[tag_name] = value
-                else:
-                     # Fallback for other non-serializable types
-                     try:
-                        json.dumps(value) # Test serializability
-                        metadata[tag_name] = value
-                     except (TypeError, OverflowError):
-                        metadata[tag_name] = str(value)
-
-            # Special handling for GPS Info
-            if 34853 in exif_data: # GPSInfo IFD tag ID
-                gps_info_raw = exif_data[34853]
-                gps_data = {}
-                for gps_tag_id, gps_value in gps_info_raw.items():
-                    gps_tag_name = ExifTags.GPSTAGS.get(gps_tag_id, str(gps_tag_id))
-                    # Process GPS values similarly to main EXIF
-                    if isinstance(gps_value, bytes):
-                        try:
-                            gps_data[gps_tag_name] = gps_value.decode('utf-8', errors='replace').strip()
-                        except Exception:
-                            gps_data[gps_tag_name] = repr(gps_value)
-                    elif isinstance(gps_value, tuple) and len(gps_value) > 0 and isinstance(gps_value[0], (int, float)):
-                         # GPS Coordinates (Degrees, Minutes, Seconds often as rationals)
-                         if len(gps_value) == 3: # DMS format
-                             try:
-                                 d = float(gps_value[0]) if not isinstance(gps_value[0], tuple) else float(gps_value[0][0])/float(gps_value[0][1])
-                                 m = float(gps_value[1]) if not isinstance(gps_value[1], tuple) else float(gps_value[1][0])/float(gps_value[1][1])
-                                 s = float(gps_value[2]) if not isinstance(gps_value[2], tuple) else float(gps_value[2][0])/float(gps_value[2][1])
-                                 gps_data[gps_tag_name] = [d, m, s] # Store as list [D, M, S]
-                             except (ValueError, TypeError, ZeroDivisionError, IndexError):
-                                 gps_data[gps_tag_name] = str(gps_value) # Fallback
-                         elif len(gps_value) == 2 and isinstance(gps_value[0], int) and gps_value[1] != 0: # Simple rational
-                              try:
-                                   gps_data[gps_tag_name] = float(gps_value[0]) / float(gps_value[1])
-                              except (ZeroDivisionError, TypeError):
-                                   gps_data[gps_tag_name] = str(gps_value)
-                         else:
-                             gps_data[gps_tag_name] = list(gps_value) # Store other tuples as list
-                    elif isinstance(gps_value, (int, float, str, bool)) or gps_value is None:
-                        gps_data[gps_tag_name] = gps_value
-                    else:
-                        try:
-                           json.dumps(gps_value)
-                           gps_data[gps_tag_name] = gps_value
-                        except (TypeError, OverflowError):
-                           gps_data[gps_tag_name] = str(gps_value)
-                metadata['GPSInfo'] = gps_data # Replace raw GPS data with processed dict
-
-                # Attempt to calculate decimal coordinates
-                try:
-                    lat_dms = gps_data.get('GPSLatitude')
-                    lat_ref = gps_data.get('GPSLatitudeRef', 'N')
-                    lon_dms = gps_data.get('GPSLongitude')
-                    lon_ref = gps_data.get('GPSLongitudeRef', 'E')
-
-                    if isinstance(lat_dms, list) and len(lat_dms) == 3 and isinstance(lon_dms, list) and len(lon_dms) == 3:
-                        lat = lat_dms[0] + lat_dms[1] / 60.0 + lat_dms[2] / 3600.0
-                        lon = lon_dms[0] + lon_dms[1] / 60.0 + lon_dms[2] / 3600.0
-                        if lat_ref == 'S': lat = -lat
-                        if lon_ref == 'W': lon = -lon
-                        metadata['decimal_latitude'] = round(lat, 6)
-                        metadata['decimal_longitude'] = round(lon, 6)
-                        metadata['formatted_location'] = f"{abs(lat):.4f}°{'N' if lat >= 0 else 'S'}, {abs(lon):.4f}°{'E' if lon >= 0 else 'W'}"
-                except Exception as gps_calc_e:
-                    logger.warning(f"Could not calculate decimal GPS coordinates: {gps_calc_e}")
-
-            # Add formatted date/time if DateTime exists (using server's timezone setting)
-            if 'DateTimeOriginal' in metadata or 'DateTime' in metadata:
-                dt_str = metadata.get('DateTimeOriginal') or metadata.get('DateTime')
-                try:
-                    # Common EXIF format: 'YYYY:MM:DD HH:MM:SS'
-                    naive_dt = datetime.strptime(dt_str, '%Y:%m:%d %H:%M:%S')
-                    # Assume the EXIF time is local to where the photo was taken, but store UTC reference
-                    # For simplicity here, we just store the naive string, formatting happens on display
-                    metadata['formatted_date'] = naive_dt.strftime('%B %d, %Y')
-                    metadata['formatted_time'] = naive_dt.strftime('%I:%M %p')
-                except (ValueError, TypeError) as fmt_e:
-                    logger.warning(f"Could not parse or format EXIF DateTime '{dt_str}': {fmt_e}")
-
-            logger.debug(f"Successfully extracted EXIF for {os.path.basename(image_path)}")
-            return metadata
-
+            return extract_exif_from_image(img, image_path)
     except Exception as e:
         logger.error(f"Error extracting EXIF metadata from {image_path}: {e}", exc_info=True)
         return None # Return None on failure
@@ -985,31 +1053,19 @@ class PhotoHelper:
         frame = db.session.get(PhotoFrame, frame_id)
         if not frame: return None
 
-        playlist = frame.playlist_entries.order_by(PlaylistEntry.order).all()
-        if not playlist: return None
-
         current_photo_id = frame.current_photo_id
         next_photo = None
 
         if frame.shuffle_enabled:
-             # Simple shuffle: pick a random one *not* the current one, if possible
-             possible_next = [p for p in playlist if p.photo_id != current_photo_id]
-             if not possible_next and len(playlist) == 1: # Only one photo
-                 next_photo = playlist[0].photo
-             elif possible_next:
-                 next_photo = random.choice(possible_next).photo
-             else: # If current_photo_id was somehow invalid, pick any random
-                 next_photo = random.choice(playlist).photo
+             # The next entry in the frame's shuffle bag (unknown until the next deal if it's used up)
+             entry = shuffle_bag.peek_shuffled(db.session, PlaylistEntry, frame)
+             if not entry: return None
+             next_photo = entry.photo
         else:
-             # Sequential: find current, get next (looping)
-             current_index = -1
-             if current_photo_id:
-                 for i, entry in enumerate(playlist):
-                     if entry.photo_id == current_photo_id:
-                         current_index = i
-                         break
-             next_index = (current_index + 1) % len(playlist)
-             next_photo = playlist[next_index].photo
+             # Sequential: the entry after the playback cursor (looping)
+             entry, _ = playlist_cursor.peek_next(db.session, PlaylistEntry, frame)
+             if not entry: return None
+             next_photo = entry.photo
 
         if next_photo:
             # Return appropriate version based on orientation
@@ -1053,26 +1109,96 @@ def get_default_color_map():
         "#8000FF", "#4000FF", "#0080FF", "#0040FF", "#FFFF40", "#40FFFF", "#FF40FF", "#808080"
     ]
 
-def process_uploaded_file(file, form_data):
-    """Handles saving, processing, and DB entry for an uploaded file."""
-    if not file or not allowed_file(file.filename):
+def generate_upload_derivatives(filepath, thumb_path, normalize_original=False):
+    """Decode an uploaded image once on the render executor and create its derivatives.
+
+    Args:
+        filepath: Path to the uploaded image
+        thumb_path: Where to write the thumbnail
+        normalize_original: Rewrite the original upright if it has an EXIF rotation
+
+    Returns:
+        dict: exif_metadata, thumbnail, portrait and landscape (paths may be None on failure)
+    """
+    return render_executor.run(derivatives_job, filepath, thumb_path, normalize_original)
+
+def transcode_to_mp4(source_path, mp4_path, report_progress=None):
+    """Convert a video (e.g. MOV) to a half-resolution MP4, reporting progress as it goes.
+
+    Args:
+        source_path: Video to convert
+        mp4_path: Where to write the MP4
+        report_progress: Optional callable(stage, percent); percent runs from 10 to 60
+
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg fails
+    """
+    duration = None
+    try:
+        probe = subprocess.run(['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                                '-of', 'default=noprint_wrappers=1:nokey=1', source_path],
+                               capture_output=True, text=True, check=True)
+        duration = float(probe.stdout.strip())
+    except Exception as e:
+        logger.warning(f"Could not get duration of {source_path}, transcoding without progress: {e}")
+
+    ffmpeg_cmd = [
+        'ffmpeg', '-y',
+        '-i', source_path,
+        '-vf', 'scale=trunc(iw/4)*2:trunc(ih/4)*2',  # Half size, kept even for libx264
+        '-c:v', 'libx264',
+        '-preset', 'ultrafast',
+        '-tune', 'fastdecode',
+        '-crf', '28',
+        '-an',
+        '-movflags', '+faststart',
+        '-progress', 'pipe:1', '-nostats',
+        mp4_path
+    ]
+    process = subprocess.Popen(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    last_percent = None
+    for line in process.stdout:
+        # ffmpeg -progress emits key=value lines; out_time_ms is in microseconds
+        key, _, value = line.strip().partition('=')
+        if key == 'out_time_ms' and duration and report_progress and value.isdigit():
+            percent = 10 + int(50 * min(1.0, int(value) / 1e6 / duration))
+            if percent != last_percent:
+                report_progress('transcoding', percent)
+                last_percent = percent
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, ffmpeg_cmd)
+
+def process_uploaded_file(staged_path, original_filename, form_data, report_progress=None):
+    """Handles converting, processing, and DB entry for an uploaded file.
+
+    Args:
+        staged_path: Where the uploaded file was saved; consumed (moved or deleted)
+        original_filename: Sanitized name the file was uploaded as
+        form_data: Mapping with optional 'heading'
+        report_progress: Optional callable(stage, percent) for progress updates
+
+    Returns:
+        tuple: (Photo or None, message)
+    """
+    if not allowed_file(original_filename):
         return None, "Invalid file or file type not allowed."
 
-    original_filename = secure_filename(file.filename)
-    temp_filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"temp_{uuid.uuid4().hex}_{original_filename}")
+    def progress(stage, percent):
+        if report_progress:
+            report_progress(stage, percent)
+
+    temp_filepath = staged_path
     final_filename = original_filename
     final_filepath = os.path.join(app.config['UPLOAD_FOLDER'], final_filename)
 
     try:
-        file.save(temp_filepath)
-        logger.info(f"Saved uploaded file temporarily to {temp_filepath}")
-
         # --- Format Conversion (HEIC, AVIF, MOV) ---
         original_lower = original_filename.lower()
         converted = False
         exif_bytes_to_preserve = None
 
         if original_lower.endswith(('.heic', '.heif')):
+            progress('converting', 10)
             try:
                 heif_file = pyheif.read(temp_filepath)
                 img = Image.frombytes(heif_file.mode, heif_file.size, heif_file.data, "raw", heif_file.mode, heif_file.stride)
@@ -1089,10 +1215,10 @@ def process_uploaded_file(file, form_data):
                 logger.info(f"Converted HEIC {original_filename} to {final_filename}")
             except Exception as e:
                 logger.error(f"Error converting HEIC file {original_filename}: {e}")
-                os.remove(temp_filepath) # Clean up temp file on error
                 return None, f"Error converting HEIC: {e}"
 
         elif original_lower.endswith('.avif'):
+            progress('converting', 10)
             try:
                 img = Image.open(temp_filepath)
                 # Try to extract EXIF from AVIF (Pillow might put it in info dict)
@@ -1107,45 +1233,35 @@ def process_uploaded_file(file, form_data):
                 logger.info(f"Converted AVIF {original_filename} to {final_filename}")
             except Exception as e:
                 logger.error(f"Error converting AVIF file {original_filename}: {e}")
-                os.remove(temp_filepath)
                 return None, f"Error converting AVIF: {e}"
 
         elif original_lower.endswith('.mov'):
-            # Convert MOV to MP4 (simplified, consider adding progress/scaling if needed)
+            # Convert MOV to MP4 at half resolution
+            progress('transcoding', 10)
             mp4_filename = f"{os.path.splitext(original_filename)[0]}.mp4"
             mp4_filepath = os.path.join(app.config['UPLOAD_FOLDER'], mp4_filename)
             try:
-                ffmpeg_cmd = ['ffmpeg', '-y', '-i', temp_filepath, '-c:v', 'libx264', '-preset', 'fast', '-crf', '23', '-movflags', '+faststart', '-an', mp4_filepath]
-                subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
+                transcode_to_mp4(temp_filepath, mp4_filepath, report_progress)
                 final_filename = mp4_filename
                 final_filepath = mp4_filepath
                 converted = True
                 logger.info(f"Converted MOV {original_filename} to {final_filename}")
             except subprocess.CalledProcessError as e:
-                logger.error(f"ffmpeg error converting MOV {original_filename}: {e.stderr}")
-                os.remove(temp_filepath)
-                return None, f"Error converting MOV: {e.stderr}"
+                logger.error(f"ffmpeg error converting MOV {original_filename}: {e}")
+                return None, f"Error converting MOV: {e}"
             except Exception as e:
                 logger.error(f"Unexpected error converting MOV {original_filename}: {e}")
-                os.remove(temp_filepath)
                 return None, f"Error converting MOV: {e}"
 
-        # If no conversion happened, move temp file to final location
+        # If no conversion happened, move the staged file to its final location
         if not converted:
-            os.rename(temp_filepath, final_filepath)
+            os.replace(temp_filepath, final_filepath)
             logger.info(f"Moved uploaded file to {final_filepath}")
             temp_filepath = None # Prevent deletion later
 
-        # --- Metadata Extraction ---
-        # Extract EXIF *after* conversion if it happened, otherwise from original
-        exif_metadata = extract_exif_metadata(final_filepath)
-        if not exif_metadata and exif_bytes_to_preserve:
-            logger.warning(f"Could not re-extract EXIF from converted {final_filename}, attempting manual parse.")
-            # Try parsing the preserved bytes if extraction failed (less reliable)
-            # This part is complex and often library-dependent; skipping detailed impl. for now.
-
-        # --- Media Type Specific Processing (Thumbnail, Duration) ---
+        # --- Media Type Specific Processing (Thumbnail, Duration, Metadata) ---
         is_video = final_filename.lower().endswith(('.mp4', '.mov')) # Check final name
+        exif_metadata = None
         thumb_filename = None
         duration = None
         portrait_path = None
@@ -1154,6 +1270,7 @@ def process_uploaded_file(file, form_data):
         os.makedirs(thumb_dir, exist_ok=True)
 
         if is_video:
+            progress('thumbnail', 70)
             thumb_filename_base = f"thumb_{os.path.splitext(final_filename)[0]}.jpg"
             thumb_path = os.path.join(thumb_dir, thumb_filename_base)
             if generate_video_thumbnail(final_filepath, thumb_path):
@@ -1169,28 +1286,18 @@ def process_uploaded_file(file, form_data):
             portrait_path = final_filepath
             landscape_path = final_filepath
         else: # It's an image
+            progress('generating versions', 40)
             try:
-                with Image.open(final_filepath) as img:
-                    # Apply EXIF orientation *before* thumbnailing/processing
-                    img = ImageOps.exif_transpose(img)
-
-                    # Create thumbnail
-                    thumb_img = img.copy()
-                    thumb_img.thumbnail((400, 400))
-                    thumb_filename_base = f"thumb_{final_filename}"
-                    thumb_path = os.path.join(thumb_dir, thumb_filename_base)
-                    thumb_img.save(thumb_path, "JPEG", quality=85)
+                # EXIF (extracted *after* conversion if it happened), thumbnail and both
+                # orientations come from one decode. The original is rewritten upright
+                # when it has an EXIF rotation, which simplifies downstream processing.
+                thumb_filename_base = f"thumb_{final_filename}"
+                derivatives = generate_upload_derivatives(final_filepath, os.path.join(thumb_dir, thumb_filename_base),
+                                                          normalize_original=True)
+                exif_metadata = derivatives['exif_metadata']
+                if derivatives['thumbnail']:
                     thumb_filename = thumb_filename_base
-
-                    # Save the orientation-corrected image back (overwriting original potentially)
-                    # This simplifies downstream processing, assuming this is desired.
-                    # Preserve EXIF if possible.
-                    img.save(final_filepath, quality=95, exif=img.info.get('exif', b''))
-                    logger.info(f"Applied EXIF orientation to {final_filename}")
-
-                # Process for orientations (using the now orientation-corrected file)
-                portrait_path = photo_processor.process_for_orientation(final_filepath, 'portrait')
-                landscape_path = photo_processor.process_for_orientation(final_filepath, 'landscape')
+                portrait_path, landscape_path = derivatives['portrait'], derivatives['landscape']
                 if not portrait_path: logger.warning(f"Failed to create portrait version for {final_filename}")
                 if not landscape_path: logger.warning(f"Failed to create landscape version for {final_filename}")
 
@@ -1199,6 +1306,7 @@ def process_uploaded_file(file, form_data):
                 # Continue without thumbnail/oriented versions if processing fails
 
         # --- Database Entry ---
+        progress('saving', 90)
         photo = Photo(
             filename=final_filename,
             portrait_version=os.path.basename(portrait_path) if portrait_path else final_filename, # Fallback
@@ -1211,7 +1319,7 @@ def process_uploaded_file(file, form_data):
             uploaded_at=datetime.utcnow()
         )
         db.session.add(photo)
-        db.session.flush() # Get the photo.id for potential immediate use
+        db.session.commit() # Committed before the analysis thread looks the photo up
         logger.info(f"Created Photo DB record ID {photo.id} for {final_filename}")
 
         # --- AI Analysis (Background) ---
@@ -1236,22 +1344,38 @@ def process_uploaded_file(file, form_data):
 
     except Exception as e:
         logger.error(f"General error processing upload {original_filename}: {e}", exc_info=True)
+        db.session.rollback()
         # Attempt cleanup of final file if it exists and differs from temp
-        if 'final_filepath' in locals() and os.path.exists(final_filepath) and final_filepath != temp_filepath:
+        if os.path.exists(final_filepath) and final_filepath != temp_filepath:
              try: os.remove(final_filepath)
              except Exception: pass
         return None, f"An error occurred: {e}"
     finally:
-        # Ensure temp file is deleted if it still exists
+        # Ensure the staged file is deleted if it still exists
         if temp_filepath and os.path.exists(temp_filepath):
             try:
                 os.remove(temp_filepath)
-                logger.debug(f"Cleaned up temp file {temp_filepath}")
+                logger.debug(f"Cleaned up staged file {temp_filepath}")
             except Exception as clean_e:
-                logger.warning(f"Could not delete temp file {temp_filepath}: {clean_e}")
+                logger.warning(f"Could not delete staged file {temp_filepath}: {clean_e}")
+
+def run_ingest_job(job, report_progress):
+    """Ingest a queued upload (IngestQueue callback) and return the new photo's id."""
+    photo, message = process_uploaded_file(job.staged_path, job.original_filename,
+                                           {'heading': job.heading or ''}, report_progress)
+    if not photo:
+        raise RuntimeError(message)
+
+    if job.frame_id:
+        report_progress('adding to playlist', 95)
+        success, message = add_photo_to_frame_playlist(photo.id, job.frame_id)
+        if not success:
+            # The photo itself was ingested; only the playlist add failed
+            logger.warning(f"Ingest job {job.id}: {message}")
+    return photo.id
 
 def add_photo_to_frame_playlist(photo_id, frame_id):
-    """Adds a photo to the beginning of a specific frame's playlist."""
+    """Adds a photo to a frame's playlist so it is the next one shown."""
     try:
         # Check if frame and photo exist
         frame = db.session.get(PhotoFrame, frame_id)
@@ -1260,21 +1384,16 @@ def add_photo_to_frame_playlist(photo_id, frame_id):
             logger.error(f"Cannot add photo to playlist: Frame {frame_id} or Photo {photo_id} not found.")
             return False, "Frame or Photo not found."
 
-        # Shift existing entries' order down by 1
-        PlaylistEntry.query.filter_by(frame_id=frame_id).update({
-            PlaylistEntry.order: PlaylistEntry.order + 1
-        })
-
-        # Add the new photo at the beginning (order 0)
+        # Add the new photo right after the playback cursor so it plays next
         new_entry = PlaylistEntry(
             frame_id=frame_id,
             photo_id=photo.id,
-            order=0,
+            order=playlist_cursor.next_up_order(db.session, PlaylistEntry, frame),
             date_added=datetime.utcnow()
         )
         db.session.add(new_entry)
         db.session.commit()
-        logger.info(f"Added photo {photo_id} to start of playlist for frame {frame_id}")
+        logger.info(f"Added photo {photo_id} as next up in playlist for frame {frame_id}")
 
         # Trigger MQTT update if enabled
         if hasattr(app, 'mqtt_integration') and app.mqtt_integration:
@@ -1316,314 +1435,41 @@ def upload_photo():
             return redirect(request.url)
             
         if file and allowed_file(file.filename):
-            # Get frame_id from form data
-            frame_id = request.form.get('frame_id')
-            
-            # Create thumbnails directory if it doesn't exist
-            thumbnails_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'thumbnails')
-            os.makedirs(thumbnails_dir, exist_ok=True)
-            
-            # Save original file
+            # Stage the file and hand it to the ingest queue; conversion, transcoding
+            # and derivative generation happen in the background
             filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            
-            # Extract EXIF metadata from the original file
-            exif_metadata = extract_exif_metadata(filepath)
-            if exif_metadata:
-                app.logger.info(f"Successfully extracted EXIF metadata from {filename}")
-            else:
-                app.logger.info(f"No EXIF metadata found in {filename}")
-
-            # Convert HEIC/HEIF to JPG
-            try:
-                if filename.lower().endswith(('.heic', '.heif')):
-                    import pyheif  # Requires pyheif and libheif installation
-                    heif_file = pyheif.read(filepath)
-                    img = Image.frombytes(
-                        heif_file.mode, 
-                        heif_file.size, 
-                        heif_file.data,
-                        "raw",
-                        heif_file.mode,
-                        heif_file.stride,
-                    )
-                    
-                    # Extract metadata from HEIC file
-                    metadata = None
-                    try:
-                        for metadata in heif_file.metadata or []:
-                            if metadata['type'] == 'Exif':
-                                # Found EXIF metadata
-                                app.logger.info("Found EXIF metadata in HEIC file")
-                                metadata = metadata['data']
-                                break
-                    except Exception as e:
-                        app.logger.error(f"Error extracting metadata from HEIC: {e}")
-                    
-                    # Replace original file with JPG version
-                    new_filename = f"{os.path.splitext(filename)[0]}.jpg"
-                    new_filepath = os.path.join(app.config['UPLOAD_FOLDER'], new_filename)
-                    
-                    # Save with EXIF data if available
-                    if metadata:
-                        img.save(new_filepath, "JPEG", quality=95, exif=metadata)
-                        app.logger.info("Preserved EXIF metadata during HEIC conversion")
-                    else:
-                        img.save(new_filepath, "JPEG", quality=95)
-                    
-                    # Clean up original HEIC file and update variables
-                    os.remove(filepath)
-                    filename = new_filename
-                    filepath = new_filepath
-                    
-                    # If we didn't get metadata from the original file, try again with the converted file
-                    if not exif_metadata:
-                        exif_metadata = extract_exif_metadata(filepath)
-                        if exif_metadata:
-                            app.logger.info(f"Successfully extracted EXIF metadata from converted {filename}")
-                elif filename.lower().endswith('.avif'):
-                    # Convert AVIF to JPG
-                    img = Image.open(filepath)
-                    
-                    # Extract EXIF data if available
-                    metadata = None
-                    try:
-                        metadata = img.info.get('exif')
-                    except Exception as e:
-                        app.logger.error(f"Error extracting metadata from AVIF: {e}")
-                    
-                    # Replace original file with JPG version
-                    new_filename = f"{os.path.splitext(filename)[0]}.jpg"
-                    new_filepath = os.path.join(app.config['UPLOAD_FOLDER'], new_filename)
-                    
-                    # Save with EXIF data if available
-                    if metadata:
-                        img.save(new_filepath, "JPEG", quality=95, exif=metadata)
-                        app.logger.info("Preserved EXIF metadata during AVIF conversion")
-                    else:
-                        img.save(new_filepath, "JPEG", quality=95)
-                    
-                    # Clean up original AVIF file and update variables
-                    os.remove(filepath)
-                    filename = new_filename
-                    filepath = new_filepath
-                    
-                    # If we didn't get metadata from the original file, try again with the converted file
-                    if not exif_metadata:
-                        exif_metadata = extract_exif_metadata(filepath)
-                        if exif_metadata:
-                            app.logger.info(f"Successfully extracted EXIF metadata from converted {filename}")
-            except Exception as e:
-                app.logger.error(f"HEIC/AVIF conversion error: {e}")
-                flash('Error converting file')
-                return redirect(request.url)
-            
-            # Determine if it's a video
-            is_video = filename.lower().endswith(('.mp4', '.mov'))
-            
-            thumb_filename = None
-            duration = None
-            portrait_path = None
-            landscape_path = None
-            
-            if is_video:
-                # Generate video thumbnail
-                thumb_filename = f"thumb_{filename}.jpg"
-                thumb_path = os.path.join(thumbnails_dir, thumb_filename)
-                
-                # Convert MOV to MP4 if necessary
-                if filename.lower().endswith('.mov'):
-                    mp4_filename = os.path.splitext(filename)[0] + '.mp4'
-                    mp4_filepath = os.path.join(app.config['UPLOAD_FOLDER'], mp4_filename)
-                    progress_file = 'ffmpeg_progress.txt'
-                    
-                    try:
-                        # Get original video dimensions
-                        probe = subprocess.run([
-                            'ffprobe',
-                            '-v', 'error',
-                            '-select_streams', 'v:0',
-                            '-show_entries', 'stream=width,height',
-                            '-of', 'csv=s=x:p=0',
-                            filepath
-                        ], capture_output=True, text=True)
-                        
-                        width, height = map(int, probe.stdout.strip().split('x'))
-                        new_width = width // 2
-                        new_height = height // 2
-                        
-                        # Optimized MOV to MP4 conversion with scaling
-                        subprocess.run([
-                            'ffmpeg', '-y',
-                            '-i', filepath,
-                            '-vf', f'scale={new_width}:{new_height}',  # Scale to half size
-                            '-c:v', 'libx264',
-                            '-preset', 'ultrafast',
-                            '-tune', 'fastdecode',
-                            '-crf', '28',
-                            '-an',
-                            '-movflags', '+faststart',
-                            '-progress', progress_file,
-                            mp4_filepath
-                        ], check=True)
-                        
-                        # Remove original MOV file
-                        os.remove(filepath)
-                        
-                        # Update filepath and filename to use MP4 version
-                        filepath = mp4_filepath
-                        filename = mp4_filename
-                        
-                    except Exception as e:
-                        logger.error(f"Error converting MOV to MP4: {e}")
-                        
-                    if os.path.exists(progress_file):
-                        os.remove(progress_file)
-
-                if generate_video_thumbnail(filepath, thumb_path):
-                    try:
-                        probe = subprocess.run([
-                            'ffprobe',
-                            '-v', 'error',
-                            '-show_entries', 'format=duration',
-                            '-of', 'default=noprint_wrappers=1:nokey=1',
-                            filepath
-                        ], capture_output=True, text=True)
-                        duration = float(probe.stdout)
-                    except Exception as e:
-                        logger.error(f"Error getting video duration: {e}")
-
-                # Save to database
-                photo = Photo(
-                    filename=filename,
-                    portrait_version=filename,
-                    landscape_version=filename,
-                    thumbnail=thumb_filename,
-                    media_type='video',
-                    duration=duration,
-                    heading=request.form.get('heading', ''),  # Add heading from form data
-                    exif_metadata=exif_metadata  # Add EXIF metadata
-                )
-            else:
-                # Generate thumbnail
-                try:
-                    with Image.open(filepath) as img:
-                        # Get EXIF orientation if it exists
-                        exif = img._getexif()
-                        orientation = exif.get(274) if exif else None  # 274 is the EXIF tag for orientation
-                        
-                        # Apply EXIF orientation before creating thumbnail
-                        if orientation:
-                            if orientation == 2:
-                                img = img.transpose(Image.FLIP_LEFT_RIGHT)
-                            elif orientation == 3:
-                                img = img.rotate(180, expand=True)
-                            elif orientation == 4:
-                                img = img.transpose(Image.FLIP_TOP_BOTTOM)
-                            elif orientation == 5:
-                                img = img.rotate(-270, expand=True).transpose(Image.FLIP_LEFT_RIGHT)
-                            elif orientation == 6:
-                                img = img.rotate(-90, expand=True)
-                            elif orientation == 7:
-                                img = img.rotate(-90, expand=True).transpose(Image.FLIP_LEFT_RIGHT)
-                            elif orientation == 8:
-                                img = img.rotate(-270, expand=True)
-                        
-                        # Create thumbnail from corrected image
-                        img.thumbnail((400, 400))  # Max size 400x400
-                        thumb_filename = f"thumb_{filename}"
-                        thumb_path = os.path.join(thumbnails_dir, thumb_filename)
-                        img.save(thumb_path, "JPEG")
-
-                        # Process for both orientations
-                        try:
-                            portrait_path = photo_processor.process_for_orientation(filepath, 'portrait')
-                            if portrait_path:
-                                app.logger.info(f"Successfully created portrait version: {portrait_path}")
-                            else:
-                                app.logger.error(f"Failed to create portrait version for {filename}")
-                                
-                            landscape_path = photo_processor.process_for_orientation(filepath, 'landscape')
-                            if landscape_path:
-                                app.logger.info(f"Successfully created landscape version: {landscape_path}")
-                            else:
-                                app.logger.error(f"Failed to create landscape version for {filename}")
-                        except Exception as e:
-                            app.logger.error(f"Error processing image orientations: {e}")
-                            portrait_path = None
-                            landscape_path = None
-                        
-                except Exception as e:
-                    app.logger.error(f"Error generating thumbnail: {e}")
-                    thumb_filename = None
-            
-            
-            # Save photo record in the database with orientation versions and thumbnail
-            photo = Photo(
-                filename=filename,
-                portrait_version=os.path.basename(portrait_path) if portrait_path else None,
-                landscape_version=os.path.basename(landscape_path) if landscape_path else None,
-                thumbnail=thumb_filename,
-                media_type='video' if is_video else 'photo',
-                duration=duration,
-                heading=request.form.get('heading', ''),  # Add heading from form data
-                exif_metadata=exif_metadata  # Add EXIF metadata
-            )
-            
-            # Log the photo record being saved
-            app.logger.info(f"Saving photo record: filename={filename}, portrait={os.path.basename(portrait_path) if portrait_path else None}, landscape={os.path.basename(landscape_path) if landscape_path else None}")
-            db.session.add(photo)
-            db.session.commit() 
-            
-            # After adding photo to database, check AI settings before analysis
-            server_settings = load_server_settings()
-            if server_settings.get('ai_analysis_enabled', False):
-                # Only run analysis if enabled
-                def async_analyze(app, db, photo_id):
-                    with app.app_context():
-                        try:
-                            photo_analyzer = PhotoAnalyzer(app, db)
-                            photo_analyzer.analyze_photo(photo_id)
-                        except Exception as e:
-                            app.logger.error(f"Background analysis failed: {e}")
-                
-                Thread(target=async_analyze, args=(app, db, photo.id)).start()
-            else:
-                app.logger.debug("AI analysis disabled, skipping photo analysis")
+            frame_id = request.form.get('frame_id')
+            heading = request.form.get('heading', '')
+
+            if ingest_queue is None:
+                # Services not started (e.g. imported by another WSGI runner): ingest inline
+                staged_path = os.path.join(INGEST_STAGING_DIR, f"{uuid.uuid4().hex}_{filename}")
+                os.makedirs(INGEST_STAGING_DIR, exist_ok=True)
+                file.save(staged_path)
+                photo, message = process_uploaded_file(staged_path, filename, {'heading': heading})
+                if photo and frame_id:
+                    add_photo_to_frame_playlist(photo.id, frame_id)
+                if is_api_request:
+                    if not photo:
+                        return jsonify({'success': False, 'error': message}), 500
+                    return jsonify({'success': True, 'photo_id': photo.id, 'status': 'done', 'message': message})
+                flash(message)
+                return redirect(url_for('upload_photo'))
+
+            staged_path = ingest_queue.staging_path(filename)
+            file.save(staged_path)
+            job = ingest_queue.enqueue(staged_path, filename, frame_id=frame_id, heading=heading)
 
-            # After the photo is added to the database and before the background analysis,
-            # check if we need to add it to a playlist
-            if frame_id:
-                try:
-                    # Shift existing entries
-                    PlaylistEntry.query.filter_by(frame_id=frame_id)\
-                        .update({PlaylistEntry.order: PlaylistEntry.order + 1})
-                    
-                    # Add new entry at the beginning
-                    entry = PlaylistEntry(
-                        frame_id=frame_id,
-                        photo_id=photo.id,
-                        order=0
-                    )
-                    db.session.add(entry)
-                    db.session.commit()
-                except Exception as e:
-                    app.logger.error(f"Error adding photo to playlist: {e}")
-                    if is_api_request:
-                        return jsonify({
-                            'success': False,
-                            'error': f'Error adding to playlist: {str(e)}'
-                        }), 500
-            
             if is_api_request:
                 return jsonify({
                     'success': True,
-                    'photo_id': photo.id,
-                    'message': 'Photo uploaded successfully'
-                })
+                    'job_id': job.id,
+                    'status': job.status,
+                    'status_url': url_for('get_ingest_job', job_id=job.id),
+                    'message': 'Upload queued for processing'
+                }), 202
             
-            flash('Photo uploaded successfully!')
+            flash('Photo uploaded! It will appear once processing finishes.')
             return redirect(url_for('upload_photo'))
         else:
             if is_api_request:
@@ -1800,6 +1646,8 @@ def manage_frames():
         try:
             db.session.add(frame)
             db.session.commit()
+            dashboard_loader.invalidate()
+            notify_frame_changed(frame.id)
             
             if frame_type == 'virtual':
                 # Generate a QR code for the virtual frame URL
@@ -1816,7 +1664,7 @@ def manage_frames():
         return redirect(url_for('manage_frames'))
     
     # GET request - show frames list
-    frames = PhotoFrame.query.order_by(PhotoFrame.order).all()
+    frames = PhotoFrame.query.options(db.joinedload(PhotoFrame.sync_group)).order_by(PhotoFrame.order).all()
     discovered = frame_discovery.get_discovered_frames()
     
     # Ensure now is in UTC for status calculations
@@ -1842,6 +1690,9 @@ def manage_frames():
             server_settings['timezone']
         )
         
+    # Current/next photos and playlist sizes for every frame, loaded in bulk
+    frame_views = dashboard_loader.get_frames_by_id()
+
     # Add this section to handle JSON format requests
     if request.args.get('format') == 'json':
         frames_data = []
@@ -1857,21 +1708,21 @@ def manage_frames():
     
     return render_template('manage_frames.html', 
                          frames=frames, 
+                         frame_views=frame_views,
                          discovered=discovered,
-                         get_current_photo=PhotoHelper.get_current_photo,
-                         get_next_photo=PhotoHelper.get_next_photo,
-                         Photo=Photo,
                          now=now,
                          server_settings=server_settings)  # Added server_settings
 
 class PhotoHelper:
     @classmethod
     def get_current_photo(cls, frame_id):
-        """Get the current photo for a frame."""
+        """Get the photo a frame shows on its next wake (the entry after the playback cursor)."""
         frame = PhotoFrame.query.get(frame_id)
         
-        if frame and frame.playlist_entries.first():
-            return frame.playlist_entries.first().photo
+        if frame:
+            entry, _ = playlist_cursor.peek_next(db.session, PlaylistEntry, frame)
+            if entry:
+                return entry.photo
         
         return None
 
@@ -1879,38 +1730,21 @@ class PhotoHelper:
     def get_next_photo(cls, frame_id):
         """Get the next photo for a frame."""
         frame = PhotoFrame.query.get(frame_id)
-        if not frame or not frame.shuffle_enabled:
-            # Use existing sequential logic
-            entries = PlaylistEntry.query.filter_by(frame_id=frame_id).order_by(PlaylistEntry.order).limit(2).all()
+        if not frame:
+            return None
+        if not frame.shuffle_enabled:
+            # Use existing sequential logic: the entry after the one shown next
+            entries = playlist_cursor.upcoming(db.session, PlaylistEntry, frame, 2)
             if len(entries) > 1:
                 photo = db.session.get(Photo, entries[1].photo_id)
                 if photo:
                     return photo.filename
             return None
 
-        # Shuffle logic
-        entries = PlaylistEntry.query.filter_by(frame_id=frame_id).all()
-        if not entries:
-            return None
-
-        # Create a session key specific to this frame's shuffle session
-        shuffle_key = f'frame_{frame_id}_shuffle'
-        shown_entries = session.get(shuffle_key, [])
-
-        # If we've shown all entries, reset the tracking
-        if len(shown_entries) >= len(entries):
-            shown_entries = []
-
-        # Get available entries (those not yet shown)
-        available_entries = [entry for entry in entries 
-                            if entry.id not in shown_entries]
-
-        if available_entries:
-            chosen_entry = random.choice(available_entries)
-            shown_entries.append(chosen_entry.id)
-            session[shuffle_key] = shown_entries
-            if chosen_entry.photo:
-                return chosen_entry.photo.filename
+        # Shuffle logic: the next entry in the frame's shuffle bag
+        entry = shuffle_bag.peek_shuffled(db.session, PlaylistEntry, frame)
+        if entry and entry.photo:
+            return entry.photo.filename
 
         return None
 
@@ -1931,22 +1765,24 @@ def edit_playlist(frame_id):
             playlist_entry = PlaylistEntry(
                 frame_id=frame_id,
                 photo_id=photo_id,
-                order=order,
+                order=order * playlist_ordering.ORDER_GAP,
                 date_added=datetime.utcnow() if not PlaylistEntry.query.filter_by(
                     frame_id=frame_id, photo_id=photo_id).first() else PlaylistEntry.query.filter_by(
                     frame_id=frame_id, photo_id=photo_id).first().date_added
             )
             db.session.add(playlist_entry)
-            
+
+        # The editor lists photos in play order, so playback continues from the top
+        playlist_cursor.reset_cursor(frame)
         db.session.commit()
         if hasattr(app, 'mqtt_integration'):
             app.mqtt_integration.update_frame_options(frame)
         return jsonify({'success': True, 'message': 'Playlist updated successfully'})
 
-    # Always return photos in manual order by default
-    playlist_photos = [entry.photo for entry in 
+    # Always return photos in manual order by default, starting with the one that plays next
+    playlist_photos = [entry.photo for entry in playlist_cursor.play_order(
                       PlaylistEntry.query.filter_by(frame_id=frame_id)
-                      .order_by(PlaylistEntry.order).all()]
+                      .order_by(PlaylistEntry.order, PlaylistEntry.id).all(), frame)]
     
     # Get photos not in playlist
     playlist_photo_ids = [photo.id for photo in playlist_photos]
@@ -2030,6 +1866,7 @@ def edit_frame_settings(frame_id):
             frame.overlay_preferences = json.dumps(preferences)
         
         db.session.commit()
+        notify_frame_changed(frame.id)
         flash('Settings updated successfully.')
         
         if hasattr(app, 'mqtt_integration'):
@@ -2132,14 +1969,27 @@ def get_settings():
             sleep_reason = "Using sync group default interval"
     
     # Fall back to frame's individual settings
+    smoothable = False
     if sleep_interval is None:
         sleep_interval = round(frame.sleep_interval, 1)
         sleep_reason = "Using frame's default interval"
+        smoothable = True
 
     # Ensure minimum sleep interval
     if sleep_interval < MIN_SLEEP_INTERVAL:
         sleep_interval = MIN_SLEEP_INTERVAL
         sleep_reason += " (adjusted to minimum)"
+
+    # Frames on their own schedule may be nudged to a less busy time slot;
+    # sync group and deep sleep wakes are only tracked
+    desired_wake = now + timedelta(minutes=sleep_interval)
+    if smoothable:
+        wake = wake_scheduler.assign(frame.id, desired_wake, sleep_interval * 60)
+        if wake != desired_wake:
+            sleep_interval = round(max((wake - now).total_seconds() / 60.0, MIN_SLEEP_INTERVAL), 3)
+            sleep_reason += " (shifted to spread server load)"
+    else:
+        wake_scheduler.record(frame.id, desired_wake)
     
     # Get overlay preferences
     overlay_prefs = {}
@@ -2163,6 +2013,7 @@ def get_settings():
     frame.next_wake_time = now + timedelta(minutes=sleep_interval)
     
     db.session.commit()
+    notify_frame_changed(frame.id)
     
     # Format next_sync for response if it exists
     next_sync_str = None
@@ -2242,6 +2093,10 @@ def update_diagnostic():
             logger.error(f"Error updating capabilities for frame {frame.id}: {e}")
     
     db.session.commit()
+    notify_frame_changed(frame.id)
+    if frame.next_wake_time:
+        # The frame's own report of when it wakes next
+        wake_scheduler.record(frame.id, frame.next_wake_time)
     
     return jsonify({"message": "Diagnostic info updated"})
 
@@ -2332,7 +2187,7 @@ def register_frame():
 
 @app.route('/api/current_photo')
 def get_current_photo():
-    """Return the current photo for a frame and move it to the bottom of the playlist."""
+    """Return the current photo for a frame and advance its playlist."""
     device_id = request.args.get('device_id')
     app.logger.info(f"Received request for device_id: {device_id}")
     
@@ -2345,42 +2200,19 @@ def get_current_photo():
         app.logger.info(f"Found frame: {frame.id}")
         app.logger.info(f"Frame overlay preferences: {frame.overlay_preferences}")
         
-        # Get all playlist entries ordered by order
-        playlist = PlaylistEntry.query.filter_by(frame_id=device_id)\
-                                    .order_by(PlaylistEntry.order).all()
-        app.logger.info(f"Playlist entries found: {len(playlist)}")
+        if frame.shuffle_enabled:
+            # If shuffle is enabled, draw the next photo from the frame's shuffle bag
+            current_entry = shuffle_bag.next_shuffled(db.session, PlaylistEntry, frame)
+            if current_entry:
+                playlist_cursor.move_cursor(frame, current_entry, wrapped=False)
+        else:
+            # Advance the playback cursor (a single update of the frame row)
+            current_entry = playlist_cursor.advance(db.session, PlaylistEntry, frame)
         
-        if playlist:
-            # If shuffle is enabled, pick a random photo from the playlist
-            if frame.shuffle_enabled:
-                import random
-                current_entry = random.choice(playlist)
-            else:
-                # Get the first entry (current photo)
-                current_entry = playlist[0]
-                
+        if current_entry:
             photo = Photo.query.get(current_entry.photo_id)
-            
-            # Reorder the playlist:
-            # 1. Move all other entries up one position
-            for i, entry in enumerate(playlist[1:], 0):
-                entry.order = i
-            # 2. Move current entry to the bottom
-            current_entry.order = len(playlist) - 1
-            
             db.session.commit()
             
-            # Check if we have a valid photo
-            if not playlist:
-                # Return placeholder image if playlist is empty
-                placeholder_path = os.path.join('static', 'images', 'frame-blank.jpg')
-                return jsonify({
-                    'status': 'success',
-                    'photo_url': url_for('static', filename='images/frame-blank.jpg'),
-                    'media_type': 'photo',
-                    'sleep_interval': calculate_sleep_interval(frame)
-                })
-            
             if photo:
                 # Choose the appropriate version based on frame orientation
                 if frame.orientation == 'portrait' and photo.portrait_version:
@@ -2400,6 +2232,17 @@ def get_current_photo():
                 if is_video:
                     return send_file(photo_path, mimetype=mimetype)
                 
+                # Serve a previous render of this photo if nothing has changed since
+                cache_key = get_render_cache_key(frame, photo, 'current_photo')
+                cached_render = render_cache.get(cache_key)
+                if cached_render is not None:
+                    frame.current_photo_id = photo.id
+                    frame.last_wake_time = datetime.now(timezone.utc)
+                    sleep_interval = calculate_sleep_interval(frame)
+                    frame.next_wake_time = frame.last_wake_time + timedelta(minutes=sleep_interval)
+                    db.session.commit()
+                    return frame_image_response(cached_render, 'image/jpeg', cache_key)
+                
                 # Process image with frame settings if available
                 processed_image = None
                 if hasattr(frame, 'contrast_factor') and frame.contrast_factor is not None:
@@ -2429,17 +2272,15 @@ def get_current_photo():
                         
                         if modified_image:
                             app.logger.info("Successfully applied overlays")
-                            temp_filename = f"temp_{int(datetime.now().timestamp())}_{photo.filename}"
-                            temp_path = os.path.join(app.config['UPLOAD_FOLDER'], temp_filename)
                             
                             # Convert to RGB mode if the image is in palette mode (P)
                             if modified_image.mode == 'P':
                                 app.logger.info("Converting palette image with overlays to RGB before saving as JPEG")
                                 modified_image = modified_image.convert('RGB')
                             
-                            modified_image.save(temp_path)
-                            cleanup_temp_files(app.config['UPLOAD_FOLDER'])
-                            return send_file(temp_path, mimetype='image/jpeg')
+                            image_bytes = encode_image(modified_image)
+                            render_cache.put(cache_key, image_bytes)
+                            return frame_image_response(image_bytes, 'image/jpeg', cache_key)
                         else:
                             app.logger.error("Overlay manager returned None")
                     except Exception as e:
@@ -2447,19 +2288,13 @@ def get_current_photo():
                 
                 # If we have a processed image but no overlays were applied, save and return it
                 if processed_image:
-                    temp_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'temp')
-                    os.makedirs(temp_dir, exist_ok=True)
-                    
-                    temp_filename = f"temp_{uuid.uuid4().hex}_{os.path.basename(photo_path)}"
-                    temp_path = os.path.join(temp_dir, temp_filename)
-                    
                     # Convert to RGB mode if the image is in palette mode (P)
                     if processed_image.mode == 'P':
                         app.logger.info("Converting palette image to RGB before saving as JPEG")
                         processed_image = processed_image.convert('RGB')
                     
-                    processed_image.save(temp_path, quality=95)
-                    cleanup_temp_files(temp_dir)
+                    image_bytes = encode_image(processed_image, quality=95)
+                    render_cache.put(cache_key, image_bytes)
                     
                     # Update the frame's current photo
                     frame.current_photo_id = photo.id
@@ -2472,7 +2307,7 @@ def get_current_photo():
                     db.session.commit()
                     
                     # Return the modified image
-                    return send_file(temp_path, mimetype='image/jpeg')
+                    return frame_image_response(image_bytes, 'image/jpeg', cache_key)
                 
                 # Update the frame's current photo
                 frame.current_photo_id = photo.id
@@ -2517,26 +2352,36 @@ def cleanup_temp_files(directory, max_age_hours=1):
 
 @app.route('/api/next_photo')
 def get_next_photo():
-    """Return the next photo for a frame using unified processing pipeline."""
+    """Return the next photo for a frame using unified processing pipeline.
+
+    ?type= selects the output: a JPEG by default, 'compressed' for the packed
+    4bpp e-paper buffer, or 'compressed_rle' / 'compressed_zlib' for that
+    buffer with a transfer header and encoded payload (see epaper_encoding).
+    'compressed_delta' sends only the tiles that changed since the frame's
+    last buffer to frames capable of partial refresh.
+    """
     device_id = request.args.get('device_id')
     output_type = request.args.get('type')
     
     frame = db.session.get(PhotoFrame, device_id)
-    if not frame or not (playlist := frame.playlist_entries.order_by(PlaylistEntry.order).all()):
+    if not frame or not (current_entry := get_next_entry(frame)):
         return handle_empty_playlist(frame, output_type)
 
     try:
-        # Get next photo and update playlist
-        current_entry = get_next_entry(frame, playlist)
+        # Move the playback cursor to the next photo
         photo = current_entry.photo
-        update_playlist_order(frame, playlist, current_entry)
+        update_playlist_order(frame, current_entry)
 
-        # Unified processing pipeline
-        temp_path = process_image_pipeline(frame, photo)
-        
-        # Final output handling
-        return generate_final_output(temp_path, frame, output_type)
+        # Unified processing pipeline (served from the render cache when unchanged)
+        if output_type == epaper_encoding.DELTA_OUTPUT_TYPE:
+            data, mimetype, cache_key = render_delta_output(frame, photo)
+        else:
+            data, mimetype, cache_key = render_frame_output(frame, photo, output_type)
+        return frame_image_response(data, mimetype, cache_key)
 
+    except RenderTimeoutError as e:
+        logger.error(f"Render timed out in get_next_photo: {e}")
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         logger.error(f"Error in get_next_photo: {e}")
         return jsonify({'error': str(e)}), 500
@@ -2544,83 +2389,379 @@ def get_next_photo():
 def handle_empty_playlist(frame, output_type):
     """Handle case when playlist is empty."""
     placeholder_path = os.path.join(app.root_path, 'static', 'images', 'frame-blank.jpg')
-    if output_type == 'compressed':
-        return generate_compressed_output(placeholder_path, frame.orientation if frame else 'portrait')
+    if output_type == epaper_encoding.DELTA_OUTPUT_TYPE:
+        output_type = 'compressed_zlib'
+    if output_type == 'compressed' or output_type in epaper_encoding.OUTPUT_TYPES:
+        raw_bytes = generate_compressed_output(placeholder_path, frame.orientation if frame else 'portrait')
+        if output_type in epaper_encoding.OUTPUT_TYPES:
+            raw_bytes = epaper_encoding.encode(raw_bytes, epaper_encoding.OUTPUT_TYPES[output_type])
+        response = Response(raw_bytes, mimetype='application/octet-stream')
+        response.add_etag()
+        return response.make_conditional(request)
     return send_file(placeholder_path, mimetype='image/jpeg')
 
-def get_next_entry(frame, playlist):
-    """Select next playlist entry based on shuffle settings."""
+def get_next_entry(frame):
+    """Select next playlist entry based on shuffle settings (None if the playlist is empty)."""
     if frame.shuffle_enabled:
-        entries = PlaylistEntry.query.filter_by(frame_id=frame.id).all()
-        if not entries:
-            return None
+        # Drawn from the frame's server-side shuffle bag, so no photo repeats within a cycle
+        return shuffle_bag.next_shuffled(db.session, PlaylistEntry, frame)
+    entry, _ = playlist_cursor.peek_next(db.session, PlaylistEntry, frame)
+    return entry
 
-        # Create a session key specific to this frame's shuffle session
-        shuffle_key = f'frame_{frame.id}_shuffle'
-        shown_entries = session.get(shuffle_key, [])
-
-        # If we've shown all entries, reset the tracking
-        if len(shown_entries) >= len(entries):
-            shown_entries = []
-
-        # Get available entries (those not yet shown)
-        available_entries = [entry for entry in entries 
-                            if entry.id not in shown_entries]
-
-        if available_entries:
-            chosen_entry = random.choice(available_entries)
-            shown_entries.append(chosen_entry.id)
-            session[shuffle_key] = shown_entries
-            return chosen_entry
-    return playlist[0]
-
-def update_playlist_order(frame, playlist, current_entry):
-    """Update playlist order and frame's current photo."""
-    # Find current entry's position in the playlist
-    current_index = next((i for i, entry in enumerate(playlist) if entry.id == current_entry.id), -1)
-    
-    if current_index == -1:
-        return  # Should never happen, but safety check
-
-    # Shift subsequent entries up by one
-    for entry in playlist[current_index+1:]:
-        entry.order -= 1
-
-    # Move current entry to the end
-    current_entry.order = len(playlist) - 1
+def update_playlist_order(frame, current_entry):
+    """Move the frame's playback cursor (and current photo) to the served entry.
 
-    # Update frame's current photo reference
-    frame.current_photo_id = current_entry.photo_id
+    Only the frame row is updated; entry orders are left as the user set them.
+    """
+    playlist_cursor.move_cursor(frame, current_entry, wrapped=False if frame.shuffle_enabled else None)
     frame.last_wake_time = datetime.now(timezone.utc)
     frame.next_wake_time = frame.last_wake_time + timedelta(minutes=frame.sleep_interval)
     
     db.session.commit()
+    notify_frame_changed(frame.id)
+
+def get_render_cache_key(frame, photo, variant):
+    """Build the render cache key for a photo rendered for a frame.
+
+    The key covers the source file version, the frame's image settings, the
+    inputs of every enabled overlay and the output variant, so any change
+    that would alter the rendered bytes produces a new key.
+    """
+    filename = get_orientation_filename(frame, photo)
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    try:
+        stat = os.stat(filepath)
+        source_version = [stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        source_version = None
+
+    image_settings = {
+        'contrast_factor': frame.contrast_factor,
+        'saturation': frame.saturation,
+        'blue_adjustment': frame.blue_adjustment,
+        'padding': frame.padding,
+        'color_map': frame.color_map,
+        'orientation': frame.orientation,
+        'screen_resolution': frame.screen_resolution,
+        'enhancement_backend': PhotoProcessor.enhancement_backend
+    }
+
+    overlay_inputs = {}
+    if frame.overlay_preferences and overlay_manager:
+        overlay_inputs = overlay_manager.get_cache_inputs(frame.overlay_preferences, frame, photo)
+
+    return RenderCache.make_key(photo.id, filename, source_version, image_settings, overlay_inputs, variant)
+
+def render_frame_output(frame, photo, output_type):
+    """Return the (bytes, mimetype, cache key) a frame should receive for a photo.
+
+    Repeat showings of an unchanged photo are served straight from the render
+    cache; only a miss runs the full processing pipeline.
+    """
+    variant = 'compressed' if output_type == 'compressed' else 'jpeg'
+    mimetype = 'application/octet-stream' if variant == 'compressed' else 'image/jpeg'
+
+    if output_type in epaper_encoding.OUTPUT_TYPES:
+        # Transfer-encoded e-paper buffer, derived from the cached packed render
+        variant = output_type
+        mimetype = 'application/octet-stream'
+
+    cache_key = get_render_cache_key(frame, photo, variant)
+    data = render_cache.get(cache_key)
+    if data is None:
+        def render():
+            # The render we would have waited for may have finished in the meantime
+            cached = render_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            if variant in epaper_encoding.OUTPUT_TYPES:
+                packed, _, _ = render_frame_output(frame, photo, 'compressed')
+                rendered = epaper_encoding.encode(packed, epaper_encoding.OUTPUT_TYPES[variant])
+            else:
+                rendered = render_photo(frame, photo, output_type)
+            render_cache.put(cache_key, rendered)
+            return rendered
+
+        # Frames waking together (or a request racing the pre-renderer) render it
+        # once; a sync group batch may hold the key for several renders
+        data = render_flights.do(cache_key, render, timeout=render_executor.timeout * (RENDER_BATCH_MAX_JOBS + 1))
+    return data, mimetype, cache_key
+
+def supports_partial_refresh(frame):
+    """Check whether a frame advertised partial refresh in its capabilities."""
+    return isinstance(frame.capabilities, dict) and bool(frame.capabilities.get('partial_refresh'))
+
+def render_delta_output(frame, photo):
+    """Return the (bytes, mimetype, cache key) of a delta update for a frame.
+
+    The base is the packed buffer the frame shows: the one named by the ETag
+    it sends in If-None-Match, or else the last one delivered to it. The
+    response carries the key of the new packed render as its ETag, so the
+    frame names its base on the next wake. When no base is available, the
+    frame can't refresh partially, or most tiles changed, the full buffer is
+    sent zlib-encoded instead (the header tells the two apart).
+    """
+    packed, mimetype, target_key = render_frame_output(frame, photo, 'compressed')
+
+    base_key = next((etag for etag in request.if_none_match.as_set() if render_cache.contains(etag)),
+                    last_delivered_renders.get(frame.id))
+
+    data = None
+    if supports_partial_refresh(frame) and base_key and base_key != target_key:
+        base = render_cache.get(base_key)
+        if base is not None:
+            data = epaper_encoding.encode_delta(base, packed)
+
+    if data is None:
+        data, _, _ = render_frame_output(frame, photo, 'compressed_zlib')
+
+    last_delivered_renders[frame.id] = target_key
+    return data, mimetype, target_key
+
+def frame_image_response(data, mimetype, cache_key):
+    """Build a frame image response that supports conditional GET.
+
+    The render cache key identifies the rendered bytes exactly, so it serves
+    as a strong ETag. A frame that sends it back in If-None-Match gets a 304
+    without a body when the render is unchanged (e.g. a one-photo playlist),
+    saving the radio time of the download.
+    """
+    response = Response(data, mimetype=mimetype)
+    response.set_etag(cache_key)
+    response.headers['Cache-Control'] = 'no-cache'
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        logger.debug(f"Render {cache_key[:12]} unchanged, answered with 304")
+    return response
+
+def render_photo(frame, photo, output_type):
+    """Run the render pipeline for a photo and return the encoded output bytes.
+
+    Without overlays the whole render is a single job on the render executor;
+    with overlays the image comes back from the pool, overlays are drawn here
+    (they need the live integrations), and encoding is submitted again.
+    """
+    if not has_enabled_overlays(frame):
+        output = 'compressed' if output_type == 'compressed' else 'jpeg'
+        return render_executor.run(render_job, build_render_job(frame, photo, output))
+
+    img = process_image_pipeline(frame, photo)
+    return generate_final_output(img, frame, output_type)
+
+def build_render_job(frame, photo, output):
+    """Describe a render with plain, picklable values for the render executor."""
+    filename = get_orientation_filename(frame, photo)
+    return {
+        'source_path': os.path.join(app.config['UPLOAD_FOLDER'], filename),
+        'frame': {
+            'id': frame.id,
+            'contrast_factor': frame.contrast_factor,
+            'saturation': frame.saturation,
+            'blue_adjustment': frame.blue_adjustment,
+            'padding': frame.padding,
+            'color_map': frame.color_map,
+            'screen_resolution': frame.screen_resolution,
+            'orientation': frame.orientation
+        },
+        'enhance': needs_enhancement(frame),
+        'enhancement_backend': PhotoProcessor.enhancement_backend,
+        'output': output,
+        'orientation': frame.orientation,
+        'target_size': get_render_target_size(frame)
+    }
+
+def get_render_target_size(frame):
+    """Largest size any render stage scales this frame's images to.
+
+    E-paper packing always fills 1200x1600; enhancement fits the frame's
+    screen resolution. Sources are decoded no smaller than this.
+    """
+    width, height = 1200, 1600
+    if frame.screen_resolution:
+        try:
+            res_width, res_height = (int(part) for part in frame.screen_resolution.lower().split('x'))
+            width, height = max(width, res_width), max(height, res_height)
+        except ValueError:
+            pass
+    return (width, height)
+
+def peek_next_entry(frame, session=None):
+    """Return the entry /api/next_photo will serve next without advancing the playlist.
+
+    Returns None when the choice can't be predicted (a used-up shuffle bag is
+    dealt again at request time).
+    """
+    session = session or db.session
+    if frame.shuffle_enabled:
+        return shuffle_bag.peek_shuffled(session, PlaylistEntry, frame)
+    entry, _ = playlist_cursor.peek_next(session, PlaylistEntry, frame)
+    return entry
+
+def frame_topic(frame_id):
+    """Event broker topic carrying a frame's transitions."""
+    return f"frame:{frame_id}"
+
+def build_frame_transition_event(session, frame):
+    """Describe a frame's current photo and timing for its event stream.
+
+    Uses the same field names as /api/frame/<id>; next_photo is a preload
+    hint for the browser.
+    """
+    current = session.get(Photo, frame.current_photo_id) if frame.current_photo_id else None
+    next_entry = peek_next_entry(frame, session)
+    upcoming = session.get(Photo, next_entry.photo_id) if next_entry else None
+
+    return {
+        'id': frame.id,
+        'current_photo': get_orientation_filename(frame, current) if current else None,
+        'media_type': (current.media_type or 'photo') if current else None,
+        'next_photo': get_orientation_filename(frame, upcoming) if upcoming else None,
+        'sleep_interval': frame.sleep_interval,
+        'last_wake_time': frame.last_wake_time.isoformat() if frame.last_wake_time else None,
+        'next_wake_time': frame.next_wake_time.isoformat() if frame.next_wake_time else None,
+        'deep_sleep_status': is_in_deep_sleep(frame)
+    }
+
+def publish_frame_transition(session, frame):
+    """Push a committed transition to the frame's open event streams (FrameTimingManager callback)."""
+    notify_frame_changed(frame.id)
+    topic = frame_topic(frame.id)
+    if not event_broker.has_subscribers(topic):
+        return
+    event_broker.publish(topic, 'transition', build_frame_transition_event(session, frame))
+
+def notify_frame_changed(frame_id):
+    """Tell open dashboards that a frame's state changed (call after committing)."""
+    if dashboard_feed:
+        dashboard_feed.notify(frame_id)
+
+def warm_render_cache(frame, photo):
+    """Render a photo for a frame into the render cache ahead of the request.
+
+    Both the JPEG and the packed e-paper variants are rendered, since either
+    may be requested. Variants already in the cache are skipped.
+
+    Returns:
+        int: Number of variants that had to be rendered
+    """
+    if photo.media_type == 'video':
+        return 0
+
+    rendered = 0
+    for output_type, variant in (('compressed', 'compressed'), (None, 'jpeg')):
+        if render_cache.contains(get_render_cache_key(frame, photo, variant)):
+            continue
+        render_frame_output(frame, photo, output_type)
+        rendered += 1
+    return rendered
+
+def warm_render_batch(pairs):
+    """Render several frames' photos into the render cache as one batch.
+
+    Used for the members of a sync group ahead of their shared boundary.
+    Renders that read the same source file at the same size are done in one
+    executor job that decodes the source once (up to RENDER_BATCH_MAX_JOBS
+    per job); different sources render in parallel. Each output is claimed in
+    the render single-flight first, so frame requests arriving mid-batch wait
+    for it rather than rendering again.
+
+    Args:
+        pairs: List of (frame, photo)
+
+    Returns:
+        int: Number of variants rendered
+    """
+    planned = []  # (cache key, flight, frame, photo, output)
+    try:
+        for frame, photo in pairs:
+            if photo.media_type == 'video':
+                continue
+            for output in ('compressed', 'jpeg'):
+                cache_key = get_render_cache_key(frame, photo, output)
+                if render_cache.contains(cache_key):
+                    continue
+                call, leader = render_flights.begin(cache_key)
+                if leader:
+                    planned.append((cache_key, call, frame, photo, output))
+
+        if not planned:
+            return 0
+
+        # Overlays are drawn here after the pool returns the image, so those frames
+        # get one 'raw' render for both outputs
+        batches = {}
+        raw_results = {}
+        for cache_key, call, frame, photo, output in planned:
+            overlays = has_enabled_overlays(frame)
+            job = build_render_job(frame, photo, 'raw' if overlays else output)
+            if overlays and (frame.id, photo.id) in raw_results:
+                continue
+            if overlays:
+                raw_results[(frame.id, photo.id)] = None
+            batch_key = (job['source_path'], tuple(job['target_size']))
+            batches.setdefault(batch_key, []).append((job, cache_key, frame, photo))
+
+        # A batch's renders run one after another in a single worker, so large
+        # groups of one source are split to spread over the pool
+        batch_list = [batch[index:index + RENDER_BATCH_MAX_JOBS]
+                      for batch in batches.values()
+                      for index in range(0, len(batch), RENDER_BATCH_MAX_JOBS)]
+        # Allow render_timeout_seconds per render a worker does in sequence
+        waves = math.ceil(len(batch_list) / max(1, render_executor.max_workers))
+        timeout = render_executor.timeout * waves * max(len(batch) for batch in batch_list)
+        results = render_executor.run_many(render_batch_job, [([job for job, _, _, _ in batch],) for batch in batch_list],
+                                           timeout=timeout)
+
+        outputs = {}
+        for batch, batch_results in zip(batch_list, results):
+            for (job, cache_key, frame, photo), result in zip(batch, batch_results):
+                if job['output'] == 'raw':
+                    raw_results[(frame.id, photo.id)] = result
+                else:
+                    outputs[cache_key] = result
+
+        overlaid = {}
+        for cache_key, call, frame, photo, output in planned:
+            if cache_key not in outputs:
+                if (frame.id, photo.id) not in overlaid:
+                    img = image_from_payload(raw_results[(frame.id, photo.id)])
+                    overlay_img = apply_overlays(img, frame, photo)
+                    overlaid[(frame.id, photo.id)] = overlay_img if overlay_img is not None else img
+                outputs[cache_key] = generate_final_output(overlaid[(frame.id, photo.id)], frame, output)
+            render_cache.put(cache_key, outputs[cache_key])
+            render_flights.finish(cache_key, call, result=outputs[cache_key])
+    except Exception as e:
+        # Release every claimed key; waiting requests see the error and the next request retries
+        for cache_key, call, _, _, _ in planned:
+            if not call.done.is_set():
+                render_flights.finish(cache_key, call, error=e)
+        raise
+
+    return len(planned)
 
 def process_image_pipeline(frame, photo):
+    """Unified image processing pipeline.
+
+    Each stage hands a PIL image to the next in memory; nothing is written
+    to disk until the final output is encoded. Loading and enhancement run
+    on the render executor.
+
+    Returns:
+        PIL.Image: The rendered image, ready for generate_final_output
+    """
     logger.info(f"process_image_pipeline")
-    """Unified image processing pipeline."""
-    # Load base image
-    img = load_base_image(frame, photo)
-    
-    # Apply enhancements
-    if needs_enhancement(frame):
-        img = apply_enhancements(img, frame)
-    
-    # Create temp file for remaining processing
-    temp_path = create_temp_image(img)
+    # Load and enhance the base image in a worker process
+    img = image_from_payload(render_executor.run(render_job, build_render_job(frame, photo, 'raw')))
     
     # Apply overlays
-    if frame.overlay_preferences:
-        overlay_img = apply_overlays(temp_path, frame, photo)
-        overlay_img.save(temp_path)  # Overwrite temp file with overlay
+    if has_enabled_overlays(frame):
+        overlay_img = apply_overlays(img, frame, photo)
+        if overlay_img is not None:
+            img = overlay_img
+        else:
+            logger.error(f"Overlay application failed for frame {frame.id}, serving image without overlays")
     
-    return temp_path
-
-def load_base_image(frame, photo):
-    """Load appropriate base image version."""
-    filename = get_orientation_filename(frame, photo)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    return Image.open(filepath)
+    return img
 
 def get_orientation_filename(frame, photo):
     """Get filename for correct orientation version."""
@@ -2636,35 +2777,42 @@ def needs_enhancement(frame):
             frame.saturation != 100 or 
             frame.blue_adjustment != 0)
 
-def apply_enhancements(img, frame):
-    """Apply image enhancements based on frame settings"""
-    from photo_processing import PhotoProcessor
-    processor = PhotoProcessor()
-    return processor.enhance_image(img, frame)
+def has_enabled_overlays(frame):
+    """Check whether the frame has any overlay switched on."""
+    if not frame.overlay_preferences:
+        return False
+    try:
+        preferences = json.loads(frame.overlay_preferences)
+    except (TypeError, ValueError):
+        return False
+    return isinstance(preferences, dict) and any(preferences.values())
 
-def apply_overlays(temp_path, frame, photo):
-    """Apply configured overlays to image."""
+def apply_overlays(img, frame, photo):
+    """Apply configured overlays to an in-memory image."""
     overlay_prefs = json.loads(frame.overlay_preferences) if frame.overlay_preferences else {}
-    return overlay_manager.apply_overlays(temp_path, overlay_prefs, frame, photo)
+    return overlay_manager.apply_overlays(img, overlay_prefs, frame, photo)
+
+def generate_final_output(img, frame, output_type):
+    """Encode the rendered image into the output bytes for the requested type."""
+    output = 'compressed' if output_type == 'compressed' else 'jpeg'
+    return render_executor.run(encode_job, {
+        'image': image_to_payload(img),
+        'output': output,
+        'orientation': frame.orientation
+    })
 
-def generate_final_output(image_path, frame, output_type):
-    """Generate final output based on requested type."""
-    if output_type == 'compressed':
-        return generate_compressed_output(image_path, frame.orientation)
-    
-    # Cleanup temp files after sending
-    response = send_file(image_path, mimetype='image/jpeg')
-    response.call_on_close(lambda: cleanup_temp_files(os.path.dirname(image_path)))
-    return response
+def generate_compressed_output(image, orientation):
+    """Generate compressed output bytes for e-paper displays.
 
-def generate_compressed_output(image_path, orientation):
-    """Generate compressed output for e-paper displays."""
+    Args:
+        image: PIL Image, or path to an image file
+        orientation: Frame orientation ('portrait' or 'landscape')
+    """
     app.logger.info(f"Calling imgToArray")
-    from imgToArray import img_to_array
-    img = Image.open(image_path)
-    raw_bytes = img_to_array(img, orientation)
-    cleanup_temp_files(os.path.dirname(image_path))
-    return Response(raw_bytes, mimetype='application/octet-stream')
+    if isinstance(image, str):
+        with Image.open(image) as img:
+            return img_to_array(img, orientation)
+    return img_to_array(image, orientation)
 
 def get_size_str(size_bytes):
     """Convert bytes to human readable string"""
@@ -2743,14 +2891,15 @@ def get_frame_diagnostics():
     
     frames = PhotoFrame.query.all()
     frames_info['total'] = len(frames)
+
+    # Playlist sizes of all frames in one query
+    playlist_counts = dict(db.session.query(PlaylistEntry.frame_id, db.func.count(PlaylistEntry.id))
+                           .group_by(PlaylistEntry.frame_id).all())
     
     current_time = datetime.now()
     online_threshold = timedelta(minutes=5)
     
     for frame in frames:
-        # Get frame's playlist using PlaylistEntry
-        playlist = PlaylistEntry.query.filter_by(frame_id=frame.id).order_by(PlaylistEntry.order).all()
-        
         last_ping = frame.last_wake_time or datetime.min
         is_online = (current_time - last_ping) < online_threshold
         
@@ -2764,7 +2913,7 @@ def get_frame_diagnostics():
         else:
             status = f"Offline (Last seen {frame.last_wake_time.strftime('%Y-%m-%d %H:%M:%S')})"
         
-        frames_info['total_photos'] += len(playlist)
+        frames_info['total_photos'] += playlist_counts.get(frame.id, 0)
         
         # Get the latest diagnostic data
         diagnostics = frame.last_diagnostic
@@ -2779,7 +2928,7 @@ def get_frame_diagnostics():
             'name': frame.name,
             'is_online': is_online,
             'last_seen': frame.last_wake_time.strftime('%Y-%m-%d %H:%M:%S') if frame.last_wake_time else "Never",
-            'photo_count': len(playlist),
+            'photo_count': playlist_counts.get(frame.id, 0),
             'status': status,
             'ip': getattr(frame, 'last_ip', "Unknown"),
             'version': diagnostics.get('version') if diagnostics else None,
@@ -3231,19 +3380,8 @@ def add_to_playlist():
         ).first()
         
         if existing_entry:
-            # Instead of returning an error, move the photo to the top of the playlist
-            current_order = existing_entry.order
-            
-            # Update entries with order less than the current entry
-            db.session.query(PlaylistEntry)\
-                .filter(PlaylistEntry.frame_id == frame_id)\
-                .filter(PlaylistEntry.order < current_order)\
-                .update({
-                    PlaylistEntry.order: PlaylistEntry.order + 1
-                })
-            
-            # Move the existing entry to the top (order 0)
-            existing_entry.order = 0
+            # Instead of returning an error, move the photo up so it plays next
+            playlist_cursor.move_to_next_up(db.session, PlaylistEntry, frame, existing_entry)
             db.session.commit()
             
             if hasattr(app, 'mqtt_integration'):
@@ -3254,18 +3392,11 @@ def add_to_playlist():
                 'message': f'Photo moved to the top of {frame.name or frame.id}\'s playlist'
             })
             
-        # Shift all existing playlist entries down by one
-        db.session.query(PlaylistEntry)\
-            .filter_by(frame_id=frame_id)\
-            .update({
-                PlaylistEntry.order: PlaylistEntry.order + 1
-            })
-        
-        # Create new playlist entry at order 0 (next up)
+        # Create new playlist entry right after the playback cursor (next up)
         playlist_entry = PlaylistEntry(
             frame_id=frame_id,
             photo_id=photo_id,
-            order=0  # This will be the next up photo
+            order=playlist_cursor.next_up_order(db.session, PlaylistEntry, frame)
         )
         
         db.session.add(playlist_entry)
@@ -3631,7 +3762,7 @@ def test_overlay(frame_id):
     if not frame:
         return jsonify({'error': 'Frame not found'}), 404
 
-    playlist = PlaylistEntry.query.filter_by(frame_id=frame_id).order_by(PlaylistEntry.order).first()
+    playlist, _ = playlist_cursor.peek_next(db.session, PlaylistEntry, frame)
     if not playlist or not playlist.photo:
         return jsonify({'error': 'No photos in playlist'}), 404
 
@@ -3651,20 +3782,15 @@ def test_overlay(frame_id):
         processor = PhotoProcessor()
         enhanced_img = processor.enhance_image(img, use_frame)
 
-        # Create temporary file for overlay processing
-        temp_path = create_temp_image(enhanced_img)
-        
         # Apply overlays using the existing overlay manager
         overlay_prefs = json.loads(use_frame.overlay_preferences) if use_frame.overlay_preferences else {}
         final_img = overlay_manager.apply_overlays(
-            image_path=temp_path,
+            image=enhanced_img,
             preferences=overlay_prefs,
             frame=use_frame,
             photo=photo
         )
 
-        # Cleanup and return
-        os.remove(temp_path)
         return serve_pil_image(final_img)
 
     except Exception as e:
@@ -3695,12 +3821,13 @@ def handle_preview_settings(frame, args):
         return preview_frame
     return frame
 
-def create_temp_image(img):
-    temp_dir = app.config['UPLOAD_FOLDER']
-    temp_name = f"temp_{uuid.uuid4().hex}.jpg"
-    temp_path = os.path.join(temp_dir, temp_name)
-    img.save(temp_path)
-    return temp_path
+def encode_image(img, format='JPEG', **save_kwargs):
+    """Encode a PIL image in memory and return the bytes."""
+    if format == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    img_io = io.BytesIO()
+    img.save(img_io, format, **save_kwargs)
+    return img_io.getvalue()
 
 def serve_pil_image(pil_img):
     img_io = io.BytesIO()
@@ -3763,6 +3890,8 @@ def delete_frame(frame_id):
         # Delete the frame
         db.session.delete(frame)
         db.session.commit()
+        notify_frame_changed(frame_id)
+        wake_scheduler.forget(frame_id)
         
         return jsonify({
             'success': True,
@@ -3939,13 +4068,15 @@ def execute_generation(schedule_id):
 
                 # Clear existing frame playlist
                 PlaylistEntry.query.filter_by(frame_id=schedule.frame_id).delete()
+                if schedule.frame:
+                    playlist_cursor.reset_cursor(schedule.frame)
 
                 # Add new entries
                 for order, entry in enumerate(valid_entries, 1):
                     new_entry = PlaylistEntry(
                         frame_id=schedule.frame_id,
                         photo_id=entry.photo_id,
-                        order=order
+                        order=order * playlist_ordering.ORDER_GAP
                     )
                     db.session.add(new_entry)
 
@@ -4003,9 +4134,7 @@ def execute_generation(schedule_id):
         playlist_entry = PlaylistEntry(
             frame_id=schedule.frame_id,
             photo_id=photo.id,
-            order=db.session.query(db.func.max(PlaylistEntry.order))
-                      .filter_by(frame_id=schedule.frame_id)
-                      .scalar() or 0 + 1
+            order=playlist_ordering.order_at_end(db.session, PlaylistEntry, frame_id=schedule.frame_id)
         )
         db.session.add(playlist_entry)
         
@@ -4187,17 +4316,20 @@ def import_frame_settings(frame_id):
         # Delete existing playlist entries
         PlaylistEntry.query.filter_by(frame_id=frame_id).delete()
 
-        # Copy playlist entries
-        source_playlist = PlaylistEntry.query.filter_by(frame_id=source_frame_id)\
-                                           .order_by(PlaylistEntry.order).all()
+        # Copy playlist entries in play order, so the copy starts where the source is
+        source_playlist = playlist_cursor.play_order(
+            PlaylistEntry.query.filter_by(frame_id=source_frame_id)
+                               .order_by(PlaylistEntry.order, PlaylistEntry.id).all(),
+            source_frame)
         
-        for entry in source_playlist:
+        for order, entry in enumerate(source_playlist):
             new_entry = PlaylistEntry(
                 frame_id=frame_id,
                 photo_id=entry.photo_id,
-                order=entry.order
+                order=order * playlist_ordering.ORDER_GAP
             )
             db.session.add(new_entry)
+        playlist_cursor.reset_cursor(target_frame)
 
         db.session.commit()
 
@@ -4302,6 +4434,65 @@ def get_frame(frame_id):
         'next_wake_time': next_wake_time
     })
 
+@app.route('/api/dashboard/frames')
+def get_dashboard_frames():
+    """Get status, current and next photo of every frame in one response (dashboard polling)."""
+    return jsonify(dashboard_loader.get())
+
+@app.route('/api/frame/<frame_id>/events')
+def frame_events(frame_id):
+    """Stream a frame's transitions as Server-Sent Events.
+
+    Browser frames keep this connection open instead of polling; the current
+    state is sent first so a reconnecting client catches up at once.
+    """
+    frame = db.session.get(PhotoFrame, frame_id)
+    if not frame:
+        return jsonify({'error': 'Frame not found'}), 404
+
+    # Subscribe before reading the state so no transition falls in between
+    subscription = event_broker.subscribe(frame_topic(frame.id))
+    initial = [('transition', build_frame_transition_event(db.session, frame))]
+
+    # Give the connection back to the pool; the stream may stay open for hours
+    db.session.close()
+
+    response = Response(event_broker.stream(subscription, initial),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(subscription.close)
+    return response
+
+@app.route('/api/events/stats')
+def get_event_stats():
+    """Return event stream and frame timing statistics."""
+    return jsonify({
+        'event_broker': event_broker.get_stats(),
+        'frame_timing': frame_timing_manager.get_stats() if frame_timing_manager else None,
+        'dashboard_feed': dashboard_feed.get_stats() if dashboard_feed else None,
+        'dashboard_loader': dashboard_loader.get_stats()
+    })
+
+@app.route('/api/dashboard/events')
+def dashboard_events():
+    """Stream frame view changes to the dashboard as Server-Sent Events.
+
+    A 'snapshot' event with every frame is sent first, then a 'frames' event
+    with only the frames that changed whenever a frame wakes, reports
+    diagnostics or transitions.
+    """
+    subscription = event_broker.subscribe(DashboardFeed.TOPIC)
+    initial = [('snapshot', dashboard_feed.snapshot() if dashboard_feed else dashboard_loader.get())]
+
+    # Give the connection back to the pool; dashboards stay open for hours
+    db.session.close()
+
+    response = Response(event_broker.stream(subscription, initial),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(subscription.close)
+    return response
+
 @app.route('/api/frame/<frame_id>/next')
 def next_photo(frame_id):
     """Navigate to the next photo in the playlist."""
@@ -4312,88 +4503,20 @@ def next_photo(frame_id):
     
     # Use the frame timing manager for virtual frames
     if frame.frame_type == 'virtual':
-        # Get all playlist entries ordered by order
-        playlist = PlaylistEntry.query.filter_by(frame_id=frame_id)\
-                                    .order_by(PlaylistEntry.order).all()
-        
-        if not playlist:
-            return jsonify({'error': 'Playlist is empty'}), 404
-        
-        # First, call the frame timing manager to handle the transition
-        # This will update the current_photo_id to the next photo in the playlist
+        # The frame timing manager moves the playback cursor to the next photo
         result = frame_timing_manager.force_transition(frame_id, direction='next')
         if isinstance(result, tuple):  # Error case
             return jsonify(result[0]), result[1]
         
-        # After the transition, get the updated frame with the new current_photo_id
-        frame = db.session.get(PhotoFrame, frame_id)
-        if not frame or not frame.current_photo_id:
-            return jsonify({'error': 'Frame update failed'}), 500
-        
-        # Now update the playlist order based on the new current_photo_id
-        # Find the current photo's entry in the playlist
-        current_entry = None
-        for entry in playlist:
-            if entry.photo_id == frame.current_photo_id:
-                current_entry = entry
-                break
-        
-        if current_entry:
-            # Reorder the playlist by moving all entries up one position
-            # and the current entry to the bottom
-            current_order = current_entry.order
-            
-            # Shift entries between current and end up by one position
-            for entry in playlist:
-                if entry.photo_id != current_entry.photo_id and entry.order > current_order:
-                    entry.order -= 1
-            
-            # Move the current entry to the bottom
-            current_entry.order = len(playlist) - 1
-            
-            db.session.commit()
-            app.logger.info(f"Updated playlist order for virtual frame {frame_id} after transition")
-        
         return jsonify(result)
     
-    # For physical frames, use the existing logic
-    # Get all playlist entries ordered by order
-    playlist = PlaylistEntry.query.filter_by(frame_id=frame_id).order_by(PlaylistEntry.order).all()
+    # For physical frames, move the playback cursor directly
+    next_entry = playlist_cursor.advance(db.session, PlaylistEntry, frame)
     
     # Check if playlist is empty
-    if not playlist:
+    if not next_entry:
         return jsonify({'error': 'Playlist is empty'}), 404
     
-    # Find the current photo's position in the playlist
-    current_position = 0
-    if frame.current_photo_id:
-        for i, entry in enumerate(playlist):
-            if entry.photo_id == frame.current_photo_id:
-                current_position = i
-                break
-    
-    # Get the next photo (or loop back to the first)
-    next_position = (current_position + 1) % len(playlist)
-    next_entry = playlist[next_position]
-    
-    # Update the frame's current photo
-    frame.current_photo_id = next_entry.photo_id
-    
-    # Move the current entry to the bottom of the playlist
-    # and shift all entries after it up by one
-    current_entry = playlist[current_position]
-    current_order = current_entry.order
-    
-    # Shift entries between current and end up by one position
-    for entry in playlist:
-        if entry.order > current_order:
-            entry.order -= 1
-    
-    # Move current to the end
-    current_entry.order = len(playlist) - 1
-    
-    db.session.commit()
-    
     # Get the updated photo
     photo = db.session.get(Photo, next_entry.photo_id)
     
@@ -4420,88 +4543,20 @@ def prev_photo(frame_id):
     
     # Use the frame timing manager for virtual frames
     if frame.frame_type == 'virtual':
-        # Get all playlist entries ordered by order
-        playlist = PlaylistEntry.query.filter_by(frame_id=frame_id)\
-                                    .order_by(PlaylistEntry.order).all()
-        
-        if not playlist:
-            return jsonify({'error': 'Playlist is empty'}), 404
-        
-        # First, call the frame timing manager to handle the transition
-        # This will update the current_photo_id to the previous photo in the playlist
+        # The frame timing manager moves the playback cursor to the previous photo
         result = frame_timing_manager.force_transition(frame_id, direction='prev')
         if isinstance(result, tuple):  # Error case
             return jsonify(result[0]), result[1]
         
-        # After the transition, get the updated frame with the new current_photo_id
-        frame = db.session.get(PhotoFrame, frame_id)
-        if not frame or not frame.current_photo_id:
-            return jsonify({'error': 'Frame update failed'}), 500
-        
-        # Now update the playlist order based on the new current_photo_id
-        # Find the current photo's entry in the playlist
-        current_entry = None
-        for entry in playlist:
-            if entry.photo_id == frame.current_photo_id:
-                current_entry = entry
-                break
-        
-        if current_entry:
-            # Reorder the playlist by moving all entries up one position
-            # and the current entry to the bottom
-            current_order = current_entry.order
-            
-            # Shift entries between current and end up by one position
-            for entry in playlist:
-                if entry.photo_id != current_entry.photo_id and entry.order > current_order:
-                    entry.order -= 1
-            
-            # Move the current entry to the bottom
-            current_entry.order = len(playlist) - 1
-            
-            db.session.commit()
-            app.logger.info(f"Updated playlist order for virtual frame {frame_id} after transition")
-        
         return jsonify(result)
     
-    # For physical frames, use the existing logic
-    # Get all playlist entries ordered by order
-    playlist = PlaylistEntry.query.filter_by(frame_id=frame_id).order_by(PlaylistEntry.order).all()
+    # For physical frames, move the playback cursor directly
+    prev_entry = playlist_cursor.rewind(db.session, PlaylistEntry, frame)
     
     # Check if playlist is empty
-    if not playlist:
+    if not prev_entry:
         return jsonify({'error': 'Playlist is empty'}), 404
     
-    # Find the current photo's position in the playlist
-    current_position = 0
-    if frame.current_photo_id:
-        for i, entry in enumerate(playlist):
-            if entry.photo_id == frame.current_photo_id:
-                current_position = i
-                break
-    
-    # Get the previous photo (or loop back to the last)
-    prev_position = (current_position - 1) % len(playlist)
-    prev_entry = playlist[prev_position]
-    
-    # Update the frame's current photo
-    frame.current_photo_id = prev_entry.photo_id
-    
-    # Move the current entry to the bottom of the playlist
-    # and shift all entries after it up by one
-    current_entry = playlist[current_position]
-    current_order = current_entry.order
-    
-    # Shift entries between current and end up by one position
-    for entry in playlist:
-        if entry.order > current_order:
-            entry.order -= 1
-    
-    # Move current to the end
-    current_entry.order = len(playlist) - 1
-    
-    db.session.commit()
-    
     # Get the updated photo
     photo = db.session.get(Photo, prev_entry.photo_id)
     
@@ -4677,6 +4732,7 @@ def get_sync_groups():
             'id': group.id,
             'name': group.name,
             'sleep_interval': group.sleep_interval,
+            'shared_shuffle': bool(group.shuffle_seed),
             'frames': [{
                 'id': frame.id,
                 'name': frame.name,
@@ -4694,7 +4750,9 @@ def create_sync_group():
         data = request.get_json()
         group = SyncGroup(
             name=data['name'],
-            sleep_interval=float(data.get('sleep_interval', 5.0))
+            sleep_interval=float(data.get('sleep_interval', 5.0)),
+            # A shared seed makes shuffled member frames deal the same order
+            shuffle_seed=shuffle_bag.new_seed() if data.get('shared_shuffle') else None
         )
         db.session.add(group)
         db.session.commit()
@@ -4715,7 +4773,8 @@ def get_sync_group(group_id):
         return jsonify({
             "id": group.id,
             "name": group.name,
-            "sleep_interval": group.sleep_interval
+            "sleep_interval": group.sleep_interval,
+            "shared_shuffle": bool(group.shuffle_seed)
         })
     except Exception as e:
         logger.error(f"Error getting sync group: {e}")
@@ -4732,6 +4791,11 @@ def edit_sync_group(group_id):
         data = request.get_json()
         group.name = data.get('name', group.name)
         group.sleep_interval = float(data.get('sleep_interval', group.sleep_interval))
+        if 'shared_shuffle' in data and bool(data['shared_shuffle']) != bool(group.shuffle_seed):
+            group.shuffle_seed = shuffle_bag.new_seed() if data['shared_shuffle'] else None
+            # Members switch between the group order and their own on their next pick
+            for frame in group.frames:
+                shuffle_bag.invalidate(frame)
         
         # Update sleep intervals for all frames in the group
         for frame in group.frames:
@@ -4782,6 +4846,9 @@ def add_frame_to_group(group_id):
         
         frame.sync_group = group
         frame.sleep_interval = group.sleep_interval
+        if group.shuffle_seed:
+            # Join the group's shuffle order on the next pick
+            shuffle_bag.invalidate(frame)
         
         db.session.commit()
         return jsonify({"success": True})
@@ -4801,6 +4868,8 @@ def remove_frame_from_group(group_id, frame_id):
             return jsonify({"error": "Frame not found in group"}), 404
         
         logger.info(f"Removing frame {frame_id} from group {group_id}")
+        if frame.sync_group and frame.sync_group.shuffle_seed:
+            shuffle_bag.invalidate(frame)
         frame.sync_group_id = None
         frame.last_sync_time = None
         frame.next_wake_time = None
@@ -4826,6 +4895,57 @@ def get_server_time():
         "utc_offset": (local - now).total_seconds() / 3600
     })
 
+@app.route('/api/wake-load')
+def get_wake_load():
+    """Projected frame wakes per time slot (?minutes= window length, default 60, max 1440)."""
+    try:
+        minutes = min(max(int(request.args.get('minutes', 60)), 1), 1440)
+    except ValueError:
+        return jsonify({'error': 'minutes must be an integer'}), 400
+    return jsonify(dict(wake_scheduler.histogram(minutes=minutes), stats=wake_scheduler.get_stats()))
+
+@app.route('/api/render/stats')
+def get_render_stats():
+    """Return render pipeline statistics (render cache usage and hit rate)."""
+    return jsonify({
+        'render_cache': render_cache.stats(),
+        'prerender': prerender_worker.get_stats() if prerender_worker else None,
+        'sync_group_prerender': sync_group_renderer.get_stats() if sync_group_renderer else None,
+        'single_flight': render_flights.get_stats(),
+        'render_executor': render_executor.get_stats(),
+        'decode': get_decode_stats(),
+        'overlay_layers': overlay_manager.get_layer_stats()
+    })
+
+@app.route('/api/jobs/<job_id>')
+def get_ingest_job(job_id):
+    """Return the status and progress of an upload ingest job."""
+    job = db.session.get(IngestJob, job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+@app.route('/api/jobs')
+def list_ingest_jobs():
+    """List recent upload ingest jobs, newest first (optionally filtered by ?status=)."""
+    query = IngestJob.query
+    status = request.args.get('status')
+    if status:
+        query = query.filter_by(status=status)
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    jobs = query.order_by(IngestJob.created_at.desc()).limit(limit).all()
+    return jsonify({
+        'success': True,
+        'jobs': [job.to_dict() for job in jobs],
+        'queue': ingest_queue.get_stats() if ingest_queue else None
+    })
+
+@app.route('/api/render/cache/clear', methods=['POST'])
+def clear_render_cache():
+    """Drop every cached render, forcing frames to be re-rendered."""
+    render_cache.clear()
+    return jsonify({'success': True})
+
 @app.route('/api/frames/<frame_id>/toggle_shuffle', methods=['POST'])
 def toggle_frame_shuffle(frame_id):
     frame = PhotoFrame.query.get_or_404(frame_id)
@@ -4847,6 +4967,7 @@ def clear_frame_playlist(frame_id):
     
     # Remove all playlist entries for this frame
     PlaylistEntry.query.filter_by(frame_id=frame_id).delete()
+    playlist_cursor.reset_cursor(frame)
     db.session.commit()
     
     if hasattr(app, 'mqtt_integration'):
@@ -4868,7 +4989,21 @@ def load_server_settings():
         'cleanup_interval': 24,  # hours
         'log_level': 'INFO',
         'max_upload_size': 10,  # MB
-        'discovery_port': ZEROCONF_PORT
+        'discovery_port': ZEROCONF_PORT,
+        'render_cache_size_mb': 256,
+        'enhancement_backend': 'pillow',
+        'prerender_enabled': True,
+        'prerender_lead_seconds': 120,
+        'sync_group_prerender_enabled': True,  # Render each sync group's frames in one batch before the boundary
+        'sync_group_prerender_lead_seconds': 90,
+        'render_workers': None,  # None = one per CPU core, 0 = render in-process
+        'render_timeout_seconds': 60,
+        'ingest_workers': 2,  # Uploads processed concurrently in the background
+        'dashboard_cache_seconds': 5,  # How long the frame dashboard's view model is reused
+        'dashboard_refresh_seconds': 60,  # How often open dashboards re-check time-based frame status
+        'wake_smoothing_enabled': False,  # Nudge non-grouped frames' wakes apart to spread render load
+        'wake_smoothing_tolerance_percent': 5,  # Largest nudge as a percentage of the sleep interval
+        'wake_smoothing_max_shift_seconds': 60  # ...and in seconds
     }
     
     try:
@@ -4922,6 +5057,50 @@ def update_server_settings():
             current_settings['ai_analysis_enabled'] = bool(data['ai_analysis_enabled'])
         if 'dark_mode' in data:  # Add dark_mode handling
             current_settings['dark_mode'] = bool(data['dark_mode'])
+        if 'render_cache_size_mb' in data and isinstance(data['render_cache_size_mb'], int) and data['render_cache_size_mb'] > 0:
+            current_settings['render_cache_size_mb'] = data['render_cache_size_mb']
+            render_cache.set_max_bytes(data['render_cache_size_mb'] * 1024 * 1024)
+        if 'prerender_enabled' in data:
+            current_settings['prerender_enabled'] = bool(data['prerender_enabled'])
+        if 'prerender_lead_seconds' in data and isinstance(data['prerender_lead_seconds'], int) and data['prerender_lead_seconds'] >= 0:
+            current_settings['prerender_lead_seconds'] = data['prerender_lead_seconds']
+            if prerender_worker:
+                prerender_worker.lead_seconds = data['prerender_lead_seconds']
+        if 'wake_smoothing_enabled' in data:
+            current_settings['wake_smoothing_enabled'] = bool(data['wake_smoothing_enabled'])
+            wake_scheduler.enabled = current_settings['wake_smoothing_enabled']
+        if 'wake_smoothing_tolerance_percent' in data and isinstance(data['wake_smoothing_tolerance_percent'], (int, float)) and 0 <= data['wake_smoothing_tolerance_percent'] <= 50:
+            current_settings['wake_smoothing_tolerance_percent'] = data['wake_smoothing_tolerance_percent']
+            wake_scheduler.tolerance_percent = data['wake_smoothing_tolerance_percent']
+        if 'wake_smoothing_max_shift_seconds' in data and isinstance(data['wake_smoothing_max_shift_seconds'], (int, float)) and data['wake_smoothing_max_shift_seconds'] >= 0:
+            current_settings['wake_smoothing_max_shift_seconds'] = data['wake_smoothing_max_shift_seconds']
+            wake_scheduler.max_shift_seconds = data['wake_smoothing_max_shift_seconds']
+        if 'sync_group_prerender_enabled' in data:
+            # Takes effect on the next server start
+            current_settings['sync_group_prerender_enabled'] = bool(data['sync_group_prerender_enabled'])
+        if 'sync_group_prerender_lead_seconds' in data and isinstance(data['sync_group_prerender_lead_seconds'], int) and data['sync_group_prerender_lead_seconds'] >= 0:
+            current_settings['sync_group_prerender_lead_seconds'] = data['sync_group_prerender_lead_seconds']
+            if sync_group_renderer:
+                sync_group_renderer.lead_seconds = data['sync_group_prerender_lead_seconds']
+        if 'render_timeout_seconds' in data and isinstance(data['render_timeout_seconds'], int) and data['render_timeout_seconds'] > 0:
+            current_settings['render_timeout_seconds'] = data['render_timeout_seconds']
+            render_executor.timeout = data['render_timeout_seconds']
+        if 'render_workers' in data and (data['render_workers'] is None or (isinstance(data['render_workers'], int) and data['render_workers'] >= 0)):
+            # Worker count takes effect on the next server start
+            current_settings['render_workers'] = data['render_workers']
+        if 'ingest_workers' in data and isinstance(data['ingest_workers'], int) and data['ingest_workers'] > 0:
+            # Takes effect on the next server start
+            current_settings['ingest_workers'] = data['ingest_workers']
+        if 'dashboard_cache_seconds' in data and isinstance(data['dashboard_cache_seconds'], (int, float)) and data['dashboard_cache_seconds'] >= 0:
+            current_settings['dashboard_cache_seconds'] = data['dashboard_cache_seconds']
+            dashboard_loader.ttl = data['dashboard_cache_seconds']
+        if 'dashboard_refresh_seconds' in data and isinstance(data['dashboard_refresh_seconds'], (int, float)) and data['dashboard_refresh_seconds'] >= 5:
+            current_settings['dashboard_refresh_seconds'] = data['dashboard_refresh_seconds']
+            if dashboard_feed:
+                dashboard_feed.refresh_interval = data['dashboard_refresh_seconds']
+        if 'enhancement_backend' in data and data['enhancement_backend'] in ENHANCEMENT_BACKENDS:
+            current_settings['enhancement_backend'] = data['enhancement_backend']
+            PhotoProcessor.enhancement_backend = data['enhancement_backend']
         
         if save_server_settings(current_settings):
             # Apply settings that need immediate effect
@@ -4989,13 +5168,14 @@ def update_dynamic_playlist(frame_id):
         if matching_photos:
             # Remove existing playlist entries
             PlaylistEntry.query.filter_by(frame_id=frame_id).delete()
+            playlist_cursor.reset_cursor(frame)
             
             # Add new matching photos
             for i, photo in enumerate(matching_photos):
                 entry = PlaylistEntry(
                     frame_id=frame_id,
                     photo_id=photo.id,
-                    order=i
+                    order=i * playlist_ordering.ORDER_GAP
                 )
                 db.session.add(entry)
         
@@ -5341,10 +5521,8 @@ def add_unsplash_to_frame():
         if not frame:
             return jsonify({'error': 'Frame not found'}), 404
 
-        # Get current max order
-        max_order = db.session.query(db.func.max(PlaylistEntry.order))\
-                      .filter_by(frame_id=frame_id)\
-                      .scalar() or -1
+        # New photos are appended after the current last entry
+        first_order = playlist_ordering.order_at_end(db.session, PlaylistEntry, frame_id=frame_id)
 
         # Add each photo to the database and playlist
         added_count = 0
@@ -5406,7 +5584,7 @@ def add_unsplash_to_frame():
                 entry = PlaylistEntry(
                     frame_id=frame_id,
                     photo_id=photo.id,
-                    order=max_order + 1 + i
+                    order=first_order + i * playlist_ordering.ORDER_GAP
                 )
                 db.session.add(entry)
                 added_count += 1
@@ -5479,9 +5657,7 @@ def test_unsplash_schedule(schedule_id):
         playlist_entry = PlaylistEntry(
             frame_id=schedule.frame_id,
             photo_id=photo.id,
-            order=db.session.query(db.func.max(PlaylistEntry.order))
-                      .filter_by(frame_id=schedule.frame_id)
-                      .scalar() or 0 + 1
+            order=playlist_ordering.order_at_end(db.session, PlaylistEntry, frame_id=schedule.frame_id)
         )
         db.session.add(playlist_entry)
 
@@ -5577,9 +5753,7 @@ def execute_generation(schedule_id):
                 playlist_entry = PlaylistEntry(
                     frame_id=schedule.frame_id,
                     photo_id=photo.id,
-                    order=db.session.query(db.func.max(PlaylistEntry.order))
-                              .filter_by(frame_id=schedule.frame_id)
-                              .scalar() or 0 + 1
+                    order=playlist_ordering.order_at_end(db.session, PlaylistEntry, frame_id=schedule.frame_id)
                 )
                 db.session.add(playlist_entry)
 
@@ -5711,10 +5885,8 @@ def add_pixabay_to_frame():
         if not frame:
             return jsonify({'error': 'Frame not found'}), 404
 
-        # Get current max order
-        max_order = db.session.query(db.func.max(PlaylistEntry.order))\
-                      .filter_by(frame_id=frame_id)\
-                      .scalar() or -1
+        # New photos are appended after the current last entry
+        first_order = playlist_ordering.order_at_end(db.session, PlaylistEntry, frame_id=frame_id)
 
         # Add each photo to the playlist
         added_count = 0
@@ -5782,7 +5954,7 @@ def add_pixabay_to_frame():
                 entry = PlaylistEntry(
                     frame_id=frame_id,
                     photo_id=photo.id,
-                    order=max_order + 1 + i
+                    order=first_order + i * playlist_ordering.ORDER_GAP
                 )
                 db.session.add(entry)
                 added_count += 1
@@ -5880,9 +6052,7 @@ def test_pixabay_schedule(schedule_id):
         playlist_entry = PlaylistEntry(
             frame_id=schedule.frame_id,
             photo_id=photo.id,
-            order=db.session.query(db.func.max(PlaylistEntry.order))
-                      .filter_by(frame_id=schedule.frame_id)
-                      .scalar() or 0 + 1
+            order=playlist_ordering.order_at_end(db.session, PlaylistEntry, frame_id=schedule.frame_id)
         )
         db.session.add(playlist_entry)
 
@@ -6101,9 +6271,7 @@ def execute_generation(schedule_id):
                 playlist_entry = PlaylistEntry(
                     frame_id=schedule.frame_id,
                     photo_id=photo.id,
-                    order=db.session.query(db.func.max(PlaylistEntry.order))
-                              .filter_by(frame_id=schedule.frame_id)
-                              .scalar() or 0 + 1
+                    order=playlist_ordering.order_at_end(db.session, PlaylistEntry, frame_id=schedule.frame_id)
                 )
                 db.session.add(playlist_entry)
 
@@ -6244,10 +6412,7 @@ def add_to_custom_playlist(playlist_id):
     
     try:
         # Get the next order number
-        next_order = db.session.query(db.func.max(PlaylistEntry.order)).filter(
-            PlaylistEntry.custom_playlist_id == playlist_id 
-        ).scalar() or 0
-        next_order += 1
+        next_order = playlist_ordering.order_at_end(db.session, PlaylistEntry, custom_playlist_id=playlist_id)
         
         # Add new entries
         entries_added = []
@@ -6261,7 +6426,7 @@ def add_to_custom_playlist(playlist_id):
             )
             db.session.add(entry)
             entries_added.append(entry)
-            next_order += 1
+            next_order += playlist_ordering.ORDER_GAP
         
         db.session.commit()
         
@@ -6282,13 +6447,29 @@ def add_to_custom_playlist(playlist_id):
         return jsonify({'error': str(e)}), 500
 @app.route('/api/photos')
 def get_all_photos():
-    """Get all photos for the photo selector."""
-    photos = Photo.query.order_by(Photo.uploaded_at.desc()).all()
-    return jsonify([{
-        'id': photo.id,
-        'filename': photo.filename,
-        'thumbnail': photo.thumbnail
-    } for photo in photos])
+    """
+    List photos one page at a time for the photo selectors.
+
+    Query parameters: limit, cursor (next_cursor of the previous page),
+    order ('desc' newest first, or 'asc'), fields (comma-separated), and the
+    filters media_type, since, until (ISO dates) and analyzed (true/false).
+    """
+    try:
+        options = photo_listing.parse_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    fields = options.pop('fields')
+    photos, next_cursor = photo_listing.list_photos(db.session, Photo, **options)
+
+    response = jsonify({
+        'photos': [photo_listing.serialize(photo, fields) for photo in photos],
+        'next_cursor': next_cursor
+    })
+    # Let clients revalidate a page they already have
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 @app.route('/api/frames/<frame_id>/apply-playlist/<int:playlist_id>', methods=['POST'])
 def apply_playlist_to_frame(frame_id, playlist_id):
@@ -6300,13 +6481,14 @@ def apply_playlist_to_frame(frame_id, playlist_id):
         
         # Delete existing frame playlist entries
         PlaylistEntry.query.filter_by(frame_id=frame_id).delete()
+        playlist_cursor.reset_cursor(frame)
         
         # Copy entries from custom playlist to frame
         for i, entry in enumerate(playlist.entries):
             new_entry = PlaylistEntry(
                 frame_id=frame_id,
                 photo_id=entry.photo_id,
-                order=i
+                order=i * playlist_ordering.ORDER_GAP
             )
             db.session.add(new_entry)
         
@@ -6329,17 +6511,8 @@ def delete_playlist_entry(playlist_id, entry_id):
         if entry.custom_playlist_id != playlist_id:
             return jsonify({'error': 'Entry does not belong to this playlist'}), 400
         
-        # Delete the entry
+        # Delete the entry (gaps in the order are fine, see playlist_ordering)
         db.session.delete(entry)
-        
-        # Reorder remaining entries to ensure no gaps
-        remaining_entries = PlaylistEntry.query.filter_by(
-            custom_playlist_id=playlist_id
-        ).order_by(PlaylistEntry.order).all()
-        
-        for i, entry in enumerate(remaining_entries):
-            entry.order = i
-        
         db.session.commit()
         return jsonify({'success': True})
         
@@ -6356,6 +6529,26 @@ def reorder_playlist_entries(playlist_id):
         
         # Get the entries data from request
         data = request.get_json()
+
+        # Single move: {"move": {"id": ..., "after_id": ..., "before_id": ...}}
+        # Only the moved entry is written; after_id/before_id are its new neighbours
+        if data and 'move' in data:
+            move = data['move']
+            neighbour_ids = [move.get('after_id'), move.get('before_id')]
+            entries_by_id = {entry.id: entry for entry in PlaylistEntry.query.filter(
+                PlaylistEntry.id.in_([move.get('id')] + [i for i in neighbour_ids if i is not None]),
+                PlaylistEntry.custom_playlist_id == playlist_id
+            ).all()}
+            entry = entries_by_id.get(move.get('id'))
+            if not entry or any(i is not None and i not in entries_by_id for i in neighbour_ids):
+                return jsonify({'error': 'Invalid entry IDs provided'}), 400
+
+            playlist_ordering.move_between(db.session, PlaylistEntry, entry,
+                                           entries_by_id.get(move.get('after_id')),
+                                           entries_by_id.get(move.get('before_id')))
+            db.session.commit()
+            return jsonify({'success': True, 'order': entry.order})
+
         if not data or 'entries' not in data:
             return jsonify({'error': 'No entries provided'}), 400
             
@@ -6371,10 +6564,10 @@ def reorder_playlist_entries(playlist_id):
         if len(db_entries) != len(entry_ids):
             return jsonify({'error': 'Invalid entry IDs provided'}), 400
             
-        # Update order for each entry
+        # Update order for each entry (spaced out so later moves touch one row)
         for entry_data in entries:
             entry = next(e for e in db_entries if e.id == entry_data['id'])
-            entry.order = entry_data['order']
+            entry.order = entry_data['order'] * playlist_ordering.ORDER_GAP
             
         db.session.commit()
         return jsonify({'success': True})
@@ -6414,12 +6607,24 @@ if __name__ == '__main__':
             logger.info("Database connection successful.")
             # Create tables if they don't exist
             db.create_all()
+            # create_all() doesn't touch existing tables; add columns and indexes introduced since
+            from db_manager import add_missing_columns, ensure_indexes
+            add_missing_columns(db.engine, db.metadata)
+            ensure_indexes(db.engine, db.metadata)
             logger.info("Database tables ensured.")
         except Exception as db_e:
             logger.error(f"Database initialization failed: {db_e}", exc_info=True)
             # Depending on the error, might want to exit
             exit(1)
 
+        # Remove temp renders left behind by versions that rendered through disk
+        for temp_dir in (app.config['UPLOAD_FOLDER'], os.path.join(app.config['UPLOAD_FOLDER'], 'temp')):
+            if os.path.isdir(temp_dir):
+                cleanup_temp_files(temp_dir, max_age_hours=0)
+
+        # Fork render workers before any background threads are started
+        render_executor.start()
+
         # Initialize core app services (Scheduler, Integrations, Discovery)
         logger.info("Initializing application services...")
         init_app_services() # This calls init_integrations, init_scheduler, starts timing manager and discovery
@@ -6454,5 +6659,7 @@ if __name__ == '__main__':
     # Start the Flask development server
     # Use debug=False in production or when using external debuggers/profilers
     # Use use_reloader=False if startup tasks (like scheduler) are duplicated
-    app.run(host='0.0.0.0', port=server_settings.get('discovery_port', ZEROCONF_PORT), debug=True, use_reloader=False)
+    # threaded=True serves each request (and each open event stream) on its own thread
+    app.run(host='0.0.0.0', port=server_settings.get('discovery_port', ZEROCONF_PORT), debug=True, use_reloader=False,
+            threaded=True)
 
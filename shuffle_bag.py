@@ -0,0 +1,164 @@
+import logging
+import random
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+# Server-side shuffle bags
+#
+# A shuffled frame plays a stored permutation of its playlist entry ids
+# (PhotoFrame.shuffle_bag) from shuffle_position onwards, so every photo is
+# shown once per cycle and nothing depends on the frame keeping a session
+# cookie. Picking the next entry reads one id from the bag and loads that row
+# by primary key; the playlist is only listed when a new bag is dealt, once
+# per cycle.
+#
+# The permutation is derived from a seed and the frame's playlist_epoch (the
+# cycle number). Frames in a sync group with a shared shuffle seed deal over
+# photo ids instead of their own entry ids and number cycles on the group
+# (SyncGroup.shuffle_cycle), so members with the same photos play them in the
+# same order. Adding entries throws the bag away (it is dealt again on the
+# next pick); removed entries are skipped.
+# ------------------------------------------------------------------------------
+
+# Session.info key for the frames whose bags the current flush makes stale
+_STALE_BAGS_KEY = 'shuffle_bag_stale_frames'
+
+def new_seed():
+    """Return a random seed for a frame or sync group."""
+    return random.randint(1, 2**31 - 1)
+
+def frame_seed(frame):
+    """Return the seed a frame's bags are dealt from, creating one if needed."""
+    group = getattr(frame, 'sync_group', None)
+    if group is not None and group.shuffle_seed:
+        return group.shuffle_seed
+    if not frame.shuffle_seed:
+        frame.shuffle_seed = new_seed()
+    return frame.shuffle_seed
+
+def deal(keys, seed, epoch):
+    """
+    Shuffle keys (entry ids, or (photo id, entry id) pairs) deterministically
+    for a seed and cycle number.
+
+    Returns:
+        list: The keys in play order
+    """
+    bag = sorted(keys)
+    random.Random(f"{seed}:{epoch}").shuffle(bag)
+    return bag
+
+def _deal_group_member(session, PlaylistEntry, frame, group):
+    """Start a new cycle for a frame that shuffles in step with its sync group."""
+    # Entry ids differ between members, so the order is dealt over photo ids
+    keys = [(photo_id, entry_id) for photo_id, entry_id in session.query(PlaylistEntry.photo_id, PlaylistEntry.id)
+            .filter(PlaylistEntry.frame_id == frame.id).all()]
+
+    # The first member to finish the group's current cycle opens the next one;
+    # the others (and frames that just joined) catch up to it
+    cycle = group.shuffle_cycle or 0
+    if (frame.playlist_epoch or 0) >= cycle:
+        cycle += 1
+        group.shuffle_cycle = cycle
+    frame.playlist_epoch = cycle
+    bag = deal(keys, group.shuffle_seed, cycle)
+
+    # Don't open a cycle with the photo that closed the previous one. Checked
+    # against the previous deal, not the frame's history, so all members agree.
+    if len(bag) > 1 and deal(keys, group.shuffle_seed, cycle - 1)[-1][0] == bag[0][0]:
+        bag[0], bag[-1] = bag[-1], bag[0]
+
+    frame.shuffle_bag = [entry_id for _, entry_id in bag]
+    frame.shuffle_position = 0
+    logger.debug(f"Dealt shuffle bag of {len(bag)} entries for frame {frame.id} (sync group {group.id}, cycle {cycle})")
+
+def _deal_frame(session, PlaylistEntry, frame):
+    """Start a new cycle: deal a fresh bag from the frame's current playlist."""
+    group = getattr(frame, 'sync_group', None)
+    if group is not None and group.shuffle_seed:
+        _deal_group_member(session, PlaylistEntry, frame, group)
+        return
+
+    entry_ids = [row[0] for row in session.query(PlaylistEntry.id)
+                 .filter(PlaylistEntry.frame_id == frame.id).all()]
+    frame.playlist_epoch = (frame.playlist_epoch or 0) + 1
+    bag = deal(entry_ids, frame_seed(frame), frame.playlist_epoch)
+
+    # Don't open a cycle with the photo that closed the previous one
+    if len(bag) > 1 and bag[0] == frame.playlist_cursor_id:
+        bag[0], bag[-1] = bag[-1], bag[0]
+
+    frame.shuffle_bag = bag
+    frame.shuffle_position = 0
+    logger.debug(f"Dealt shuffle bag of {len(bag)} entries for frame {frame.id} (cycle {frame.playlist_epoch})")
+
+def _bag_entries(session, PlaylistEntry, frame):
+    """Yield (index, entry) for the entries left in the bag, skipping removed ones."""
+    bag = frame.shuffle_bag or []
+    for index in range(frame.shuffle_position or 0, len(bag)):
+        entry = session.get(PlaylistEntry, bag[index])
+        if entry is not None and entry.frame_id == frame.id:
+            yield index, entry
+
+def peek_shuffled(session, PlaylistEntry, frame):
+    """
+    Get the entry a shuffled frame plays next, without drawing it.
+
+    Returns None when the bag is used up (the next entry depends on the next deal).
+    """
+    return next((entry for _, entry in _bag_entries(session, PlaylistEntry, frame)), None)
+
+def next_shuffled(session, PlaylistEntry, frame):
+    """
+    Draw the next entry from a frame's shuffle bag, dealing a new bag when needed.
+
+    The caller commits; the frame row is the only one modified.
+
+    Returns:
+        PlaylistEntry or None if the playlist is empty
+    """
+    for attempt in range(2):
+        for index, entry in _bag_entries(session, PlaylistEntry, frame):
+            frame.shuffle_position = index + 1
+            return entry
+        if attempt == 0:
+            _deal_frame(session, PlaylistEntry, frame)
+    return None
+
+def invalidate(frame):
+    """Throw away a frame's bag so the next pick deals a new one."""
+    frame.shuffle_bag = None
+    frame.shuffle_position = 0
+
+def register_invalidation(PlaylistEntry, PhotoFrame):
+    """
+    Drop a frame's shuffle bag whenever an entry is added to its playlist, so
+    new photos join the rotation on the next deal.
+
+    Inserted entries only note their frame in the session; each flush then
+    clears all those bags in one UPDATE, however many entries were added.
+    """
+    frame_table = PhotoFrame.__table__
+
+    @event.listens_for(PlaylistEntry, 'after_insert')
+    def _entry_added(mapper, connection, target):
+        session = object_session(target)
+        if target.frame_id is not None and session is not None:
+            session.info.setdefault(_STALE_BAGS_KEY, set()).add(target.frame_id)
+
+    @event.listens_for(Session, 'after_flush')
+    def _clear_stale_bags(session, flush_context):
+        frame_ids = session.info.pop(_STALE_BAGS_KEY, None)
+        if frame_ids:
+            session.connection().execute(frame_table.update()
+                                         .where(frame_table.c.id.in_(frame_ids))
+                                         .values(shuffle_bag=None, shuffle_position=0))
+
+    @event.listens_for(Session, 'after_rollback')
+    def _forget_stale_bags(session):
+        # A failed flush never reached after_flush; its inserts are gone too
+        session.info.pop(_STALE_BAGS_KEY, None)
@@ -0,0 +1,69 @@
+import io
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from photo_processing import (BACKEND_TOLERANCE, WAND_AVAILABLE, PhotoProcessor,
+                              contrast_stretch, contrast_stretch_points)
+
+# Mean absolute per-channel difference allowed between our stretch and Wand's
+STRETCH_TOLERANCE = 2.0
+
+def _gradient_image(width=160, height=120):
+    """Smooth RGB test image with a different spread in every channel."""
+    x = np.linspace(0.0, 1.0, width)[None, :]
+    y = np.linspace(0.0, 1.0, height)[:, None]
+    red = 40 + 150 * x * np.ones_like(y)
+    green = 90 + 60 * y * np.ones_like(x)
+    blue = 20 + 200 * (x * y)
+    noise = np.random.default_rng(7).normal(0, 6, (height, width, 3))
+    pixels = np.dstack([red, green, blue]) + noise
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), 'RGB')
+
+def test_flat_image_is_unchanged():
+    grey = Image.new('RGB', (64, 48), (128, 128, 128))
+    for contrast_factor in (0.5, 1.0, 2.0):
+        stretched = contrast_stretch(grey, *contrast_stretch_points(contrast_factor))
+        assert stretched.getpixel((0, 0)) == (128, 128, 128)
+
+def test_flat_channel_next_to_stretched_channels():
+    pixels = np.asarray(_gradient_image()).copy()
+    pixels[:, :, 1] = 77
+    stretched = np.asarray(contrast_stretch(Image.fromarray(pixels), 0.1, 0.9))
+    assert (stretched[:, :, 1] == 77).all()
+    assert stretched[:, :, 0].min() == 0 and stretched[:, :, 0].max() == 255
+
+def test_clips_requested_fractions():
+    pixels = np.random.default_rng(0).integers(0, 256, (100, 100, 3), dtype=np.uint8)
+    stretched = np.asarray(contrast_stretch(Image.fromarray(pixels), 0.1, 0.9))
+    for channel in range(3):
+        assert abs((stretched[:, :, channel] == 0).mean() - 0.1) < 0.01
+        assert abs((stretched[:, :, channel] == 255).mean() - 0.1) < 0.01
+
+@pytest.mark.skipif(not WAND_AVAILABLE, reason="Wand is not installed")
+@pytest.mark.parametrize('contrast_factor', [0.5, 1.0, 2.0])
+def test_matches_wand_contrast_stretch(contrast_factor):
+    from wand.image import Image as WandImage
+
+    img = _gradient_image()
+    black_point, white_point = contrast_stretch_points(contrast_factor)
+
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    with WandImage(blob=buffer.getvalue(), format='png') as wand_img:
+        wand_img.contrast_stretch(black_point=black_point, white_point=white_point)
+        expected = Image.open(io.BytesIO(wand_img.make_blob(format='png'))).convert('RGB')
+
+    actual = contrast_stretch(img, black_point, white_point)
+    diff = np.abs(np.asarray(actual, dtype=np.int16) - np.asarray(expected, dtype=np.int16))
+    assert diff.mean() <= STRETCH_TOLERANCE
+
+@pytest.mark.skipif(not WAND_AVAILABLE, reason="Wand is not installed")
+def test_backends_within_tolerance():
+    frame = SimpleNamespace(contrast_factor=1.5, saturation=120, blue_adjustment=10, padding=0,
+                            color_map=None, screen_resolution='160x120', orientation='landscape')
+    result = PhotoProcessor().compare_backends(_gradient_image(), frame)
+    assert result['within_tolerance'], result
+    assert result['tolerance'] == BACKEND_TOLERANCE
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from imgToArray import img_to_array
+from photo_processing import PhotoProcessor, decode_for_size
+
+# Large enough that decode_for_size reduces it before the final resample
+SIZE = (5000, 4000)
+
+def _palette_image():
+    rng = np.random.default_rng(0)
+    img = Image.fromarray(rng.integers(0, 256, (SIZE[1] // 100, SIZE[0] // 100, 3), dtype=np.uint8))
+    return img.resize(SIZE, Image.NEAREST).quantize(colors=64)
+
+def _sixteen_bit_image():
+    ramp = np.linspace(0, 65535, SIZE[0], dtype=np.uint32)
+    pixels = np.broadcast_to(ramp, (SIZE[1], SIZE[0])).astype(np.uint16)
+    img = Image.fromarray(pixels)
+    assert img.mode == 'I;16'
+    return img
+
+def _one_bit_image():
+    return Image.new('1', SIZE, 1)
+
+@pytest.fixture(params=['palette', '16-bit', '1-bit'])
+def large_image(request, tmp_path):
+    img = {'palette': _palette_image, '16-bit': _sixteen_bit_image, '1-bit': _one_bit_image}[request.param]()
+    path = tmp_path / 'large.png'
+    img.save(path)
+    return str(path)
+
+def test_decode_for_size_reduces_unsupported_modes(large_image):
+    img = decode_for_size(large_image, (1600, 1600))
+    assert max(img.size) < max(SIZE)
+
+def test_generate_derivatives(large_image, tmp_path):
+    result = PhotoProcessor().generate_derivatives(large_image, str(tmp_path / 'thumb.jpg'))
+    for name in ('thumbnail', 'portrait', 'landscape'):
+        assert result[name] is not None, name
+        with Image.open(result[name]) as derivative:
+            assert derivative.size[0] > 0
+
+def test_img_to_array(large_image):
+    assert len(img_to_array(Image.open(large_image))) > 0
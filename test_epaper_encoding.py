@@ -0,0 +1,120 @@
+import zlib
+
+import numpy as np
+import pytest
+
+import epaper_encoding
+from epaper_encoding import decode, encode, encode_delta, read_header
+
+PIXELS = epaper_encoding.PANEL_WIDTH * epaper_encoding.PANEL_HEIGHT * epaper_encoding.BITS_PER_PIXEL // 8
+
+def _samples():
+    rng = np.random.default_rng(0)
+    return {
+        'blank': bytes([0x11]) * PIXELS,
+        'noise': rng.integers(0, 256, PIXELS, dtype=np.uint8).tobytes(),
+        'bands': np.repeat(rng.integers(0, 256, PIXELS // 100, dtype=np.uint8), 100).tobytes(),
+        'short runs': np.repeat(rng.integers(0, 256, PIXELS // 2, dtype=np.uint8), 2).tobytes(),
+    }
+
+SAMPLES = _samples()
+
+@pytest.mark.parametrize('encoding', ['raw', 'rle', 'zlib'])
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_round_trip(name, encoding):
+    buffer = SAMPLES[name]
+    encoded = encode(buffer, encoding)
+    assert decode(encoded) == buffer
+    header = read_header(encoded)
+    assert header['length'] == len(buffer)
+    assert header['crc32'] == zlib.crc32(buffer)
+
+@pytest.mark.parametrize('data', [
+    b'',
+    bytes([1, 2, 2, 3, 3, 3]) + bytes(300) + bytes(range(256)) * 3 + bytes([7]),
+    bytes([5]) * 129 + bytes([6, 6]) + bytes([7]) * 3,
+])
+def test_rle_round_trip_edge_cases(data):
+    assert epaper_encoding.rle_decode(epaper_encoding.rle_encode(data)) == data
+
+def test_incompressible_buffer_is_sent_raw():
+    encoded = encode(SAMPLES['noise'], 'rle')
+    assert read_header(encoded)['encoding'] == 'raw'
+    assert len(encoded) == epaper_encoding.HEADER.size + PIXELS
+    assert decode(encoded) == SAMPLES['noise']
+
+def test_compressible_buffer_keeps_encoding():
+    encoded = encode(SAMPLES['bands'], 'rle')
+    assert read_header(encoded)['encoding'] == 'rle'
+    assert len(encoded) < PIXELS
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        encode(SAMPLES['blank'], 'lz4')
+
+def test_truncated_header():
+    with pytest.raises(ValueError):
+        decode(encode(SAMPLES['blank'], 'rle')[:epaper_encoding.HEADER.size - 1])
+
+@pytest.mark.parametrize('encoding', ['raw', 'rle', 'zlib'])
+def test_truncated_payload(encoding):
+    encoded = encode(SAMPLES['bands'], encoding)
+    with pytest.raises(ValueError):
+        decode(encoded[:-1])
+
+def test_truncated_rle_packets():
+    with pytest.raises(ValueError):
+        epaper_encoding.rle_decode(bytes([5, 1, 2]))
+    with pytest.raises(ValueError):
+        epaper_encoding.rle_decode(bytes([250]))
+
+@pytest.mark.parametrize('encoding', ['raw', 'rle'])
+def test_corrupted_payload_fails_crc(encoding):
+    encoded = bytearray(encode(SAMPLES['bands'], encoding))
+    # The last byte is pixel data in both encodings, so only the checksum can catch it
+    encoded[-1] ^= 0x01
+    with pytest.raises(ValueError, match='checksum'):
+        decode(bytes(encoded))
+
+@pytest.mark.parametrize('encoding', ['raw', 'rle', 'zlib'])
+def test_header_crc_mismatch(encoding):
+    encoded = bytearray(encode(SAMPLES['bands'], encoding))
+    encoded[16] ^= 0xFF
+    with pytest.raises(ValueError, match='checksum'):
+        decode(bytes(encoded))
+
+def test_bad_magic():
+    encoded = bytearray(encode(SAMPLES['blank'], 'raw'))
+    encoded[0:4] = b'XXXX'
+    with pytest.raises(ValueError):
+        decode(bytes(encoded))
+
+def _changed(base):
+    target = bytearray(base)
+    target[600 * 100 + 10:600 * 100 + 20] = bytes(10)
+    target[-1] ^= 0xFF
+    return bytes(target)
+
+def test_delta_round_trip():
+    base = SAMPLES['noise']
+    target = _changed(base)
+    delta = encode_delta(base, target)
+    assert delta is not None
+    assert read_header(delta)['encoding'] == 'delta'
+    assert len(epaper_encoding.changed_tiles(base, target)) == 2
+    assert decode(delta, base) == target
+
+def test_delta_needs_base():
+    base = SAMPLES['noise']
+    with pytest.raises(ValueError):
+        decode(encode_delta(base, _changed(base)))
+
+def test_delta_on_wrong_base():
+    base = SAMPLES['noise']
+    delta = encode_delta(base, _changed(base))
+    with pytest.raises(ValueError, match='base buffer'):
+        decode(delta, SAMPLES['bands'])
+
+def test_delta_not_worth_it():
+    assert encode_delta(SAMPLES['noise'], SAMPLES['blank']) is None
+    assert encode_delta(SAMPLES['noise'], SAMPLES['noise'][:-1]) is None
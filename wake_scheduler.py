@@ -0,0 +1,186 @@
+import logging
+import math
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+# Wake-storm smoothing
+#
+# /api/settings tells a frame to sleep sleep_interval minutes, so frames that
+# booted (or were powered on after an outage) together wake together forever
+# and their renders pile up in the same seconds. The WakeScheduler keeps the
+# projected wake time of every frame in fixed-width slots. When smoothing is
+# enabled, a frame's next wake is moved by at most a small tolerance to the
+# least busy slot nearby; repeated at every wake, phase-locked frames drift
+# apart while each keeps its average cadence.
+# ------------------------------------------------------------------------------
+
+# Width of a load slot in seconds
+SLOT_SECONDS = 10
+
+# A wake may move by this fraction of the frame's sleep interval...
+DEFAULT_TOLERANCE_PERCENT = 5
+
+# ...but never by more than this many seconds
+DEFAULT_MAX_SHIFT_SECONDS = 60
+
+def _ensure_aware(dt):
+    """Treat naive datetimes as UTC."""
+    if dt.tzinfo is None or dt.tzinfo.utcoffset(dt) is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+class WakeScheduler:
+    """
+    Tracks projected frame wakes per time slot and spreads new wakes out.
+    """
+
+    def __init__(self, enabled=False, slot_seconds=SLOT_SECONDS,
+                 tolerance_percent=DEFAULT_TOLERANCE_PERCENT, max_shift_seconds=DEFAULT_MAX_SHIFT_SECONDS):
+        """
+        Initialize the wake scheduler.
+
+        Args:
+            enabled: Shift wakes in assign(); when False wakes are only tracked
+            slot_seconds: Width of a load slot
+            tolerance_percent: Largest shift as a percentage of the sleep interval
+            max_shift_seconds: Largest shift in seconds
+        """
+        self.enabled = enabled
+        self.slot_seconds = slot_seconds
+        self.tolerance_percent = tolerance_percent
+        self.max_shift_seconds = max_shift_seconds
+
+        self._lock = threading.Lock()
+        self._wakes = {}          # frame id -> projected wake slot
+        self._slots = Counter()   # slot -> number of frames waking in it
+        self.stats = {'assigned': 0, 'shifted': 0, 'total_shift_seconds': 0.0}
+
+    def _slot(self, wake):
+        return math.floor(_ensure_aware(wake).timestamp() / self.slot_seconds)
+
+    def _set(self, frame_id, slot):
+        """Move a frame's projected wake to a slot (None removes it). Caller holds the lock."""
+        previous = self._wakes.pop(frame_id, None)
+        if previous is not None:
+            self._slots[previous] -= 1
+            if self._slots[previous] <= 0:
+                del self._slots[previous]
+        if slot is not None:
+            self._wakes[frame_id] = slot
+            self._slots[slot] += 1
+
+    def seed(self, wakes):
+        """
+        Load the projected wakes known at startup.
+
+        Args:
+            wakes: Iterable of (frame id, next wake datetime)
+        """
+        with self._lock:
+            for frame_id, wake in wakes:
+                if wake is not None:
+                    self._set(frame_id, self._slot(wake))
+        logger.info(f"Wake scheduler tracking {len(self._wakes)} frames (smoothing {'on' if self.enabled else 'off'})")
+
+    def record(self, frame_id, wake):
+        """Track a wake time decided elsewhere (sync groups, deep sleep, frame-reported)."""
+        with self._lock:
+            self._set(frame_id, self._slot(wake) if wake is not None else None)
+
+    def forget(self, frame_id):
+        """Stop tracking a frame (e.g. after it was deleted)."""
+        with self._lock:
+            self._set(frame_id, None)
+
+    def max_shift(self, interval_seconds):
+        """Largest shift, in seconds, allowed for a frame with the given sleep interval."""
+        return min(self.max_shift_seconds, interval_seconds * self.tolerance_percent / 100.0)
+
+    def assign(self, frame_id, desired_wake, interval_seconds):
+        """
+        Choose a frame's next wake near the desired time and track it.
+
+        With smoothing enabled the wake moves to the least busy slot within
+        max_shift(interval_seconds), preferring the smallest shift among equally
+        busy slots; otherwise the desired time is kept.
+
+        Args:
+            frame_id: The waking frame
+            desired_wake: Wake time the frame would get without smoothing
+            interval_seconds: The frame's sleep interval
+
+        Returns:
+            datetime: The wake time to hand to the frame
+        """
+        desired_wake = _ensure_aware(desired_wake)
+        with self._lock:
+            # The frame's current projection is about to be replaced
+            self._set(frame_id, None)
+
+            wake = desired_wake
+            shift_limit = self.max_shift(interval_seconds) if self.enabled else 0
+            if shift_limit >= 1:
+                desired_slot = self._slot(desired_wake)
+                reach = int(shift_limit // self.slot_seconds)
+                best_slot = min(range(desired_slot - reach, desired_slot + reach + 1),
+                                key=lambda slot: (self._slots.get(slot, 0), abs(slot - desired_slot)))
+                if best_slot != desired_slot:
+                    # Whole slots keep the offset within the slot, and reach keeps it within the limit
+                    shift = (best_slot - desired_slot) * self.slot_seconds
+                    wake = desired_wake + timedelta(seconds=shift)
+                    self.stats['shifted'] += 1
+                    self.stats['total_shift_seconds'] += abs(shift)
+
+            self._set(frame_id, self._slot(wake))
+            self.stats['assigned'] += 1
+            self._prune(datetime.now(timezone.utc))
+            return wake
+
+    def _prune(self, now):
+        """Drop projections more than an hour in the past (frames that went offline). Caller holds the lock."""
+        cutoff = self._slot(now - timedelta(hours=1))
+        stale = [frame_id for frame_id, slot in self._wakes.items() if slot < cutoff]
+        for frame_id in stale:
+            self._set(frame_id, None)
+
+    def histogram(self, start=None, minutes=60):
+        """
+        Projected wakes per slot.
+
+        Args:
+            start: First slot's time (default now)
+            minutes: Length of the window
+
+        Returns:
+            dict: slot_seconds, 'slots' as [{'start', 'wakes'}] for every slot
+                in the window (empty ones included), peak and mean per slot
+        """
+        start = _ensure_aware(start or datetime.now(timezone.utc))
+        first = self._slot(start)
+        count = max(1, int(minutes * 60 // self.slot_seconds))
+        with self._lock:
+            counts = [self._slots.get(first + index, 0) for index in range(count)]
+            tracked = len(self._wakes)
+
+        return {
+            'slot_seconds': self.slot_seconds,
+            'tracked_frames': tracked,
+            'peak': max(counts),
+            'mean': round(sum(counts) / count, 3),
+            'slots': [{
+                'start': datetime.fromtimestamp((first + index) * self.slot_seconds, tz=timezone.utc).isoformat(),
+                'wakes': wakes
+            } for index, wakes in enumerate(counts)]
+        }
+
+    def get_stats(self):
+        """Return scheduler statistics for diagnostics."""
+        with self._lock:
+            stats = dict(self.stats, tracked_frames=len(self._wakes))
+        stats['total_shift_seconds'] = round(stats['total_shift_seconds'], 1)
+        return dict(stats, enabled=self.enabled, slot_seconds=self.slot_seconds,
+                    tolerance_percent=self.tolerance_percent, max_shift_seconds=self.max_shift_seconds)